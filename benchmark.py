@@ -0,0 +1,451 @@
+"""
+Depo uygulamasının veri yollarını Streamlit arayüzü olmadan ölçen kıyaslama (benchmark) betiği.
+
+Sentetik bir ürün kataloğu ve hareket geçmişi üretir (Türkçe ürün adları, windows-1254 kodlu
+products.csv ve eski biçimli warehouse_entries.csv), urun.py'deki yükleme, kaydetme, ürün arama,
+raporlama ve silme yollarını geçici bir klasörde ölçer ve sonuçları JSON olarak yazar.
+Önceki bir sonuç dosyası verilirse ortanca süreler karşılaştırılır ve yavaşlayan senaryolar
+listelenir (bu durumda çıkış kodu 1 olur).
+
+Eşzamanlı yazma senaryosu, aynı klasörü kullanan birden çok süreçte birden çok iş parçacığının
+aynı anda kayıt eklediği durumu canlandırır ve sonucu doğrular: sıra numaraları benzersiz olmalı,
+hiçbir kayıt kaybolmamalı ve stok tutarlılık kontrolü fark bulmamalıdır. Doğrulama başarısızsa
+çıkış kodu 1 olur.
+
+Örnekler:
+    python benchmark.py --skus 100000 --movements 1000000 --output sonuc.json
+    python benchmark.py --backend sqlite --compare sonuc.json
+
+Firestore katmanı gerçek bir proje veya emülatör gerektirdiğinden ölçülmez.
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import streamlit.logger
+
+# --- Sentetik Veri Üretimi ---
+PRODUCT_KINDS = [
+    ('VID', 'Vida'), ('SOM', 'Somun'), ('PUL', 'Pul'), ('CIV', 'Cıvata'), ('DUB', 'Dübel'),
+    ('MEN', 'Menteşe'), ('KIL', 'Kilit'), ('KUL', 'Kulp'), ('LED', 'Şerit LED'), ('ANH', 'Işık Anahtarı'),
+    ('PRZ', 'Priz'), ('KBL', 'Kablo'), ('BOR', 'Boru'), ('DIR', 'Dirsek'), ('VAN', 'Vana'),
+    ('MUS', 'Musluk'), ('CEK', 'Çekiç'), ('TRN', 'Tornavida'), ('MTK', 'Matkap Ucu'), ('ZIM', 'Zımpara'),
+    ('FRC', 'Boya Fırçası'), ('SIL', 'Silikon'), ('YAP', 'Yapıştırıcı'), ('ELD', 'İş Eldiveni'), ('GOZ', 'Koruyucu Gözlük'),
+]
+PRODUCT_MATERIALS = ['Çelik', 'Paslanmaz', 'Galvaniz', 'Pirinç', 'Alüminyum', 'Plastik', 'Döküm', 'Ahşap Saplı']
+PRODUCT_COLORS = ['Siyah', 'Beyaz', 'Gri', 'Kırmızı', 'Yeşil', 'Sarı', 'Şeffaf', 'Gümüş']
+PRODUCT_SIZES = ['M4', 'M5', 'M6', 'M8', 'M10', '12 mm', '16 mm', '20 mm', '1/2"', '3/4"', '1 m', '2 m', '5 m', "10'lu", "50'li", "100'lü"]
+PRODUCT_BRANDS = ['Öztürk', 'Yıldız', 'Güneş', 'Doğan', 'Çınar', 'Şahin', 'Kılıç', 'Aydın', 'Işıklar', 'Ünal', 'Gökçe', 'Erdoğdu']
+HISTORY_DAYS = 3 * 365
+FILE_ENCODING = 'windows-1254'
+
+def generate_products(sku_count, rng):
+    """Türkçe karakterli ürün adları içeren, SKU'ları benzersiz bir katalog üretir."""
+    kind_index = rng.integers(0, len(PRODUCT_KINDS), sku_count)
+    kind_codes = np.array([code for code, _ in PRODUCT_KINDS], dtype=object)[kind_index]
+    kind_names = np.array([name for _, name in PRODUCT_KINDS], dtype=object)[kind_index]
+    names = (
+        pd.Series(np.array(PRODUCT_BRANDS, dtype=object)[rng.integers(0, len(PRODUCT_BRANDS), sku_count)]) + ' '
+        + np.array(PRODUCT_MATERIALS, dtype=object)[rng.integers(0, len(PRODUCT_MATERIALS), sku_count)] + ' '
+        + kind_names + ' '
+        + np.array(PRODUCT_SIZES, dtype=object)[rng.integers(0, len(PRODUCT_SIZES), sku_count)] + ' '
+        + np.array(PRODUCT_COLORS, dtype=object)[rng.integers(0, len(PRODUCT_COLORS), sku_count)]
+    )
+    skus = pd.Series(kind_codes) + '-' + pd.Series(np.arange(1, sku_count + 1)).map('{:06d}'.format)
+    return pd.DataFrame({'SKU': skus, 'Urun Adi': names})
+
+def generate_movements(products, movement_count, rng, end_date):
+    """
+    Tarihe göre sıralı bir hareket geçmişi üretir. Ürün popülerliği çarpık dağılır
+    (az sayıda ürün hareketlerin çoğunu oluşturur); girişler çıkışlardan biraz fazladır.
+    """
+    popularity = 1.0 / np.arange(1, len(products) + 1) ** 0.8
+    product_rows = rng.choice(len(products), size=movement_count, p=popularity / popularity.sum())
+    day_offsets = np.sort(rng.integers(0, HISTORY_DAYS, movement_count))
+    dates = pd.Timestamp(end_date) - pd.to_timedelta(HISTORY_DAYS - 1 - day_offsets, unit='D')
+    return pd.DataFrame({
+        'Tarih': dates.strftime('%Y-%m-%d'),
+        'SKU': products['SKU'].to_numpy()[product_rows],
+        'Urun Adi': products['Urun Adi'].to_numpy()[product_rows],
+        'Adet': np.ceil(rng.lognormal(1.5, 1.0, movement_count)).astype('int64').clip(1, 1000),
+        'Islem Tipi': np.where(rng.random(movement_count) < 0.55, 'Giriş', 'Çıkış'),
+    })
+
+def write_dataset(directory, products, movements):
+    """Veri setini uygulamanın beklediği dosya adlarıyla, windows-1254 kodlamasında yazar."""
+    products.to_csv(os.path.join(directory, 'products.csv'), sep=';', index=False, encoding=FILE_ENCODING)
+    # Eski tam-dosya biçimi; ilk açılışta deftere aktarılır
+    movements.to_csv(os.path.join(directory, 'warehouse_entries.csv'), index=False, encoding=FILE_ENCODING)
+
+# --- Streamlit Yer Tutucuları ---
+STUBBED_ELEMENTS = ['error', 'warning', 'info', 'success', 'caption', 'write', 'markdown', 'toast']
+
+class StreamlitMessages:
+    """
+    Uygulamanın st.error, st.warning ... çağrılarını ekrana basmak yerine toplar. Ölçüm
+    sırasında bir hata mesajı üretilirse sonuçla birlikte raporlanır.
+    """
+
+    def __init__(self):
+        self.messages = []
+
+    def install(self):
+        for target, prefix in ((st, 'st'), (st.sidebar, 'st.sidebar')):
+            for element in STUBBED_ELEMENTS:
+                setattr(target, element, self._recorder(f'{prefix}.{element}'))
+
+    def _recorder(self, element):
+        def record(body='', *args, **kwargs):
+            self.messages.append({'oge': element, 'mesaj': str(body)})
+        return record
+
+    def errors(self):
+        return [message for message in self.messages if message['oge'].endswith(('error', 'warning'))]
+
+def import_app():
+    """urun.py'yi arayüzü çalıştırmadan içe aktarır. Önbellekler Streamlit'in bellek içi deposunu kullanır."""
+    # Çalışma zamanı (runtime) olmadan kullanılan önbellek ve öğelerin uyarıları bastırılır
+    streamlit.logger.set_log_level('error')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import urun
+    return urun
+
+def reset_app(urun, backend):
+    """Depolama katmanını seçer ve süreç içindeki tüm önbellekleri boşaltır."""
+    urun.STORAGE_BACKEND = backend
+    for cached in (urun.get_storage, urun.get_write_coordinator, urun._load_products_version,
+                   urun._load_entries_version, urun.get_product_search_index, urun.get_product_lookup):
+        cached.clear()
+
+# --- Eşzamanlı Yazma ---
+def _concurrent_writer(work_dir, backend, thread_count, append_count, rows, results):
+    """
+    Eşzamanlı yazma senaryosunun alt süreci. thread_count iş parçacığının her biri, oturumların
+    yaptığı gibi süreç içi yazma koordinatörü üzerinden append_count kez tek satır ekler.
+    """
+    os.chdir(work_dir)
+    StreamlitMessages().install()
+    urun = import_app()
+    reset_app(urun, backend)
+    coordinator = urun.get_write_coordinator()
+    errors = []
+
+    def write(thread_number):
+        for number in range(append_count):
+            row = (thread_number * append_count + number) % len(rows)
+            try:
+                coordinator.append(rows.iloc[[row]].reset_index(drop=True))
+            except Exception as e:
+                errors.append(repr(e))
+
+    threads = [threading.Thread(target=write, args=(number,)) for number in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put({'istek': coordinator.request_count, 'toplu_yazma': coordinator.commit_count, 'hatalar': errors})
+
+def run_concurrent_writers(urun, backend, work_dir, rows, process_count, thread_count, append_count):
+    """
+    process_count süreçte thread_count iş parçacığıyla eşzamanlı yazar ve sonucu doğrular.
+    Sorunları (boşsa doğrulama başarılı) ve alt süreçlerin sayaçlarını döndürür.
+    """
+    storage = urun.get_storage()
+    before = storage.read_entries()
+    before_stock = storage.stock_balances()
+
+    # spawn: alt süreçler üst sürecin iş parçacıklarını ve açık dosya kilitlerini devralmaz
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [
+        context.Process(target=_concurrent_writer, args=(work_dir, backend, thread_count, append_count, rows, results))
+        for _ in range(process_count)
+    ]
+    for process in processes:
+        process.start()
+    counters = [results.get(timeout=600) for _ in processes]
+    for process in processes:
+        process.join()
+
+    # Diğer süreçlerin yazdıkları yeni bir depolama nesnesiyle okunur
+    urun.get_storage.clear()
+    urun.get_write_coordinator.clear()
+    storage = urun.get_storage()
+    after = storage.read_entries()
+    expected = process_count * thread_count * append_count
+    problems = [error for counter in counters for error in counter['hatalar']]
+    if not after['Sira'].is_unique:
+        problems.append(f"Yinelenen sıra numaraları: {after.loc[after['Sira'].duplicated(), 'Sira'].head(10).tolist()}")
+    if len(after) - len(before) != expected:
+        problems.append(f"Beklenen {expected} yeni kayıt, bulunan {len(after) - len(before)}")
+    new_entries = after[~after['Sira'].isin(before['Sira'])]
+    expected_stock = dict(before_stock)
+    for sku, delta in urun.stock_deltas(new_entries).items():
+        expected_stock[sku] = expected_stock.get(sku, 0) + delta
+    if {sku: stok for sku, stok in storage.stock_balances().items() if stok} != {sku: stok for sku, stok in expected_stock.items() if stok}:
+        problems.append("Stok bakiyeleri eklenen kayıtlarla uyuşmuyor")
+    mismatches = storage.check_stock_balances()
+    if not mismatches.empty:
+        problems.append(f"Stok tutarlılık kontrolü {len(mismatches)} fark buldu")
+    return problems, counters
+
+# --- Ölçüm ---
+class Benchmark:
+    """Senaryoları çalıştırır ve her birinin sürelerini katman adıyla birlikte saklar."""
+
+    def __init__(self, backend, repeat):
+        self.backend = backend
+        self.repeat = repeat
+        self.results = []
+
+    def measure(self, scenario, fn, setup=None, repeat=None, rows=None):
+        """fn'i `repeat` kez çalıştırır; setup verilirse her ölçümden önce, süreye katılmadan çağrılır."""
+        timings = []
+        for _ in range(repeat or self.repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        result = {
+            'katman': self.backend,
+            'senaryo': scenario,
+            'tekrar': len(timings),
+            'min_s': min(timings),
+            'medyan_s': statistics.median(timings),
+            'maks_s': max(timings),
+            'olcumler_s': timings,
+        }
+        if rows is not None:
+            result['satir'] = rows
+        self.results.append(result)
+        print(f"  {self.backend:<7} {scenario:<40} medyan {result['medyan_s'] * 1000:10.2f} ms  min {result['min_s'] * 1000:10.2f} ms")
+        return result
+
+def run_backend(urun, backend, dataset_dir, work_root, args, rng):
+    """Bir depolama katmanı için veri setini yeni bir klasöre kopyalar ve tüm senaryoları ölçer."""
+    work_dir = os.path.join(work_root, backend)
+    shutil.copytree(dataset_dir, work_dir)
+    os.chdir(work_dir)
+    reset_app(urun, backend)
+    bench = Benchmark(backend, args.repeat)
+    print(f"[{backend}] {work_dir}")
+
+    # --- Kurulum: eski dosyanın deftere, defterin SQLite'a aktarılması ---
+    bench.measure('ilk_acilis_defter_aktarimi', lambda: urun.CsvStorage().read_entries(), repeat=1)
+    if backend == 'sqlite':
+        bench.measure('ilk_acilis_sqlite_aktarimi', lambda: urun.get_storage().migrate_from_csv(urun.CsvStorage()), repeat=1)
+    storage = urun.get_storage()
+
+    # --- Ürün listesi ---
+    def clear_products_cache(remove_file):
+        urun._load_products_version.clear()
+        if remove_file and os.path.exists(urun.PRODUCTS_CACHE_FILE):
+            os.remove(urun.PRODUCTS_CACHE_FILE)
+    if backend == 'csv':
+        bench.measure('load_products_ilk_okuma', urun.load_products, setup=lambda: clear_products_cache(True))
+        bench.measure('load_products_dosya_onbellegi', urun.load_products, setup=lambda: clear_products_cache(False))
+    else:
+        bench.measure('load_products_soguk', urun.load_products, setup=lambda: clear_products_cache(False))
+    products = urun.load_products()
+    bench.measure('load_products_sicak', urun.load_products, rows=len(products))
+
+    # --- Hareketler ---
+    def clear_entries_cache():
+        # Yeni depolama nesnesi, katmanın kendi bellek içi önbelleklerini de boşaltır
+        urun.get_storage.clear()
+        urun.get_write_coordinator.clear()
+        urun._load_entries_version.clear()
+    bench.measure('load_warehouse_entries_soguk', urun.load_warehouse_entries, setup=clear_entries_cache)
+    entries = urun.load_warehouse_entries()
+    bench.measure('load_warehouse_entries_sicak', urun.load_warehouse_entries, rows=len(entries))
+    storage = urun.get_storage()
+
+    # --- Kaydetme ---
+    sample_rows = rng.integers(0, len(products), 1000)
+    def new_entries(count):
+        rows = sample_rows[:count]
+        return pd.DataFrame({
+            'Tarih': [datetime.date.today().isoformat()] * count,
+            'SKU': products['SKU'].to_numpy()[rows],
+            'Urun Adi': products['Urun Adi'].to_numpy()[rows],
+            'Adet': rng.integers(1, 20, count),
+            'Islem Tipi': np.where(rng.random(count) < 0.5, 'Giriş', 'Çıkış'),
+        })
+    bench.measure('save_warehouse_entry_tek_satir', lambda: urun.save_warehouse_entry(new_entries(1)), repeat=args.repeat * 4)
+    bench.measure('save_warehouse_entry_1000_satir', lambda: urun.save_warehouse_entry(new_entries(1000)))
+    # Kaydetme hareket sürümünü değiştirdiğinden sonraki ilk yükleme önbellekten karşılanmaz
+    bench.measure('load_warehouse_entries_kayit_sonrasi', urun.load_warehouse_entries,
+                  setup=lambda: urun.save_warehouse_entry(new_entries(1)))
+
+    # --- Ürün arama ---
+    products_version = storage.products_version()
+    bench.measure('urun_arama_indeksi', lambda: urun.get_product_search_index(products_version, products),
+                  setup=urun.get_product_search_index.clear)
+    index = urun.get_product_search_index(products_version, products)
+    search_queries = ['vi', 'çelik vida', 'ISIK anahtar', 'gunes pirinc', '000123', 'LED-0']
+    bench.measure('urun_arama_sorgulari', lambda: [index.search(query) for query in search_queries], repeat=args.repeat * 4)
+
+    # --- Raporlama ---
+    first_date, last_date = storage.entry_date_bounds()
+    month_start = last_date - datetime.timedelta(days=30)
+    busiest_sku = entries['SKU'].value_counts().index[0]
+    def clear_report_cache():
+        urun.get_storage.clear()
+        urun.get_write_coordinator.clear()
+    bench.measure('rapor_ozet_indeksi_soguk', lambda: urun.get_storage().summarize_entries(first_date, last_date), setup=clear_report_cache)
+    storage = urun.get_storage()
+    bench.measure('rapor_ozet_tum_aralik', lambda: storage.summarize_entries(first_date, last_date))
+    bench.measure('rapor_ozet_30_gun', lambda: storage.summarize_entries(month_start, last_date))
+    bench.measure('rapor_stok_tarih_itibariyla', lambda: storage.stock_as_of(month_start))
+    bench.measure('rapor_urun_listesi_30_gun', lambda: storage.skus_in_range(month_start, last_date))
+    bench.measure('rapor_urun_hareketleri', lambda: (
+        urun.resolve_product_names(storage.query_entries(first_date, last_date, sku=busiest_sku), products),
+        storage.summarize_entries(first_date, last_date, sku=busiest_sku),
+        storage.stock_as_of(last_date, sku=busiest_sku),
+    ))
+
+    # --- Silme ---
+    to_delete = []
+    def pick_entries_to_delete():
+        sequences = urun.load_warehouse_entries()['Sira'].to_numpy()
+        to_delete[:] = rng.choice(sequences, size=min(100, len(sequences)), replace=False).tolist()
+    bench.measure('delete_warehouse_entries_100_kayit', lambda: urun.delete_warehouse_entries(to_delete), setup=pick_entries_to_delete)
+    bench.measure('load_warehouse_entries_silme_sonrasi', urun.load_warehouse_entries,
+                  setup=lambda: (pick_entries_to_delete(), urun.delete_warehouse_entries(to_delete)))
+
+    # --- Eşzamanlı yazma ---
+    write_count = args.writers * args.writer_threads * args.writer_appends
+    if write_count:
+        outcome = {}
+        def concurrent_writers():
+            outcome['sorunlar'], outcome['sayaclar'] = run_concurrent_writers(
+                urun, backend, work_dir, new_entries(min(write_count, len(sample_rows))),
+                args.writers, args.writer_threads, args.writer_appends,
+            )
+        result = bench.measure(f'eszamanli_yazma_{args.writers}x{args.writer_threads}x{args.writer_appends}', concurrent_writers, repeat=1, rows=write_count)
+        result['toplu_yazma'] = sum(counter['toplu_yazma'] for counter in outcome['sayaclar'])
+        result['dogrulama_hatalari'] = outcome['sorunlar']
+        for problem in outcome['sorunlar']:
+            print(f"  {backend:<7} DOĞRULAMA HATASI: {problem}")
+
+    os.chdir(work_root)
+    return bench.results
+
+# --- Karşılaştırma ---
+def compare_results(previous, current, threshold):
+    """Ortanca süreleri önceki sonuçla karşılaştırır ve eşiği aşan yavaşlamaları döndürür."""
+    previous_medians = {(result['katman'], result['senaryo']): result['medyan_s'] for result in previous['sonuclar']}
+    regressions = []
+    print(f"\n{'katman':<7} {'senaryo':<40} {'önceki ms':>12} {'şimdiki ms':>12} {'oran':>7}")
+    for result in current['sonuclar']:
+        key = (result['katman'], result['senaryo'])
+        if key not in previous_medians:
+            continue
+        ratio = result['medyan_s'] / previous_medians[key] if previous_medians[key] else float('inf')
+        flag = '  YAVAŞLADI' if ratio > threshold else ''
+        print(f"{key[0]:<7} {key[1]:<40} {previous_medians[key] * 1000:12.2f} {result['medyan_s'] * 1000:12.2f} {ratio:7.2f}{flag}")
+        if ratio > threshold:
+            regressions.append({'katman': key[0], 'senaryo': key[1], 'oran': ratio})
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Depo uygulamasının veri yollarını arayüz olmadan ölçer.")
+    parser.add_argument('--skus', type=int, default=100000, help="Katalogdaki ürün sayısı")
+    parser.add_argument('--movements', type=int, default=1000000, help="Hareket geçmişindeki kayıt sayısı")
+    parser.add_argument('--backend', choices=['csv', 'sqlite'], action='append', help="Ölçülecek katman (birden çok verilebilir; varsayılan: csv ve sqlite)")
+    parser.add_argument('--repeat', type=int, default=5, help="Senaryo başına ölçüm sayısı")
+    parser.add_argument('--seed', type=int, default=1254)
+    parser.add_argument('--output', default='benchmark_sonuclari.json', help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument('--compare', help="Karşılaştırılacak önceki sonuç dosyası")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Yavaşlama sayılacak ortanca süre oranı")
+    parser.add_argument('--writers', type=int, default=4, help="Eşzamanlı yazma senaryosundaki süreç sayısı (0: senaryoyu atla)")
+    parser.add_argument('--writer-threads', type=int, default=4, help="Süreç başına yazan iş parçacığı sayısı")
+    parser.add_argument('--writer-appends', type=int, default=25, help="İş parçacığı başına eklenen kayıt sayısı")
+    parser.add_argument('--workdir', help="Veri setinin üretileceği klasör (varsayılan: geçici klasör)")
+    parser.add_argument('--keep', action='store_true', help="Çalışma klasörünü silme")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    backends = args.backend or ['csv', 'sqlite']
+    output_path = os.path.abspath(args.output)
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    original_dir = os.getcwd()
+    work_root = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix='depo_benchmark_')
+    os.makedirs(work_root, exist_ok=True)
+
+    messages = StreamlitMessages()
+    messages.install()
+    urun = import_app()
+
+    try:
+        rng = np.random.default_rng(args.seed)
+        print(f"Veri seti üretiliyor: {args.skus} ürün, {args.movements} hareket")
+        generation_start = time.perf_counter()
+        dataset_dir = os.path.join(work_root, 'veri')
+        os.makedirs(dataset_dir, exist_ok=True)
+        products = generate_products(args.skus, rng)
+        write_dataset(dataset_dir, products, generate_movements(products, args.movements, rng, datetime.date.today()))
+        generation_seconds = time.perf_counter() - generation_start
+
+        results = []
+        for backend in backends:
+            results += run_backend(urun, backend, dataset_dir, work_root, args, np.random.default_rng(args.seed))
+    finally:
+        os.chdir(original_dir)
+        if not args.keep and not args.workdir:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    report = {
+        'olusturma': datetime.datetime.now().isoformat(timespec='seconds'),
+        'ortam': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'streamlit': st.__version__,
+        },
+        'parametreler': {
+            'urun_sayisi': args.skus,
+            'hareket_sayisi': args.movements,
+            'tekrar': args.repeat,
+            'tohum': args.seed,
+            'dosya_kodlamasi': FILE_ENCODING,
+        },
+        'veri_uretimi_s': generation_seconds,
+        'sonuclar': results,
+        'streamlit_mesajlari': messages.errors(),
+    }
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nSonuçlar '{output_path}' dosyasına yazıldı.")
+    for message in messages.errors():
+        print(f"Uyarı: ölçüm sırasında {message['oge']} çağrıldı: {message['mesaj']}")
+
+    failed_checks = [result for result in results if result.get('dogrulama_hatalari')]
+    if failed_checks:
+        print(f"\n{len(failed_checks)} senaryoda doğrulama başarısız oldu.")
+        return 1
+    if compare_path:
+        with open(compare_path, encoding='utf-8') as f:
+            regressions = compare_results(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} senaryo %{(args.threshold - 1) * 100:.0f} eşiğinden fazla yavaşladı.")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,24 @@
+"""
+Testler urun.py'yi arayüzü çalıştırmadan içe aktarır (modül __main__ olarak çalıştırılmadığında
+main() çağrılmaz). Veri dosyaları göreli yollarla açıldığından her test kendi geçici klasöründe çalışır.
+"""
+import os
+import sys
+
+import pytest
+import streamlit.logger
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+@pytest.fixture
+def urun(tmp_path, monkeypatch):
+    """Geçici bir çalışma klasöründe, süreç içi önbellekleri boşaltılmış urun modülü."""
+    # Çalışma zamanı (runtime) olmadan kullanılan önbelleklerin uyarıları bastırılır
+    streamlit.logger.set_log_level('error')
+    monkeypatch.chdir(tmp_path)
+    import urun
+    for cached in (urun.get_storage, urun.get_write_coordinator, urun.get_firestore_client, urun.get_file_lock,
+                   urun._load_products_version, urun._load_entries_version):
+        cached.clear()
+    return urun
@@ -0,0 +1,155 @@
+"""
+FirestoreStorage testleri için süreç içi, bellekte çalışan bir Firestore taklidi. Yalnızca
+uygulamanın kullandığı yüzeyi sağlar: collection / document / where('>=') / stream, get, get_all,
+batch (set, set(merge=True), delete, commit), Increment ve SERVER_TIMESTAMP.
+
+Ağ hataları `fail` sözlüğüyle (ör. fail['get'] = 1 bir sonraki get çağrısını düşürür; -1 kalıcı),
+`lose_response` ile (toplu yazma uygulanır ama yanıt kaybolur) ve `stream_seconds` ile (stream
+çağrısının süreceği süre; verilen timeout'u aşarsa süre aşımı hatası) canlandırılır.
+"""
+import copy
+import datetime
+import threading
+import types
+
+FIRESTORE_BATCH_LIMIT = 500
+
+SERVER_TIMESTAMP = object()
+
+class Increment:
+    def __init__(self, value):
+        self.value = value
+
+# FirestoreStorage(firestore_module=...) olarak verilir
+module = types.SimpleNamespace(Increment=Increment, SERVER_TIMESTAMP=SERVER_TIMESTAMP)
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+class FakeDocument:
+    def __init__(self, db, collection, doc_id):
+        assert '/' not in doc_id, doc_id
+        self.db = db
+        self.collection = collection
+        self.id = doc_id
+
+    def get(self, timeout=None):
+        self.db.maybe_fail('get')
+        self.db.reads += 1
+        with self.db.lock:
+            return FakeSnapshot(self, copy.deepcopy(self.db.data.get(self.collection, {}).get(self.id)))
+
+class FakeQuery:
+    def __init__(self, collection, field, value):
+        self.collection = collection
+        self.field = field
+        self.value = value
+
+    def stream(self, timeout=None):
+        return [
+            snapshot for snapshot in self.collection.stream(timeout)
+            if snapshot._data.get(self.field) is not None and snapshot._data[self.field] >= self.value
+        ]
+
+class FakeCollection:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+
+    def document(self, doc_id):
+        return FakeDocument(self.db, self.name, doc_id)
+
+    def where(self, field, op, value):
+        assert op == '>=', op
+        return FakeQuery(self, field, value)
+
+    def stream(self, timeout=None):
+        self.db.maybe_fail('stream')
+        self.db.stream_timeouts.append(timeout)
+        if timeout is not None and self.db.stream_seconds > timeout:
+            raise TimeoutError('stream: süre aşıldı')
+        with self.db.lock:
+            items = copy.deepcopy(list(self.db.data.get(self.name, {}).items()))
+        self.db.reads += len(items)
+        return [FakeSnapshot(FakeDocument(self.db, self.name, doc_id), data) for doc_id, data in items]
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def set(self, reference, data, merge=False):
+        self.writes.append(('set', reference, data, merge))
+
+    def delete(self, reference):
+        self.writes.append(('delete', reference, None, False))
+
+    def commit(self, timeout=None):
+        if len(self.writes) > FIRESTORE_BATCH_LIMIT:
+            # Firestore 500'den fazla işlem içeren toplu yazmayı reddeder
+            raise ValueError(f'Toplu yazmada en fazla {FIRESTORE_BATCH_LIMIT} işlem olabilir: {len(self.writes)}')
+        self.db.maybe_fail('commit')
+        with self.db.lock:
+            for method, reference, data, merge in self.writes:
+                documents = self.db.data.setdefault(reference.collection, {})
+                if method == 'delete':
+                    documents.pop(reference.id, None)
+                    continue
+                document = dict(documents.get(reference.id, {})) if merge else {}
+                for key, value in data.items():
+                    if value is SERVER_TIMESTAMP:
+                        self.db.clock += datetime.timedelta(milliseconds=1)
+                        value = self.db.clock
+                    if isinstance(value, Increment):
+                        value = document.get(key, 0) + value.value
+                    document[key] = value
+                documents[reference.id] = document
+            self.db.commits.append(len(self.writes))
+        if self.db.lose_response:
+            self.db.lose_response -= 1
+            raise ConnectionError('yanıt kayboldu')
+
+class FakeClient:
+    """Bellekte çalışan Firestore istemcisi; data[koleksiyon][belge kimliği] = alanlar."""
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+        self.commits = [] # Uygulanan her toplu yazmanın işlem sayısı
+        self.fail = {}
+        self.lose_response = 0
+        self.reads = 0
+        self.stream_seconds = 0
+        self.stream_timeouts = [] # Her stream çağrısına verilen timeout
+        self.clock = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+    def maybe_fail(self, operation):
+        remaining = self.fail.get(operation)
+        if remaining:
+            if remaining > 0:
+                self.fail[operation] = remaining - 1
+            raise ConnectionError(f'{operation}: Firestore\'a ulaşılamıyor')
+
+    def go_offline(self):
+        for operation in ('get', 'stream', 'commit'):
+            self.fail[operation] = -1
+
+    def go_online(self):
+        self.fail.clear()
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def get_all(self, references, timeout=None):
+        self.maybe_fail('get')
+        return [reference.get() for reference in references]
@@ -0,0 +1,30 @@
+"""
+Eşzamanlı yazma testi: birden çok süreç, her biri birden çok iş parçacığıyla yazma koordinatörü
+üzerinden kayıt ekler. Doğrulama benchmark.run_concurrent_writers ile aynıdır.
+"""
+import pandas as pd
+import pytest
+
+import benchmark
+
+@pytest.mark.parametrize('backend', ['csv', 'sqlite'])
+def test_concurrent_writers_keep_sequences_and_balances(urun, tmp_path, monkeypatch, backend):
+    monkeypatch.setattr(urun, 'STORAGE_BACKEND', backend)
+    rows = pd.DataFrame({
+        'Tarih': ['2024-01-01'] * 6,
+        'SKU': ['A', 'B', 'C', 'A', 'B', 'C'],
+        'Urun Adi': ['Işık', 'İğne', 'Çivi'] * 2,
+        'Adet': [3, 2, 5, 1, 4, 2],
+        'Islem Tipi': ['Giriş', 'Giriş', 'Giriş', 'Çıkış', 'Çıkış', 'Giriş'],
+    })
+
+    problems, counters = benchmark.run_concurrent_writers(
+        urun, backend, str(tmp_path), rows, process_count=3, thread_count=3, append_count=10,
+    )
+
+    assert problems == []
+    assert sum(counter['istek'] for counter in counters) == 3 * 3 * 10
+    entries = urun.get_storage().read_entries()
+    assert entries['Sira'].is_unique
+    assert len(entries) == 3 * 3 * 10
+    assert urun.get_storage().check_stock_balances().empty
@@ -0,0 +1,146 @@
+"""
+FirestoreStorage testleri; ağ yerine tests/fake_firestore.py'deki süreç içi taklit kullanılır.
+"""
+import pandas as pd
+import pytest
+
+import fake_firestore
+
+@pytest.fixture
+def firestore(urun, tmp_path):
+    client = fake_firestore.FakeClient()
+    storage = urun.FirestoreStorage(
+        client=client, outbox_path=str(tmp_path / 'outbox.db'), firestore_module=fake_firestore.module, start_worker=False,
+    )
+    return storage, client
+
+def entries(count, sku=None, islem_tipi='Giriş'):
+    return pd.DataFrame({
+        'Tarih': ['2024-01-01'] * count,
+        'SKU': [sku or f'SKU-{number:04d}' for number in range(count)],
+        'Urun Adi': ['Çelik Vida'] * count,
+        'Adet': [2] * count,
+        'Islem Tipi': [islem_tipi] * count,
+    })
+
+def drain_all(storage):
+    """Bekleme sürelerini atlayarak kuyruk boşalana kadar boşaltır."""
+    for _ in range(10):
+        with storage.outbox._connect() as conn, conn:
+            conn.execute('UPDATE outbox SET next_attempt = 0')
+        if storage.drain() is None:
+            return
+    raise AssertionError(f"Kuyruk boşalmadı: {storage.outbox.status()}")
+
+@pytest.mark.parametrize('row_count', [249, 498, 600])
+def test_migration_meta_write_stays_within_batch_limit(urun, firestore, row_count):
+    storage, client = firestore
+    migrated = entries(row_count)
+    migrated['Sira'] = range(1, row_count + 1)
+    storage.append_entries(migrated, keep_sequence=True, meta={'csv_migrated': '2024-01-01T00:00:00'})
+
+    assert storage.drain() is None
+    assert max(client.commits) <= urun.FIRESTORE_BATCH_LIMIT
+    assert storage.outbox.status()['bekleyen'] == 0
+    assert client.data['meta']['versions']['csv_migrated'] == '2024-01-01T00:00:00'
+    assert len(client.data['movements']) == row_count
+    assert sum(document['stok'] for document in client.data['stock'].values()) == 2 * row_count
+
+def test_lost_response_does_not_apply_grouped_appends_twice(firestore):
+    storage, client = firestore
+    storage.append_entries(entries(2, sku='A'))
+    storage.append_entries(entries(3, sku='A'))
+    client.lose_response = 1
+
+    drain_all(storage)
+
+    assert client.data['stock']['A']['stok'] == 10
+    assert storage.check_stock_balances().empty
+
+def test_reads_fall_back_to_mirror_and_outbox_when_offline(firestore):
+    storage, client = firestore
+    storage.save_products(pd.DataFrame({'SKU': ['A', 'B/1'], 'Urun Adi': ['Işık', 'İğne']}))
+    storage.append_entries(entries(3, sku='A'))
+    drain_all(storage)
+    assert len(storage.read_entries()) == 3
+    assert len(storage.load_products()) == 2
+
+    client.go_offline()
+    storage.append_entries(entries(2, sku='B/1', islem_tipi='Çıkış'))
+    assert storage.add_product('C', 'Cıvata')
+
+    storage.products_version()
+    storage.entries_version()
+    assert sorted(storage.load_products()['SKU']) == ['A', 'B/1', 'C']
+    assert len(storage.read_entries()) == 5
+    assert storage.stock_balances() == {'A': 6, 'B/1': -4}
+    assert storage.offline_error
+    assert storage.drain() is not None
+    assert storage.outbox.status()['bekleyen'] == 2
+
+    client.go_online()
+    storage._offline_until = 0
+    drain_all(storage)
+    assert storage.stock_balances() == {'A': 6, 'B/1': -4}
+    assert storage.offline_error is None
+    assert client.data['stock']['B%2F1']['stok'] == -4
+
+def test_offline_start_serves_outbox_and_defers_migration(urun, firestore):
+    storage, client = firestore
+    pd.DataFrame({'SKU': ['A'], 'Urun Adi': ['Işık']}).to_csv(urun.PRODUCTS_FILE, sep=';', index=False)
+    client.go_offline()
+
+    assert storage.read_entries().empty
+    assert storage.stock_balances() == {}
+    assert not storage.migrate_from_csv(urun.CsvStorage())
+    assert storage.outbox.get_flag('csv_migrated') is None
+    storage.append_entries(entries(1, sku='A'))
+    assert storage.stock_balances() == {'A': 2}
+
+    client.go_online()
+    storage._offline_until = 0
+    assert storage.migrate_from_csv(urun.CsvStorage())
+    drain_all(storage)
+    assert list(storage.load_products()['SKU']) == ['A']
+    assert storage.stock_balances() == {'A': 2}
+
+def test_movements_do_not_change_products_version(firestore):
+    storage, client = firestore
+    storage.save_products(pd.DataFrame({'SKU': ['A'], 'Urun Adi': ['Işık']}))
+    drain_all(storage)
+    products_version = storage.products_version()
+
+    storage.append_entries(entries(2, sku='A'))
+    assert storage.products_version() == products_version
+    entries_version = storage.entries_version()
+    drain_all(storage)
+    assert storage.products_version() == products_version
+    assert storage.entries_version() != entries_version
+    storage.delete_entries(storage.read_entries()['Sira'][:1])
+    assert storage.products_version() == products_version
+
+    storage.add_product('B', 'Boru')
+    assert storage.products_version() != products_version
+    products_version = storage.products_version()
+    entries_version = storage.entries_version()
+    drain_all(storage)
+    assert storage.products_version() != products_version
+    assert storage.entries_version() != entries_version # bekleyen silme de gönderildi
+
+def test_mirror_sync_timeout_counts_as_offline(urun, firestore):
+    storage, client = firestore
+    storage.append_entries(entries(2, sku='A'))
+    drain_all(storage)
+    assert len(storage.read_entries()) == 2
+    storage.append_entries(entries(1, sku='A'))
+    drain_all(storage)
+
+    client.stream_seconds = urun.FIRESTORE_SYNC_TIMEOUT_SECONDS + 1
+    assert len(storage.read_entries()) == 2 # Eşitlenemeyen kopya olduğu gibi kullanılır
+    assert storage.offline_error
+    assert None not in client.stream_timeouts
+
+    client.stream_seconds = 0
+    storage._offline_until = 0
+    assert len(storage.read_entries()) == 3
+    assert storage.offline_error is None
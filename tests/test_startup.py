@@ -0,0 +1,95 @@
+"""
+Açılış testleri: firebase_admin yalnızca Firestore katmanı kullanıldığında içe aktarılır ve
+Firestore istemcisi süreç başına bir kez oluşturulur.
+"""
+import json
+import os
+import subprocess
+import sys
+import types
+
+from conftest import REPO_DIR
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import urun
+storage = urun.get_storage()
+storage.read_entries()
+print(json.dumps({
+    'katman': storage.name,
+    'sure_s': time.perf_counter() - start,
+    'firebase_admin': any(name == 'firebase_admin' or name.startswith('firebase_admin.') for name in sys.modules),
+}))
+"""
+
+def run_startup(tmp_path, backend):
+    env = dict(os.environ, DEPO_STORAGE_BACKEND=backend, PYTHONPATH=REPO_DIR)
+    completed = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT], cwd=tmp_path, env=env,
+        capture_output=True, text=True, encoding='utf-8', check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def test_csv_startup_does_not_import_firebase_admin(tmp_path):
+    result = run_startup(tmp_path, 'csv')
+    print(f"csv açılışı: {result['sure_s'] * 1000:.0f} ms")
+    assert result['katman'] == 'csv'
+    assert not result['firebase_admin']
+
+def test_sqlite_startup_does_not_import_firebase_admin(tmp_path):
+    result = run_startup(tmp_path, 'sqlite')
+    print(f"sqlite açılışı: {result['sure_s'] * 1000:.0f} ms")
+    assert result['katman'] == 'sqlite'
+    assert not result['firebase_admin']
+
+def install_firebase_admin_stub(monkeypatch):
+    """initialize_app ve firestore.client çağrılarını sayan sahte bir firebase_admin paketi kurar."""
+    calls = {'initialize_app': 0, 'client': 0}
+    firebase_admin = types.ModuleType('firebase_admin')
+    firebase_admin._apps = {}
+
+    def initialize_app(credential=None, options=None):
+        calls['initialize_app'] += 1
+        firebase_admin._apps['[DEFAULT]'] = object()
+
+    def client():
+        calls['client'] += 1
+        return object()
+
+    credentials = types.ModuleType('firebase_admin.credentials')
+    credentials.Certificate = lambda info: info
+    firestore = types.ModuleType('firebase_admin.firestore')
+    firestore.client = client
+    firebase_admin.initialize_app = initialize_app
+    firebase_admin.credentials = credentials
+    firebase_admin.firestore = firestore
+    for name, module in (('firebase_admin', firebase_admin), ('firebase_admin.credentials', credentials),
+                         ('firebase_admin.firestore', firestore)):
+        monkeypatch.setitem(sys.modules, name, module)
+    return calls
+
+def test_firestore_client_is_initialized_once(urun, monkeypatch):
+    calls = install_firebase_admin_stub(monkeypatch)
+    monkeypatch.setenv('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+    clients = [urun.get_firestore_client() for _ in range(5)]
+
+    assert calls == {'initialize_app': 1, 'client': 1}
+    assert all(client is clients[0] for client in clients)
+
+def test_firestore_client_error_is_not_cached(urun, monkeypatch):
+    calls = install_firebase_admin_stub(monkeypatch)
+    monkeypatch.setenv('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+    firestore = sys.modules['firebase_admin.firestore']
+    working_client = firestore.client
+
+    def unavailable():
+        raise ConnectionError('emülatör kapalı')
+
+    firestore.client = unavailable
+    assert urun.initialize_firebase() is None
+    firestore.client = working_client
+    assert urun.initialize_firebase() is not None
+    assert urun.initialize_firebase() is not None
+    assert calls == {'initialize_app': 1, 'client': 1}
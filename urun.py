@@ -2,297 +2,2876 @@ import streamlit as st
 import pandas as pd
 import datetime
 import os
-import firebase_admin
-from firebase_admin import credentials, firestore
+import shutil
+import json
+import pickle
+import codecs
+import hashlib
+import uuid
+import random
+import urllib.parse
+import heapq
+import collections
+import itertools
+import functools
+import threading
+import queue
+import time
+import tempfile
+import gzip
+import io
+import importlib.util
+from concurrent.futures import Future
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+import sqlite3
+import contextlib
+import numpy as np
+
+# --- Firebase / Firestore ---
+# firebase_admin ağır bir bağımlılıktır; yalnızca Firestore'a ihtiyaç duyan bir işlem
+# get_firestore_client() çağırdığında içe aktarılır. CSV ve SQLite katmanları onu hiç yüklemez.
+FIRESTORE_EMULATOR_PROJECT = os.environ.get('GCLOUD_PROJECT', 'demo-depo')
+
+@st.cache_resource(show_spinner=False)
+def get_firestore_client():
+    """
+    Firestore istemcisini süreç başına bir kez, ilk ihtiyaç anında oluşturur; tüm oturumlar
+    aynı istemciyi paylaşır. Hata durumunda istisna yükseltir; hata önbelleğe alınmadığından
+    sonraki çağrı yeniden dener. FIRESTORE_EMULATOR_HOST tanımlıysa emülatöre bağlanılır
+    ve secrets gerekmez.
+    """
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if not firebase_admin._apps:
+        if os.environ.get('FIRESTORE_EMULATOR_HOST'):
+            firebase_admin.initialize_app(options={'projectId': FIRESTORE_EMULATOR_PROJECT})
+        else:
+            # Streamlit secrets'tan 'firebase' bölümünü çek
+            # st.secrets["firebase"] ifadesi, Streamlit Cloud'daki secrets.toml dosyasındaki
+            # [firebase] başlığı altındaki tüm değerleri bir Python dictionary olarak okur.
+            # credentials.Certificate doğrudan bir dosya yolu yerine,
+            # dictionary formatındaki kimlik bilgilerini de kabul eder.
+            firebase_admin.initialize_app(credentials.Certificate(dict(st.secrets["firebase"])))
+    return firestore.client() # Firestore istemcisini döndür
 
-# Firebase başlatma fonksiyonu
 def initialize_firebase():
-    # Streamlit secrets'tan 'firebase' bölümünü çek
-    # st.secrets["firebase"] ifadesi, Streamlit Cloud'daki secrets.toml dosyasındaki
-    # [firebase] başlığı altındaki tüm değerleri bir Python dictionary olarak okur.
+    """
+    Firestore istemcisini döndürür; kurulamazsa kullanıcıya nedenini gösterir ve None döner.
+    İstemci yalnızca ilk çağrıda oluşturulur, sonraki çağrılar paylaşılan istemciyi kullanır.
+    """
     try:
-        firebase_config = st.secrets["firebase"]
+        return get_firestore_client()
     except KeyError:
         st.error("Firebase secrets bulunamadı! Lütfen Streamlit Cloud'daki Secrets ayarlarınızı kontrol edin.")
         st.info("secrets.toml dosyanızda '[firebase]' başlığı altında Firebase hizmet hesabı bilgileri olmalı.")
         return None
+    except Exception as e:
+        st.error(f"Firebase başlatılırken hata oluştu: {e}")
+        st.info("Lütfen Streamlit Cloud'daki Secrets ayarlarınızı ve `urun.py` dosyanızı kontrol edin. Özellikle `private_key` formatını ve secrets.toml'daki `[firebase]` başlığını kontrol edin.")
+        return None
+
+
+# --- Veri Dosyaları Yolları ---
+PRODUCTS_FILE = 'products.csv'
+WAREHOUSE_ENTRIES_FILE = 'warehouse_entries.csv' # Eski tam-dosya formatı, yalnızca deftere aktarım için okunur
+WAREHOUSE_LEDGER_DIR = 'warehouse_ledger'
+SQLITE_DB_FILE = 'depo.db'
+STOCK_BALANCES_FILE = 'stock_balances.json' # CSV katmanında SKU bazlı güncel stok özeti
+STOCK_BALANCE_LOG_FILE = 'stock_balances.log' # Özetten sonraki yazmaların stok farkları (JSON-lines)
+STOCK_BALANCE_LOG_MAX_BYTES = 1024 * 1024 # Bakiye günlüğü bu boyutu aşınca özete katlanır
+FIRESTORE_OUTBOX_FILE = 'firestore_outbox.db' # Firestore'a henüz gönderilmemiş yazmaların kalıcı kuyruğu
+PRODUCTS_CACHE_FILE = 'products.cache.pkl' # products.csv'nin ayrıştırılmış hali, kaynak dosyanın özetiyle anahtarlı
+# Her çalıştırmanın süre ölçümleri bu JSON-lines dosyasına eklenir (ör. DEPO_PERF_LOG=perf_log.jsonl);
+# varsayılan olarak kapalıdır, böylece sayfa çizimi dosya yazmayı beklemez
+PERF_LOG_FILE = os.environ.get('DEPO_PERF_LOG', '').strip()
+
+# Depolama katmanı: 'csv' (products.csv + hareket defteri), 'sqlite' (indeksli gömülü veritabanı)
+# veya 'firestore' (yerel yazma kuyruğu üzerinden Firestore). SQLite ve Firestore ilk açılışta
+# mevcut CSV verilerini bir kereye mahsus içe aktarır.
+STORAGE_BACKEND = os.environ.get('DEPO_STORAGE_BACKEND', 'csv').strip().lower()
+
+# --- Ürün Listesini CSV'den Oku ---
+PRODUCT_ENCODINGS = ['utf-8', 'windows-1254', 'latin-1']
+PRODUCT_SEPARATORS = [';', ',', '\t', '|'] # Eşitlikte ilk sıradaki (;) tercih edilir
+PRODUCT_SNIFF_BYTES = 64 * 1024
+SKU_COLUMN_VARIATIONS = ['sku', 'urun kodu', 'ürün kodu']
+URUN_ADI_COLUMN_VARIATIONS = ['urun adi', 'ürün adı', 'urunismi', 'ürün ismi', 'product name']
+
+def file_sha1(path):
+    """Dosya içeriğinin SHA-1 özetini parça parça okuyarak hesaplar."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def sniff_csv_format(path, encodings=PRODUCT_ENCODINGS):
+    """Dosyanın başından alınan küçük bir örnekle kodlamayı ve ayracı tahmin eder."""
+    with open(path, 'rb') as f:
+        return sniff_csv_sample(f.read(PRODUCT_SNIFF_BYTES), encodings)
+
+def sniff_csv_sample(sample, encodings=PRODUCT_ENCODINGS):
+    """
+    CSV verisinin başından alınmış bayt örneğinden (kodlama, ayraç) ikilisini tahmin eder.
+    Kodlama, örneği hatasız çözen ilk adaydır; ayraç, başlık satırında en çok geçen adaydır.
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        encoding, text = 'utf-8-sig', sample[len(codecs.BOM_UTF8):].decode('utf-8', errors='replace')
+    else:
+        encoding, text = encodings[-1], sample.decode(encodings[-1])
+        for candidate in encodings:
+            try:
+                # Örneğin sonunda yarım kalmış çok baytlı karakter hata sayılmaz
+                text = codecs.getincrementaldecoder(candidate)().decode(sample, final=False)
+                encoding = candidate
+                break
+            except UnicodeDecodeError:
+                continue
+    header = text.splitlines()[0] if text else ''
+    separator = max(PRODUCT_SEPARATORS, key=header.count) if header else PRODUCT_SEPARATORS[0]
+    return encoding, separator
+
+def find_product_columns(columns):
+    """SKU ve ürün adı sütunlarını, yaygın yazımlarını da tanıyarak bulur."""
+    sku_col_name = None
+    urun_adi_col_name = None
+    for col in columns:
+        norm_col = str(col).strip().lower()
+        if sku_col_name is None and norm_col in SKU_COLUMN_VARIATIONS:
+            sku_col_name = col
+        if urun_adi_col_name is None and norm_col in URUN_ADI_COLUMN_VARIATIONS:
+            urun_adi_col_name = col
+    return sku_col_name, urun_adi_col_name
+
+def _read_products_cache(source_hash):
+    """Kaynak dosyanın özeti eşleşiyorsa önbellekteki (kodlama, ayraç, ürünler) üçlüsünü döndürür."""
+    try:
+        with open(PRODUCTS_CACHE_FILE, 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    if not isinstance(cached, dict) or cached.get('source_hash') != source_hash:
+        return None
+    return cached['encoding'], cached['separator'], cached['products']
+
+def _write_products_cache(source_hash, encoding, separator, products):
+    tmp_path = PRODUCTS_CACHE_FILE + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'source_hash': source_hash, 'encoding': encoding, 'separator': separator, 'products': products}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, PRODUCTS_CACHE_FILE)
+    except OSError:
+        # Önbellek yalnızca hızlandırma amaçlıdır; yazılamazsa bir sonraki açılışta dosya yeniden ayrıştırılır
+        pass
+
+def read_products_csv():
+    """
+    products.csv dosyasını okur (CSV depolama katmanı ve SQLite aktarımı tarafından kullanılır). 
+    Dosya yoksa boş bir DataFrame oluşturur ve başlıkları belirler.
+    Kodlama ve ayraç dosyanın başından alınan küçük bir örnekle belirlenir ve dosya tek seferde,
+    yalnızca SKU ve ürün adı sütunları okunarak ayrıştırılır. Ayrıştırılmış liste, kaynak dosyanın
+    özetiyle anahtarlı ikili bir önbelleğe yazılır; dosya değişmedikçe yeniden ayrıştırılmaz.
+    """
+    if os.path.exists(PRODUCTS_FILE):
+        df = pd.DataFrame() 
+        
+        try:
+            source_hash = file_sha1(PRODUCTS_FILE)
+            cached = _read_products_cache(source_hash)
+            if cached is not None:
+                enc, separator, df = cached
+                st.sidebar.success(f"'{PRODUCTS_FILE}' dosyası '{enc}' kodlaması ve '{separator}' ayraçla yüklendi.")
+                return df
+            sniffed_encoding, separator = sniff_csv_format(PRODUCTS_FILE)
+        except Exception as e:
+            st.sidebar.error(f"'{PRODUCTS_FILE}' dosyası okunurken beklenmedik bir hata oluştu: {e}.")
+            return pd.DataFrame(columns=['SKU', 'Urun Adi'])
+
+        # Örnek dosyanın devamını temsil etmiyorsa (ör. sonlarda farklı kodlanmış satırlar) sıradaki kodlamalar denenir
+        base_encoding = 'utf-8' if sniffed_encoding == 'utf-8-sig' else sniffed_encoding
+        encodings = [sniffed_encoding] + PRODUCT_ENCODINGS[PRODUCT_ENCODINGS.index(base_encoding) + 1:]
+
+        loaded_successfully = False
+        
+        for enc in encodings:
+            try:
+                original_columns = list(pd.read_csv(PRODUCTS_FILE, encoding=enc, sep=separator, nrows=0).columns)
+                sku_col_name, urun_adi_col_name = find_product_columns(original_columns)
+
+                if not sku_col_name or not urun_adi_col_name:
+                    st.sidebar.error(f"'{PRODUCTS_FILE}' dosyasında 'SKU' ve 'Urun Adi' (veya benzeri) sütunları bulunamadı. Tespit edilen sütunlar: {original_columns}.")
+                    return pd.DataFrame(columns=['SKU', 'Urun Adi']) 
+
+                df = pd.read_csv(PRODUCTS_FILE, encoding=enc, sep=separator, usecols=[sku_col_name, urun_adi_col_name], dtype=str)
+                df = df[[sku_col_name, urun_adi_col_name]] 
+                df.columns = ['SKU', 'Urun Adi'] 
+                
+                st.sidebar.success(f"'{PRODUCTS_FILE}' dosyası '{enc}' kodlaması ve '{separator}' ayraçla yüklendi.")
+                loaded_successfully = True
+                break 
+            except UnicodeDecodeError:
+                continue 
+            except pd.errors.ParserError as e:
+                st.sidebar.warning(f"'{PRODUCTS_FILE}' dosyası '{enc}' kodlaması ve '{separator}' ayraçla ayrıştırılamadı. Hata: {e}")
+                continue 
+            except Exception as e:
+                st.sidebar.error(f"'{PRODUCTS_FILE}' dosyası okunurken beklenmedik bir hata oluştu: {e}.")
+                return pd.DataFrame(columns=['SKU', 'Urun Adi'])
+
+        if not loaded_successfully:
+            st.error(f"'{PRODUCTS_FILE}' dosyası hiçbir bilinen kodlama veya ayraçla okunamadı. Lütfen dosyanın formatını kontrol edin.")
+            return pd.DataFrame(columns=['SKU', 'Urun Adi'])
+        
+        # Eğer dosya yüklendi ama boşsa (sadece başlıklar varsa), boş bir DataFrame döndür
+        if df.empty:
+            st.warning(f"'{PRODUCTS_FILE}' dosyası boş görünüyor. Lütfen ürün bilgisi girin.")
+            return pd.DataFrame(columns=['SKU', 'Urun Adi'])
+
+        _write_products_cache(source_hash, enc, separator, df)
+        return df
+    else:
+        # Dosya yoksa, boş bir DataFrame oluştur ve kullanıcıya bilgi ver
+        st.info(f"'{PRODUCTS_FILE}' dosyası bulunamadı. Yeni ürünler ekleyerek başlayabilirsiniz.")
+        return pd.DataFrame(columns=['SKU', 'Urun Adi'])
+
+# --- Dosya Kilitleri ---
+# Aynı veri dosyalarını kullanan süreçler (ve bir süreçteki oturum iş parçacıkları) arasında
+# yazmaları sıraya koyar. Kilit yeniden girilebilirdir: kilidi tutan iş parçacığı aynı kilidi
+# tekrar alabilir (ör. deftere ekleme sırasında yapılan ilk aktarım).
+LEDGER_LOCK_FILE = WAREHOUSE_LEDGER_DIR + '.lock'
+PRODUCTS_LOCK_FILE = PRODUCTS_FILE + '.lock'
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    # Windows: msvcrt.locking kilidi ~10 saniye dener, ardından hata verir
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class InterProcessLock:
+    """Bir kilit dosyası üzerinden süreçler ve iş parçacıkları arasında yeniden girilebilir kilit."""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._file = open(self.path, 'a+')
+                _lock_file(self._file)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._depth -= 1
+        if self._depth == 0:
+            _unlock_file(self._file)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+@st.cache_resource
+def get_file_lock(path):
+    """Süreç içinde her kilit dosyası için tek bir kilit nesnesi döndürür."""
+    return InterProcessLock(path)
+
+def ledger_lock():
+    return get_file_lock(LEDGER_LOCK_FILE)
+
+# --- Depo Hareket Defteri (Append-only) ---
+# Her yeni hareket defterin aktif segmentine tek satır olarak eklenir; silme işlemleri
+# ise ilgili kaydın sıra numarasını gösteren bir "silme kaydı" (tombstone) olarak yazılır.
+# Böylece bir kayıt eklemek veya silmek tüm geçmişi yeniden yazmayı gerektirmez.
+# Silinen kayıtlar ve silme kayıtları sıkıştırma (compaction) adımında defterden temizlenir.
+# Sıkıştırma segmentleri yeni bir nesil (generation) klasörüne yazar ve current.txt işaretçisini
+# tek adımda yeni nesle çevirir; eski nesil, okuyucular yeni nesle geçtikten sonra silinir.
+# İşaretçi yoksa segmentler doğrudan defter klasöründedir.
+ENTRY_COLUMNS = ['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi']
+LEDGER_COLUMNS = ['Sira', 'Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi', 'Silinen Sira']
+LEDGER_TOMBSTONE_TYPE = 'Silme'
+LEDGER_SEGMENT_PREFIX = 'segment_'
+LEDGER_SEGMENT_MAX_BYTES = 8 * 1024 * 1024 # Aktif segment bu boyutu aşınca yeni segmente geçilir
+LEDGER_COMPACTION_ROWS_PER_SEGMENT = 100000
+LEDGER_COMPACTION_TOMBSTONE_RATIO = 0.2 # Silme kayıtları bu oranı aşınca defter otomatik sıkıştırılır
+LEDGER_SEQUENCE_FILE = os.path.join(WAREHOUSE_LEDGER_DIR, 'sequence.txt')
+LEDGER_STATS_FILE = os.path.join(WAREHOUSE_LEDGER_DIR, 'stats.json') # Defterdeki kayıt ve silme kaydı sayıları; sıkıştırma kararı defter okunmadan verilir
+LEDGER_CURRENT_FILE = os.path.join(WAREHOUSE_LEDGER_DIR, 'current.txt') # Geçerli nesil klasörünün adı
+LEDGER_GENERATION_PREFIX = 'generation_'
+LEDGER_GENERATION_GRACE_SECONDS = 300 # Nesil değiştikten sonra eski neslin silinmeden önce beklediği süre
+LEDGER_COMPACTION_LOCK_FILE = WAREHOUSE_LEDGER_DIR + '.compact.lock' # Süreçler arasında aynı anda tek sıkıştırma
+LEDGER_READ_ATTEMPTS = 3
+
+def _current_ledger_dir():
+    """Geçerli neslin segmentlerini tutan klasör."""
+    try:
+        with open(LEDGER_CURRENT_FILE, encoding='utf-8') as f:
+            generation = f.read().strip()
+    except FileNotFoundError:
+        return WAREHOUSE_LEDGER_DIR
+    return os.path.join(WAREHOUSE_LEDGER_DIR, generation) if generation else WAREHOUSE_LEDGER_DIR
+
+def _ledger_generation_number(ledger_dir):
+    name = os.path.basename(ledger_dir)
+    return int(name[len(LEDGER_GENERATION_PREFIX):]) if name.startswith(LEDGER_GENERATION_PREFIX) else 0
+
+def _ledger_segment_paths(ledger_dir=None):
+    """Defter segmentlerinin yollarını sıra numarasına göre sıralı olarak döndürür."""
+    if ledger_dir is None:
+        ledger_dir = _current_ledger_dir()
+    if not os.path.isdir(ledger_dir):
+        return []
+    names = sorted(
+        name for name in os.listdir(ledger_dir)
+        if name.startswith(LEDGER_SEGMENT_PREFIX) and name.endswith('.csv')
+    )
+    return [os.path.join(ledger_dir, name) for name in names]
+
+def _ledger_segment_path(number, ledger_dir=None):
+    if ledger_dir is None:
+        ledger_dir = _current_ledger_dir()
+    return os.path.join(ledger_dir, f"{LEDGER_SEGMENT_PREFIX}{number:06d}.csv")
+
+def _read_segment_rows(path, start=0, end=None):
+    """
+    Segmentin [start, end) bayt aralığındaki tam satırlarını okur. Yarım yazılmış son satır
+    okunmaz. (kayıtlar, okunan son baytın konumu) döndürür.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read() if end is None else f.read(end - start)
+    data = data[:data.rfind(b'\n') + 1]
+    stop = start + len(data)
+    if not data.strip():
+        return pd.DataFrame(columns=LEDGER_COLUMNS), stop
+    if start == 0:
+        records = pd.read_csv(io.BytesIO(data), encoding='utf-8', dtype={'SKU': str})
+    else:
+        # Başlık satırı yalnızca segmentin başında bulunur
+        records = pd.read_csv(io.BytesIO(data), encoding='utf-8', dtype={'SKU': str}, header=None, names=LEDGER_COLUMNS)
+    return records, stop
+
+def _recover_interrupted_compaction():
+    """
+    Klasör değiştirerek sıkıştıran önceki sürümlerden yarıda kalmış bir sıkıştırmadan sonra
+    defter klasörünü tutarlı hale getirir.
+    """
+    compact_dir = WAREHOUSE_LEDGER_DIR + '.compact'
+    old_dir = WAREHOUSE_LEDGER_DIR + '.old'
+    if not os.path.isdir(WAREHOUSE_LEDGER_DIR) and os.path.isdir(compact_dir):
+        os.replace(compact_dir, WAREHOUSE_LEDGER_DIR)
+    if os.path.isdir(WAREHOUSE_LEDGER_DIR) and os.path.isdir(old_dir):
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+def _read_legacy_entries_file():
+    """Eski tam-dosya formatındaki warehouse_entries.csv dosyasını okur."""
+    try:
+        df = pd.read_csv(WAREHOUSE_ENTRIES_FILE, encoding='utf-8')
+    except UnicodeDecodeError:
+        df = pd.read_csv(WAREHOUSE_ENTRIES_FILE, encoding='windows-1254')
+        st.sidebar.warning(f"'{WAREHOUSE_ENTRIES_FILE}' dosyası UTF-8 olarak okunamadı, 'windows-1254' ile yüklendi.")
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame(columns=ENTRY_COLUMNS)
+    # Yeni sütun 'Islem Tipi' yoksa ekle ve varsayılan değer ata (eski kayıtlar için 'Giriş')
+    if 'Islem Tipi' not in df.columns:
+        df['Islem Tipi'] = 'Giriş'
+    return df
+
+def _migrate_legacy_entries_to_ledger():
+    """
+    Defter henüz oluşturulmamışsa eski warehouse_entries.csv içeriğini bir kereye mahsus
+    deftere aktarır. Eski dosyaya dokunulmaz, yedek olarak yerinde kalır.
+    """
+    if os.path.isdir(WAREHOUSE_LEDGER_DIR) and not os.path.isdir(WAREHOUSE_LEDGER_DIR + '.old'):
+        return
+    with ledger_lock():
+        _recover_interrupted_compaction()
+        if os.path.isdir(WAREHOUSE_LEDGER_DIR):
+            return
+        _write_legacy_entries_to_ledger()
+
+def _write_legacy_entries_to_ledger():
+    legacy_df = pd.DataFrame(columns=ENTRY_COLUMNS)
+    if os.path.exists(WAREHOUSE_ENTRIES_FILE):
+        legacy_df = _read_legacy_entries_file()
+        if 'Tarih' in legacy_df.columns:
+            legacy_df['Tarih'] = pd.to_datetime(legacy_df['Tarih']).dt.date.map(lambda x: x.isoformat())
+
+    # Önce geçici klasöre yaz, ardından tek adımda yerine taşı
+    tmp_dir = WAREHOUSE_LEDGER_DIR + '.migrate'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    last_sequence = 0
+    if not legacy_df.empty:
+        records = legacy_df[ENTRY_COLUMNS].copy()
+        records.insert(0, 'Sira', range(1, len(records) + 1))
+        records['Silinen Sira'] = pd.NA
+        records[LEDGER_COLUMNS].to_csv(_ledger_segment_path(1, tmp_dir), index=False, encoding='utf-8', header=True)
+        last_sequence = len(records)
+    with open(os.path.join(tmp_dir, os.path.basename(LEDGER_SEQUENCE_FILE)), 'w', encoding='utf-8') as f:
+        f.write(str(last_sequence))
+    _write_ledger_stats({'kayit': last_sequence, 'silme': 0}, tmp_dir)
+    os.replace(tmp_dir, WAREHOUSE_LEDGER_DIR)
+
+def _read_last_sequence():
+    if not os.path.exists(LEDGER_SEQUENCE_FILE):
+        return 0
+    with open(LEDGER_SEQUENCE_FILE, encoding='utf-8') as f:
+        content = f.read().strip()
+    return int(content) if content else 0
+
+def _write_last_sequence(sequence):
+    tmp_path = LEDGER_SEQUENCE_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(str(sequence))
+    os.replace(tmp_path, LEDGER_SEQUENCE_FILE)
+
+def _read_ledger_stats():
+    """
+    Defterdeki toplam kayıt ve silme kaydı sayılarını döndürür. Sayıları tutmayan eski bir
+    defterde bunlar bir kereye mahsus defterden hesaplanıp kaydedilir.
+    """
+    if os.path.exists(LEDGER_STATS_FILE):
+        with open(LEDGER_STATS_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    if not os.path.isdir(WAREHOUSE_LEDGER_DIR):
+        return {'kayit': 0, 'silme': 0}
+    with ledger_lock():
+        if os.path.exists(LEDGER_STATS_FILE):
+            return _read_ledger_stats()
+        records = read_ledger_records()
+        stats = {'kayit': len(records), 'silme': int((records['Islem Tipi'] == LEDGER_TOMBSTONE_TYPE).sum())}
+        _write_ledger_stats(stats)
+        return stats
+
+def _write_ledger_stats(stats, ledger_dir=WAREHOUSE_LEDGER_DIR):
+    path = os.path.join(ledger_dir, os.path.basename(LEDGER_STATS_FILE))
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(stats, f)
+    os.replace(path + '.tmp', path)
+
+def _append_ledger_records(records):
+    """
+    Kayıtları (hareket veya silme kaydı) aktif segmentin sonuna ekler.
+    Kayıtlara yeni sıra numaraları atanır ve atanan numaralar döndürülür.
+    """
+    with ledger_lock():
+        _migrate_legacy_entries_to_ledger()
+        stats = _read_ledger_stats()
+        first_sequence = _read_last_sequence() + 1
+        records = records.reindex(columns=LEDGER_COLUMNS)
+        records['Sira'] = range(first_sequence, first_sequence + len(records))
+
+        ledger_dir = _current_ledger_dir()
+        segments = _ledger_segment_paths(ledger_dir)
+        if not segments:
+            active_segment = _ledger_segment_path(1, ledger_dir)
+        elif os.path.getsize(segments[-1]) >= LEDGER_SEGMENT_MAX_BYTES:
+            last_number = int(os.path.basename(segments[-1])[len(LEDGER_SEGMENT_PREFIX):-len('.csv')])
+            active_segment = _ledger_segment_path(last_number + 1, ledger_dir)
+        else:
+            active_segment = segments[-1]
+
+        write_header = not os.path.exists(active_segment) or os.path.getsize(active_segment) == 0
+        with open(active_segment, 'a', encoding='utf-8', newline='') as f:
+            records.to_csv(f, index=False, header=write_header)
+            # Kayıt diske yazılmadan sıra numarası ilerletilmez
+            f.flush()
+            os.fsync(f.fileno())
+        _write_last_sequence(first_sequence + len(records) - 1)
+        # Sıra numarası ilerledikten sonra kayıtlar yazılmış sayılır; buradan sonraki bir hata
+        # eklemeyi başarısız göstermemelidir (yeniden deneme kayıtları ikinci kez ekler)
+        stats['kayit'] += len(records)
+        stats['silme'] += int((records['Islem Tipi'] == LEDGER_TOMBSTONE_TYPE).sum())
+        try:
+            _write_ledger_stats(stats)
+        except OSError:
+            # Sayılar yalnızca sıkıştırma kararında kullanılır; dosya yoksa defterden yeniden hesaplanır
+            with contextlib.suppress(OSError):
+                os.remove(LEDGER_STATS_FILE)
+        return list(records['Sira'])
+
+def _read_current_generation(read):
+    """
+    read()'i çağırır. Segmentler listelendikten sonra nesil değişip eski nesil silindiyse
+    (FileNotFoundError) okuma yeni nesilden yeniden denenir.
+    """
+    for attempt in range(LEDGER_READ_ATTEMPTS):
+        try:
+            return read()
+        except FileNotFoundError:
+            if attempt == LEDGER_READ_ATTEMPTS - 1:
+                raise
+
+def read_ledger_records(segment_cache=None):
+    """
+    Defterdeki tüm ham kayıtları (hareketler ve silme kayıtları) tek DataFrame olarak okur.
+    segment_cache verilirse ({yol: (boyut, değişim zamanı, okunan konum, kayıtlar)}) değişmemiş
+    segmentler yeniden ayrıştırılmaz; büyüyen segmentin yalnızca yeni satırları okunur.
+    """
+    _migrate_legacy_entries_to_ledger()
+    segments = _read_current_generation(
+        lambda: {path: _read_cached_segment(path, segment_cache) for path in _ledger_segment_paths()}
+    )
+    if segment_cache is not None:
+        # Sıkıştırmayla kaldırılan segmentler önbellekten de çıkarılır
+        segment_cache.clear()
+        segment_cache.update(segments)
+    frames = [segment[3] for segment in segments.values() if not segment[3].empty]
+    if not frames:
+        return pd.DataFrame(columns=LEDGER_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+def _read_cached_segment(path, segment_cache):
+    """Segmentin (boyut, değişim zamanı, okunan konum, kayıtlar) bilgisini döndürür."""
+    stat = os.stat(path)
+    cached = segment_cache.get(path) if segment_cache is not None else None
+    if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cached
+    if cached is not None and stat.st_size >= cached[2]:
+        # Segmentler yalnızca sona eklenerek büyür; önceki satırlar yeniden okunmaz
+        tail, offset = _read_segment_rows(path, cached[2])
+        records = cached[3] if tail.empty else pd.concat([cached[3], tail], ignore_index=True)
+        return (stat.st_size, stat.st_mtime_ns, offset, records)
+    records, offset = _read_segment_rows(path)
+    return (stat.st_size, stat.st_mtime_ns, offset, records)
+
+def fold_ledger_records(records):
+    """Silme kayıtlarını uygular ve yalnızca geçerli (silinmemiş) hareketleri döndürür."""
+    is_tombstone = records['Islem Tipi'] == LEDGER_TOMBSTONE_TYPE
+    deleted_sequences = records.loc[is_tombstone, 'Silinen Sira']
+    movements = records[~is_tombstone]
+    movements = movements[~movements['Sira'].isin(deleted_sequences)]
+    movements = movements[['Sira'] + ENTRY_COLUMNS].reset_index(drop=True)
+    # Silme kayıtlarıyla birleştirilince ondalığa dönen sayısal sütunları geri çevir
+    return movements.astype({'Sira': 'int64', 'Adet': 'int64'})
+
+def read_ledger(segment_cache=None):
+    """Defteri okur ve silme kayıtları uygulanmış güncel hareket listesini döndürür."""
+    return fold_ledger_records(read_ledger_records(segment_cache))
+
+def compact_ledger():
+    """
+    Silinen kayıtları ve silme kayıtlarını defterden temizler, kalan hareketleri yeni bir
+    nesle yeniden yazar. Sıra numaraları korunur. Defter kilidi yalnızca başta segment
+    boyutları alınırken ve sonda, bu arada eklenen kayıtlar taşınıp nesil değiştirilirken
+    tutulur; yeniden yazma sırasında eklemeler ve silmeler beklemez.
+    Sıkıştırma sonrası kalan hareket sayısını döndürür.
+    """
+    with get_file_lock(LEDGER_COMPACTION_LOCK_FILE):
+        _migrate_legacy_entries_to_ledger()
+        _remove_old_ledger_generations()
+        with ledger_lock():
+            source_dir = _current_ledger_dir()
+            sizes = {path: os.path.getsize(path) for path in _ledger_segment_paths(source_dir)}
+
+        frames = [_read_segment_rows(path, end=size)[0] for path, size in sizes.items()]
+        frames = [frame for frame in frames if not frame.empty]
+        live = fold_ledger_records(pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=LEDGER_COLUMNS))
+        live = live.reindex(columns=LEDGER_COLUMNS)
+        target_dir = os.path.join(WAREHOUSE_LEDGER_DIR, f"{LEDGER_GENERATION_PREFIX}{_ledger_generation_number(source_dir) + 1:06d}")
+        shutil.rmtree(target_dir, ignore_errors=True)
+        os.makedirs(target_dir)
+        segment_count = 0
+        for start in range(0, len(live), LEDGER_COMPACTION_ROWS_PER_SEGMENT):
+            segment_count += 1
+            chunk = live.iloc[start:start + LEDGER_COMPACTION_ROWS_PER_SEGMENT]
+            chunk.to_csv(_ledger_segment_path(segment_count, target_dir), index=False, encoding='utf-8', header=True)
+
+        with ledger_lock():
+            # Yeniden yazma sırasında eklenen kayıtlar (silme kayıtları dahil) olduğu gibi taşınır
+            tail = [_read_segment_rows(path, sizes.get(path, 0))[0] for path in _ledger_segment_paths(source_dir)]
+            tail = [frame for frame in tail if not frame.empty]
+            tail = pd.concat(tail, ignore_index=True).reindex(columns=LEDGER_COLUMNS) if tail else pd.DataFrame(columns=LEDGER_COLUMNS)
+            if not tail.empty:
+                tail.to_csv(_ledger_segment_path(segment_count + 1, target_dir), index=False, encoding='utf-8', header=True)
+            is_tombstone = tail['Islem Tipi'] == LEDGER_TOMBSTONE_TYPE
+            pointer_tmp = LEDGER_CURRENT_FILE + '.tmp'
+            with open(pointer_tmp, 'w', encoding='utf-8') as f:
+                f.write(os.path.basename(target_dir))
+            os.replace(pointer_tmp, LEDGER_CURRENT_FILE)
+            _write_ledger_stats({'kayit': len(live) + len(tail), 'silme': int(is_tombstone.sum())})
+
+        deleted_in_tail = tail.loc[is_tombstone, 'Silinen Sira']
+        return int((~live['Sira'].isin(deleted_in_tail)).sum()) + len(fold_ledger_records(tail))
+
+def _remove_old_ledger_generations():
+    """
+    Geçerli olmayan nesilleri siler. Önceki nesiller, nesil değiştikten sonra okuyucuların yeni
+    nesle geçmesine yetecek süre (LEDGER_GENERATION_GRACE_SECONDS) geçmeden silinmez; geçerli
+    nesilden yeni olanlar yarıda kalmış sıkıştırmalardan kalmıştır. Sıkıştırma kilidiyle çağrılır.
+    """
+    current_dir = _current_ledger_dir()
+    current_number = _ledger_generation_number(current_dir)
+    settled = os.path.exists(LEDGER_CURRENT_FILE) and time.time() - os.path.getmtime(LEDGER_CURRENT_FILE) >= LEDGER_GENERATION_GRACE_SECONDS
+    for name in os.listdir(WAREHOUSE_LEDGER_DIR):
+        path = os.path.join(WAREHOUSE_LEDGER_DIR, name)
+        if not name.startswith(LEDGER_GENERATION_PREFIX) or path == current_dir:
+            continue
+        if settled or _ledger_generation_number(path) > current_number:
+            shutil.rmtree(path, ignore_errors=True)
+    if settled and current_number > 0:
+        # İlk neslin segmentleri doğrudan defter klasöründedir
+        for path in _ledger_segment_paths(WAREHOUSE_LEDGER_DIR):
+            os.remove(path)
+
+def ledger_needs_compaction():
+    """Silme kayıtlarının oranı eşiği aşmış mı; defter okunmadan kayıtlı sayılardan bulunur."""
+    stats = _read_ledger_stats()
+    return stats['kayit'] > 0 and stats['silme'] / stats['kayit'] >= LEDGER_COMPACTION_TOMBSTONE_RATIO
+
+def compact_ledger_if_needed():
+    """Silme kayıtlarının oranı eşiği aşmışsa defteri sıkıştırır. Sıkıştırma yapıldıysa True döner."""
+    if not ledger_needs_compaction():
+        return False
+    compact_ledger()
+    return True
+
+_compaction_lock = threading.Lock()
+
+def start_background_compaction():
+    """
+    Gerekiyorsa defteri arka planda sıkıştırır; silme işlemi sıkıştırmayı beklemez.
+    Süreçte aynı anda tek sıkıştırma çalışır. Sıkıştırma başlatıldıysa True döner.
+    """
+    if not ledger_needs_compaction() or not _compaction_lock.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            compact_ledger_if_needed()
+        except Exception:
+            pass # Yarıda kalan neslin klasörü bir sonraki sıkıştırmada silinir, sıkıştırma bir sonraki silmede yeniden denenir
+        finally:
+            _compaction_lock.release()
+
+    threading.Thread(target=run, name='defter-sikistirma', daemon=True).start()
+    return True
+
+# --- Depolama Katmanı ---
+# Uygulamanın geri kalanı verilere yalnızca get_storage() üzerinden erişir.
+# Her depolama sınıfı aynı yöntemleri sağlar: ürünleri okuma/yazma, hareket ekleme/silme
+# ve raporlama için tarih aralığı sorguları. Hareketler typed_entries şemasında döner;
+# tek tarih değerleri (ör. entry_date_bounds) datetime.date olarak döner.
+ENTRY_TYPES = ['Giriş', 'Çıkış']
+
+def typed_entries(entries):
+    """
+    Hareketleri ortak bellek şemasına çevirir: Tarih datetime64, SKU / Urun Adi / Islem Tipi
+    kategorik, Adet int32. Tekrarlanan metinler satır başına değil kategori başına bir kez tutulur.
+    """
+    typed = pd.DataFrame({
+        'Sira': entries['Sira'].to_numpy(dtype='int64'),
+        'Tarih': pd.to_datetime(entries['Tarih']).to_numpy(dtype='datetime64[ns]'),
+        'SKU': pd.Categorical(entries['SKU'].astype(str)),
+        'Urun Adi': pd.Categorical(entries['Urun Adi']),
+        'Adet': entries['Adet'].to_numpy(dtype='int32'),
+        'Islem Tipi': pd.Categorical(entries['Islem Tipi'], categories=ENTRY_TYPES),
+    })
+    return typed
+
+def resolve_product_names(entries, products_df):
+    """
+    Urun Adi sütununu SKU başına katalogdaki addan çözer. Katalogda bulunmayan SKU'lar
+    hareketlerde kayıtlı adı korur. Sonuç kategoriktir; her satır yalnızca bir kod tutar.
+    """
+    if entries.empty:
+        return entries
+    sku_codes = entries['SKU'].cat.codes.to_numpy()
+    skus = entries['SKU'].cat.categories
+    catalog = products_df[['SKU', 'Urun Adi']].astype(str).drop_duplicates('SKU', keep='last')
+    names = pd.Series(catalog['Urun Adi'].to_numpy(), index=catalog['SKU'].to_numpy()).reindex(skus)
+
+    # Katalogda olmayan SKU'lar için hareketlerde kayıtlı ad (SKU başına son kayıt) kullanılır
+    stored_name_codes = np.full(len(skus), -1, dtype='int64')
+    stored_name_codes[sku_codes] = entries['Urun Adi'].cat.codes.to_numpy()
+    stored_names = np.append(entries['Urun Adi'].cat.categories.to_numpy(dtype=object), None)[stored_name_codes]
+    names = names.fillna(pd.Series(stored_names, index=skus))
+
+    name_codes, name_categories = pd.factorize(names.to_numpy())
+    resolved = entries.copy(deep=False)
+    resolved['Urun Adi'] = pd.Categorical.from_codes(name_codes[sku_codes], categories=name_categories)
+    return resolved
+
+def stock_deltas(entries):
+    """Hareketlerin SKU bazında stoğa etkisini döndürür (Giriş +, Çıkış -)."""
+    if entries.empty:
+        return {}
+    signed = np.where(entries['Islem Tipi'] == 'Çıkış', -entries['Adet'], entries['Adet'])
+    return pd.Series(signed, index=entries['SKU'].values).groupby(level=0, observed=True).sum().astype(int).to_dict()
+
+def stock_mismatches(stored, computed):
+    """Kayıtlı stok bakiyeleri ile hareketlerden hesaplananlar arasındaki farkları listeler."""
+    rows = [
+        {'SKU': sku, 'Kayitli Stok': stored.get(sku, 0), 'Hesaplanan Stok': computed.get(sku, 0)}
+        for sku in sorted(set(stored) | set(computed), key=str)
+        if stored.get(sku, 0) != computed.get(sku, 0)
+    ]
+    return pd.DataFrame(rows, columns=['SKU', 'Kayitli Stok', 'Hesaplanan Stok'])
+
+ROLLUP_COLUMNS = ['SKU', 'Tarih', 'Giris', 'Cikis']
+
+def rollup_deltas(entries):
+    """Hareketleri SKU ve gün bazında toplam giriş/çıkış adetlerine indirger."""
+    if entries.empty:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    is_cikis = (entries['Islem Tipi'] == 'Çıkış').to_numpy()
+    adet = entries['Adet'].to_numpy(dtype='int64')
+    daily = pd.DataFrame({
+        'SKU': entries['SKU'].to_numpy(),
+        'Tarih': pd.to_datetime(entries['Tarih']).to_numpy(dtype='datetime64[D]'),
+        'Giris': np.where(is_cikis, 0, adet),
+        'Cikis': np.where(is_cikis, adet, 0),
+    })
+    return daily.groupby(['SKU', 'Tarih'], as_index=False).sum()
+
+def merge_rollup(rollup, deltas):
+    """Günlük özet tablosuna yeni farkları ekler; sıfırlanan günleri çıkarır."""
+    frames = [frame for frame in (rollup, deltas) if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    merged = pd.concat(frames, ignore_index=True).groupby(['SKU', 'Tarih'], as_index=False).sum()
+    return merged[(merged['Giris'] != 0) | (merged['Cikis'] != 0)].reset_index(drop=True)
+
+class DailyRollupIndex:
+    """
+    Günlük, SKU bazlı giriş/çıkış toplamları üzerinde önek toplamları (prefix sums).
+    Herhangi bir tarih aralığının toplamı veya belirli bir tarihteki stok, hareket
+    geçmişi taranmadan iki ikili arama (O(log n)) ile bulunur.
+    Yeni hareketler apply ile yerinde eklenir; yalnızca etkilenen SKU'ların ve gün
+    toplamlarının önek toplamları yeniden hesaplanır.
+    """
+
+    REBUILD_SKU_COUNT = 1000 # Bundan çok SKU'yu etkileyen farklarda indeks baştan kurulur
+
+    def __init__(self, rollup):
+        rollup = rollup.sort_values(['SKU', 'Tarih'], kind='stable')
+        self._skus = rollup['SKU'].to_numpy()
+        self._dates = rollup['Tarih'].to_numpy(dtype='datetime64[D]')
+        self._cum_giris = np.concatenate([[0], np.cumsum(rollup['Giris'].to_numpy(dtype='int64'))])
+        self._cum_cikis = np.concatenate([[0], np.cumsum(rollup['Cikis'].to_numpy(dtype='int64'))])
+
+        # Her SKU'nun sıralı dizideki [başlangıç, bitiş) konumları
+        starts = np.flatnonzero(np.r_[True, self._skus[1:] != self._skus[:-1]]) if len(self._skus) else np.array([], dtype=int)
+        ends = np.append(starts[1:], len(self._skus))
+        self._sku_bounds = dict(zip(self._skus[starts], zip(starts, ends)))
+
+        # Tüm ürünlerin toplamı için gün bazında ayrı önek toplamları
+        daily_totals = rollup.groupby('Tarih')[['Giris', 'Cikis']].sum()
+        self._totals = (
+            daily_totals.index.to_numpy(dtype='datetime64[D]'),
+            np.concatenate([[0], np.cumsum(daily_totals['Giris'].to_numpy(dtype='int64'))]),
+            np.concatenate([[0], np.cumsum(daily_totals['Cikis'].to_numpy(dtype='int64'))]),
+        )
+        self._updated = {} # Kurulumdan sonra değişen SKU'ların kendi dizileri
+
+    def _arrays(self, sku):
+        """(tarihler, önek giriş, önek çıkış); önek dizileri bir eleman uzundur ve farkları anlamlıdır."""
+        if sku is None:
+            return self._totals
+        arrays = self._updated.get(sku)
+        if arrays is None:
+            lo, hi = self._sku_bounds.get(sku, (0, 0))
+            arrays = (self._dates[lo:hi], self._cum_giris[lo:hi + 1], self._cum_cikis[lo:hi + 1])
+        return arrays
+
+    def totals(self, start_date, end_date, sku=None):
+        """Tarih aralığındaki (uçlar dahil) toplam giriş ve çıkış adetleri."""
+        dates, cum_giris, cum_cikis = self._arrays(sku)
+        first = np.searchsorted(dates, np.datetime64(start_date, 'D'), side='left')
+        last = np.searchsorted(dates, np.datetime64(end_date, 'D'), side='right')
+        return {
+            'Giriş': int(cum_giris[last] - cum_giris[first]),
+            'Çıkış': int(cum_cikis[last] - cum_cikis[first]),
+        }
+
+    def stock_as_of(self, day, sku=None):
+        """Verilen günün sonu itibarıyla stok (o güne kadarki giriş - çıkış)."""
+        dates, cum_giris, cum_cikis = self._arrays(sku)
+        last = np.searchsorted(dates, np.datetime64(day, 'D'), side='right')
+        return int((cum_giris[last] - cum_giris[0]) - (cum_cikis[last] - cum_cikis[0]))
+
+    @staticmethod
+    def _upsert(arrays, dates, giris, cikis):
+        """Dizilere (gün, giriş, çıkış) farklarını ekler; sıfırlanan günleri çıkarır."""
+        old_dates, cum_giris, cum_cikis = arrays
+        merged_dates, positions = np.unique(np.concatenate([old_dates, dates]), return_inverse=True)
+        daily_giris = np.zeros(len(merged_dates), dtype='int64')
+        daily_cikis = np.zeros(len(merged_dates), dtype='int64')
+        np.add.at(daily_giris, positions, np.concatenate([np.diff(cum_giris), giris]))
+        np.add.at(daily_cikis, positions, np.concatenate([np.diff(cum_cikis), cikis]))
+        keep = (daily_giris != 0) | (daily_cikis != 0)
+        return (
+            merged_dates[keep],
+            np.concatenate([[0], np.cumsum(daily_giris[keep])]),
+            np.concatenate([[0], np.cumsum(daily_cikis[keep])]),
+        )
+
+    def apply(self, deltas):
+        """
+        rollup_deltas biçimindeki farkları uygular ve güncel indeksi döndürür. Farklar çok sayıda
+        SKU'yu etkiliyorsa (ör. toplu aktarım) yeni bir indeks kurulur, aksi halde indeks yerinde güncellenir.
+        """
+        if deltas.empty:
+            return self
+        by_sku = deltas.groupby('SKU', sort=False).indices
+        if len(by_sku) > self.REBUILD_SKU_COUNT:
+            return DailyRollupIndex(merge_rollup(self.to_frame(), deltas))
+        dates = deltas['Tarih'].to_numpy(dtype='datetime64[D]')
+        giris = deltas['Giris'].to_numpy(dtype='int64')
+        cikis = deltas['Cikis'].to_numpy(dtype='int64')
+        for sku, positions in by_sku.items():
+            self._updated[sku] = self._upsert(self._arrays(sku), dates[positions], giris[positions], cikis[positions])
+        self._totals = self._upsert(self._totals, dates, giris, cikis)
+        return self
+
+    def to_frame(self):
+        """İndeksin yansıttığı günlük özeti ROLLUP_COLUMNS biçiminde döndürür."""
+        unchanged = ~np.isin(self._skus, list(self._updated)) if self._updated else np.ones(len(self._skus), dtype=bool)
+        frames = [pd.DataFrame({
+            'SKU': self._skus[unchanged],
+            'Tarih': self._dates[unchanged],
+            'Giris': np.diff(self._cum_giris)[unchanged],
+            'Cikis': np.diff(self._cum_cikis)[unchanged],
+        })]
+        for sku, (dates, cum_giris, cum_cikis) in self._updated.items():
+            frames.append(pd.DataFrame({'SKU': sku, 'Tarih': dates, 'Giris': np.diff(cum_giris), 'Cikis': np.diff(cum_cikis)}))
+        frame = pd.concat(frames, ignore_index=True)
+        frame['Tarih'] = pd.to_datetime(frame['Tarih'])
+        return frame
+
+class CacheStats:
+    """
+    Önbellek isabet/ıska sayaçları. Aynı süreçteki tüm oturumlar tarafından paylaşılır.
+    st.cache_data gibi sonucu dışarıdan görülemeyen önbelleklerde her sorgu lookup ile,
+    yalnızca yeniden hesaplanan sorgular (önbelleğe alınan fonksiyonun içinden) miss ile sayılır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = collections.defaultdict(lambda: {'lookup': 0, 'miss': 0})
+
+    def lookup(self, name):
+        with self._lock:
+            self._counts[name]['lookup'] += 1
+
+    def miss(self, name):
+        with self._lock:
+            self._counts[name]['miss'] += 1
+
+    def record(self, name, hit):
+        self.lookup(name)
+        if not hit:
+            self.miss(name)
+
+    def snapshot(self):
+        """{önbellek adı: {'hit': n, 'miss': n}} biçiminde anlık kopya döndürür."""
+        with self._lock:
+            return {
+                name: {'hit': max(counts['lookup'] - counts['miss'], 0), 'miss': counts['miss']}
+                for name, counts in self._counts.items()
+            }
+
+class EntriesFrameQueries:
+    """
+    Tarih aralığı sorgularını bellekteki hareket tablosu ve günlük özet indeksi (rollup_index)
+    üzerinden yanıtlar. Verileri tek tabloda tutan katmanlarca kullanılır. Alt sınıflar önbellekteki
+    tabloyu kopyalamadan döndüren _cached_entries'i sağlar; read_entries bu tablonun kopyasını
+    döndürür. Sorgular tabloyu yalnızca okur, kopyalamaz.
+    """
+
+    def read_entries(self):
+        """Güncel hareketlerin kopyasını döndürür."""
+        return self._cached_entries().copy()
+
+    def entry_date_bounds(self):
+        entries = self._cached_entries()
+        if entries.empty:
+            return None, None
+        return entries['Tarih'].min().date(), entries['Tarih'].max().date()
+
+    def query_entries(self, start_date, end_date, sku=None):
+        entries = self._cached_entries()
+        mask = (entries['Tarih'] >= pd.Timestamp(start_date)) & (entries['Tarih'] <= pd.Timestamp(end_date))
+        if sku is not None:
+            mask &= entries['SKU'] == sku
+        return entries[mask].reset_index(drop=True)
+
+    def iter_entries(self, start_date, end_date, sku=None, chunk_rows=None):
+        """query_entries ile aynı kayıtları, filtrelenmiş kopyayı bir kerede oluşturmadan parçalar halinde döndürür."""
+        chunk_rows = chunk_rows or EXPORT_CHUNK_ROWS
+        entries = self._cached_entries()
+        mask = (entries['Tarih'] >= pd.Timestamp(start_date)) & (entries['Tarih'] <= pd.Timestamp(end_date))
+        if sku is not None:
+            mask &= entries['SKU'] == sku
+        positions = np.flatnonzero(mask.to_numpy())
+        for start in range(0, len(positions), chunk_rows):
+            yield entries.take(positions[start:start + chunk_rows]).reset_index(drop=True)
+
+    def summarize_entries(self, start_date, end_date, sku=None):
+        return self.rollup_index().totals(start_date, end_date, sku)
+
+    def stock_as_of(self, day, sku=None):
+        return self.rollup_index().stock_as_of(day, sku)
+
+    def skus_in_range(self, start_date, end_date):
+        return list(self.query_entries(start_date, end_date)['SKU'].unique())
+
+class CsvStorage(EntriesFrameQueries):
+    """products.csv ve append-only hareket defteri üzerinde çalışan depolama katmanı."""
+
+    name = 'csv'
+
+    def __init__(self):
+        self.cache_stats = CacheStats()
+        self._entries_cache = (None, None) # (defter parmak izi, hareketler)
+        self._segment_cache = {} # Segment başına ayrıştırılmış kayıtlar, bkz. read_ledger_records
+        self._stock_cache = (None, None) # (özet dosyasının kimliği, (sıra no, bakiyeler, okunan günlük konumu))
+        self._stock_lock = threading.Lock() # Bakiyeler yerinde güncellenir; nesne oturumlar arasında paylaşılır
+        self._rollup_index_cache = (None, None) # (defter sıra no, DailyRollupIndex)
+
+    def load_products(self):
+        return read_products_csv()
+
+    def save_products(self, df):
+        # read_products_csv ile aynı ayraç kullanılır
+        with get_file_lock(PRODUCTS_LOCK_FILE):
+            df.to_csv(PRODUCTS_FILE, index=False, encoding='utf-8', header=True, sep=';')
+
+    def products_version(self):
+        """Ürün dosyasının parmak izi (boyut, değişim zamanı); dosya her yazıldığında değişir."""
+        if not os.path.exists(PRODUCTS_FILE):
+            return None
+        stat = os.stat(PRODUCTS_FILE)
+        return f'{stat.st_size}-{stat.st_mtime_ns}'
+
+    def entries_version(self):
+        """Defterin son sıra numarası. Her ekleme ve silme (silme kaydı) numarayı artırır."""
+        return _read_last_sequence()
+
+    def _ledger_fingerprint(self):
+        return _read_current_generation(lambda: tuple(
+            (path, os.path.getsize(path), os.path.getmtime(path))
+            for path in _ledger_segment_paths()
+        ))
+
+    def _cached_entries(self):
+        """Güncel hareketler. Defter değişmediyse önceki okuma yeniden kullanılır."""
+        _migrate_legacy_entries_to_ledger()
+        fingerprint = self._ledger_fingerprint()
+        cached_fingerprint, cached_entries = self._entries_cache
+        self.cache_stats.record('defter_okuma', cached_fingerprint == fingerprint)
+        if cached_fingerprint != fingerprint:
+            cached_entries = typed_entries(read_ledger(self._segment_cache))
+            self._entries_cache = (fingerprint, cached_entries)
+        return cached_entries
+
+    def add_product(self, sku, name):
+        """Ürünü listeye ekler; SKU zaten varsa False döner. Eşzamanlı eklemeler kaybolmaz."""
+        with get_file_lock(PRODUCTS_LOCK_FILE):
+            products = self.load_products() if os.path.exists(PRODUCTS_FILE) else pd.DataFrame(columns=['SKU', 'Urun Adi'])
+            if sku in products['SKU'].astype(str).values:
+                return False
+            new_product = pd.DataFrame([{'SKU': sku, 'Urun Adi': name}])
+            self.save_products(new_product if products.empty else pd.concat([products, new_product], ignore_index=True))
+            return True
+
+    def append_entries(self, entry_df):
+        # Defter, stok özeti ve günlük özet indeksi aynı kilit altında birlikte güncellenir
+        with ledger_lock():
+            _, balances = self._current_stock_snapshot()
+            index_sequence, index = self._rollup_index_cache
+            sequences = _append_ledger_records(entry_df)
+            try:
+                self._apply_stock_deltas(balances, stock_deltas(entry_df), sequences[-1])
+                if index_sequence == sequences[0] - 1:
+                    self._rollup_index_cache = (sequences[-1], index.apply(rollup_deltas(entry_df)))
+            except Exception:
+                self._forget_summaries()
+
+    def delete_entries(self, sequences):
+        with ledger_lock():
+            _, balances = self._current_stock_snapshot()
+            index_sequence, index = self._rollup_index_cache
+            entries = self._cached_entries()
+            deleted = entries[entries['Sira'].isin(list(sequences))]
+            tombstones = pd.DataFrame({'Silinen Sira': list(sequences)})
+            tombstones['Islem Tipi'] = LEDGER_TOMBSTONE_TYPE
+            tombstone_sequences = _append_ledger_records(tombstones)
+            try:
+                reversed_deltas = {sku: -delta for sku, delta in stock_deltas(deleted).items()}
+                self._apply_stock_deltas(balances, reversed_deltas, tombstone_sequences[-1])
+                if index_sequence == tombstone_sequences[0] - 1:
+                    reversed_rollup = rollup_deltas(deleted)
+                    reversed_rollup[['Giris', 'Cikis']] *= -1
+                    self._rollup_index_cache = (tombstone_sequences[-1], index.apply(reversed_rollup))
+            except Exception:
+                self._forget_summaries()
+        start_background_compaction()
+
+    def _forget_summaries(self):
+        """
+        Defter yazıldıktan sonra özetler güncellenemediğinde çağrılır. Kayıtlar deftere işlendiği
+        için yazma başarısız sayılmaz; aksi halde yeniden deneme aynı kayıtları ikinci kez ekler.
+        Stok özeti defterin gerisinde kaldığından bir sonraki okumada defterden yeniden hesaplanır.
+        """
+        self._stock_cache = (None, None)
+        self._rollup_index_cache = (None, None)
+
+    def compact(self):
+        return compact_ledger()
+
+    def daily_rollup(self):
+        """SKU ve gün bazında giriş/çıkış toplamlarını döndürür."""
+        return self.rollup_index().to_frame()
+
+    def rollup_index(self):
+        """
+        Günlük özet indeksi. Bu süreçteki yazmalarla yerinde güncellenir; defter başka bir
+        süreç tarafından değiştirildiyse yeniden kurulur.
+        """
+        last_sequence = _read_last_sequence()
+        cached_sequence, index = self._rollup_index_cache
+        self.cache_stats.record('ozet_indeksi', cached_sequence == last_sequence)
+        if cached_sequence != last_sequence:
+            # Kilit, okunan kayıtların etiketlenen sıra numarasından ileride olmamasını sağlar
+            with ledger_lock():
+                last_sequence = _read_last_sequence()
+                index = DailyRollupIndex(rollup_deltas(self._cached_entries()))
+                self._rollup_index_cache = (last_sequence, index)
+        return index
+
+    # Stok özeti, yansıttığı son defter sıra numarasıyla birlikte saklanır. Her yazma özeti yeniden
+    # yazmak yerine stok farklarını bakiye günlüğüne ekler; günlük büyüyünce özete katlanır.
+    # Okuyucular günlüğün yalnızca son okumadan sonra eklenen satırlarını okur.
+    # Defter özetten ileride ise (ör. yarıda kalmış bir yazma) özet defterden yeniden hesaplanır.
+    def _read_stock_snapshot(self):
+        try:
+            stat = os.stat(STOCK_BALANCES_FILE)
+        except FileNotFoundError:
+            return None
+        snapshot_key = (stat.st_ino, stat.st_mtime_ns)
+        with self._stock_lock:
+            cached_key, state = self._stock_cache
+            if cached_key != snapshot_key:
+                with open(STOCK_BALANCES_FILE, encoding='utf-8') as f:
+                    content = json.load(f)
+                state = (content['sira'], content['bakiyeler'], 0)
+            sequence, balances, offset = state
+            try:
+                with open(STOCK_BALANCE_LOG_FILE, 'rb') as f:
+                    f.seek(offset)
+                    data = f.read()
+            except FileNotFoundError:
+                data = b''
+            # Yazılmakta olan son satır bir sonraki okumaya kalır
+            data = data[:data.rfind(b'\n') + 1]
+            for line in data.splitlines():
+                change = json.loads(line)
+                # Özete katlanmış satırlar, günlük boşaltılana kadar atlanır
+                if change['sira'] > sequence:
+                    for sku, delta in change['fark'].items():
+                        balances[sku] = balances.get(sku, 0) + delta
+                    sequence = change['sira']
+            self._stock_cache = (snapshot_key, (sequence, balances, offset + len(data)))
+            return sequence, balances
+
+    def _write_stock_snapshot(self, sequence, balances):
+        """Özeti yazar ve bakiye günlüğünü boşaltır; günlükteki farklar özete dahildir."""
+        tmp_path = STOCK_BALANCES_FILE + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'sira': sequence, 'bakiyeler': balances}, f, ensure_ascii=False)
+        os.replace(tmp_path, STOCK_BALANCES_FILE)
+        open(STOCK_BALANCE_LOG_FILE, 'w').close()
+        stat = os.stat(STOCK_BALANCES_FILE)
+        with self._stock_lock:
+            self._stock_cache = ((stat.st_ino, stat.st_mtime_ns), (sequence, balances, 0))
+
+    def _current_stock_snapshot(self):
+        _migrate_legacy_entries_to_ledger()
+        last_sequence = _read_last_sequence()
+        snapshot = self._read_stock_snapshot()
+        if snapshot is None or snapshot[0] != last_sequence:
+            with ledger_lock():
+                # Okuma, başka bir yazmanın defter ile günlük arasına denk gelmiş olabilir
+                last_sequence = _read_last_sequence()
+                snapshot = self._read_stock_snapshot()
+                if snapshot is None or snapshot[0] != last_sequence:
+                    snapshot = (last_sequence, stock_deltas(self._cached_entries()))
+                    self._write_stock_snapshot(*snapshot)
+        return snapshot
+
+    def _apply_stock_deltas(self, balances, deltas, sequence):
+        """
+        Farkları bakiye günlüğüne ekler; defter kilidiyle, _current_stock_snapshot'ın döndürdüğü
+        bakiyelerle çağrılır.
+        """
+        line = (json.dumps({'sira': sequence, 'fark': deltas}, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._stock_lock:
+            snapshot_key, (_, _, offset) = self._stock_cache
+            with open(STOCK_BALANCE_LOG_FILE, 'ab') as f:
+                # Yarıda kalmış bir yazmanın bıraktığı eksik satır varsa günlük özete katlanarak temizlenir
+                intact = f.tell() == offset
+                if intact:
+                    f.write(line)
+            for sku, delta in deltas.items():
+                balances[sku] = balances.get(sku, 0) + delta
+            if intact and offset + len(line) <= STOCK_BALANCE_LOG_MAX_BYTES:
+                self._stock_cache = (snapshot_key, (sequence, balances, offset + len(line)))
+                return
+        self._write_stock_snapshot(sequence, balances)
+
+    def stock_balances(self):
+        """SKU bazında güncel stok miktarlarını sözlük olarak döndürür."""
+        balances = self._current_stock_snapshot()[1]
+        with self._stock_lock:
+            return dict(balances)
+
+    def stock_of(self, sku):
+        return self._current_stock_snapshot()[1].get(sku, 0)
+
+    def check_stock_balances(self):
+        """Stok özetini defterden yeniden hesaplar; düzeltilen farkları döndürür."""
+        with ledger_lock():
+            stored = self.stock_balances()
+            computed = stock_deltas(self._cached_entries())
+            self._write_stock_snapshot(_read_last_sequence(), computed)
+        return stock_mismatches(stored, computed)
+
+
+class SqliteStorage:
+    """
+    Ürünleri ve hareketleri gömülü bir SQLite veritabanında tutan depolama katmanı.
+    Hareketler SKU, Tarih ve İşlem Tipi üzerinden indekslidir; raporlar tam tablo taraması
+    yerine indeksli sorgularla yanıtlanır.
+    """
+
+    name = 'sqlite'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS products (
+            sku TEXT PRIMARY KEY,
+            urun_adi TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS movements (
+            sira INTEGER PRIMARY KEY AUTOINCREMENT,
+            tarih TEXT NOT NULL,
+            sku TEXT NOT NULL,
+            urun_adi TEXT,
+            adet INTEGER NOT NULL,
+            islem_tipi TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_movements_tarih ON movements (tarih);
+        CREATE INDEX IF NOT EXISTS idx_movements_sku_tarih ON movements (sku, tarih);
+        CREATE INDEX IF NOT EXISTS idx_movements_islem_tipi ON movements (islem_tipi, tarih);
+        CREATE TABLE IF NOT EXISTS daily_rollup (
+            sku TEXT NOT NULL,
+            tarih TEXT NOT NULL,
+            giris INTEGER NOT NULL,
+            cikis INTEGER NOT NULL,
+            PRIMARY KEY (sku, tarih)
+        );
+        CREATE TABLE IF NOT EXISTS stock_balances (
+            sku TEXT PRIMARY KEY,
+            stok INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    SQLITE_PARAMS_PER_QUERY = 500
+
+    # SQL sütun adları ile uygulamadaki DataFrame sütun adları arasındaki eşleme
+    ENTRY_SELECT = 'SELECT sira AS "Sira", tarih AS "Tarih", sku AS "SKU", urun_adi AS "Urun Adi", adet AS "Adet", islem_tipi AS "Islem Tipi" FROM movements'
+
+    def __init__(self, db_path=SQLITE_DB_FILE):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+        # Stok tablosundan önce oluşturulmuş veritabanlarında bakiyeler bir kez hareketlerden hesaplanır
+        with self._connect() as conn, conn:
+            if not conn.execute("SELECT 1 FROM meta WHERE key = 'stock_balances_built'").fetchone():
+                self._rebuild_stock_balances(conn)
+                conn.execute("INSERT INTO meta (key, value) VALUES ('stock_balances_built', ?)", (datetime.datetime.now().isoformat(),))
+            if not conn.execute("SELECT 1 FROM meta WHERE key = 'daily_rollup_built'").fetchone():
+                self._rebuild_daily_rollup(conn)
+                conn.execute("INSERT INTO meta (key, value) VALUES ('daily_rollup_built', ?)", (datetime.datetime.now().isoformat(),))
+        self.cache_stats = CacheStats()
+        self._rollup_index_cache = (None, None) # (hareket sürümü, DailyRollupIndex)
+        self._rollup_index_lock = threading.Lock()
+
+    def _connect(self):
+        # Streamlit her oturumu ayrı bir iş parçacığında çalıştırdığından her işlem kendi bağlantısını açar
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return contextlib.closing(conn)
+
+    def _read_sql(self, query, params=()):
+        with self._connect() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+
+    def load_products(self):
+        return self._read_sql('SELECT sku AS "SKU", urun_adi AS "Urun Adi" FROM products ORDER BY rowid')
+
+    def _replace_products(self, conn, df):
+        rows = list(df[['SKU', 'Urun Adi']].astype(str).itertuples(index=False, name=None))
+        conn.execute('DELETE FROM products')
+        conn.executemany('INSERT OR REPLACE INTO products (sku, urun_adi) VALUES (?, ?)', rows)
+        self._bump_version(conn, 'products_version')
+
+    def _insert_entries(self, conn, entry_df, keep_sequence=False):
+        columns = ['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi']
+        sql = 'INSERT INTO movements (tarih, sku, urun_adi, adet, islem_tipi) VALUES (?, ?, ?, ?, ?)'
+        if keep_sequence:
+            # CSV aktarımında defterdeki sıra numaraları korunur
+            columns = ['Sira'] + columns
+            sql = 'INSERT INTO movements (sira, tarih, sku, urun_adi, adet, islem_tipi) VALUES (?, ?, ?, ?, ?, ?)'
+        # Satırlar sütun sütun Python değerlerine çevrilir; satır satır dolaşmaktan çok daha hızlıdır
+        rows = zip(*(entry_df[column].tolist() for column in columns))
+        conn.executemany(sql, rows)
+        self._add_stock_deltas(conn, stock_deltas(entry_df))
+        rollup = rollup_deltas(entry_df)
+        self._add_rollup_deltas(conn, rollup)
+        self._bump_version(conn, 'entries_version')
+        return rollup
+
+    def _add_rollup_deltas(self, conn, deltas):
+        rows = zip(
+            deltas['SKU'].astype(str).tolist(),
+            deltas['Tarih'].astype(str).str.slice(0, 10).tolist(),
+            deltas['Giris'].astype('int64').tolist(),
+            deltas['Cikis'].astype('int64').tolist(),
+        )
+        conn.executemany(
+            'INSERT INTO daily_rollup (sku, tarih, giris, cikis) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (sku, tarih) DO UPDATE SET giris = giris + excluded.giris, cikis = cikis + excluded.cikis',
+            rows,
+        )
+        conn.execute('DELETE FROM daily_rollup WHERE giris = 0 AND cikis = 0')
+
+    def _rebuild_daily_rollup(self, conn):
+        conn.execute('DELETE FROM daily_rollup')
+        conn.execute(
+            "INSERT INTO daily_rollup (sku, tarih, giris, cikis) "
+            "SELECT sku, tarih, SUM(CASE WHEN islem_tipi = 'Çıkış' THEN 0 ELSE adet END), "
+            "SUM(CASE WHEN islem_tipi = 'Çıkış' THEN adet ELSE 0 END) FROM movements GROUP BY sku, tarih"
+        )
+
+    def _bump_version(self, conn, key):
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, '1') "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+            (key,),
+        )
+
+    def _version(self, key, conn=None):
+        if conn is None:
+            with self._connect() as conn:
+                return self._version(key, conn)
+        row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def products_version(self):
+        """Ürün listesi her değiştiğinde artan sürüm numarası."""
+        return self._version('products_version')
+
+    def entries_version(self):
+        """Hareketler her değiştiğinde artan sürüm numarası."""
+        return self._version('entries_version')
+
+    def _add_stock_deltas(self, conn, deltas):
+        conn.executemany(
+            'INSERT INTO stock_balances (sku, stok) VALUES (?, ?) '
+            'ON CONFLICT (sku) DO UPDATE SET stok = stok + excluded.stok',
+            [(str(sku), int(delta)) for sku, delta in deltas.items()],
+        )
+
+    def _computed_stock_balances(self, conn):
+        rows = conn.execute(
+            "SELECT sku, SUM(CASE WHEN islem_tipi = 'Çıkış' THEN -adet ELSE adet END) FROM movements GROUP BY sku"
+        ).fetchall()
+        return {sku: int(stok) for sku, stok in rows}
+
+    def _rebuild_stock_balances(self, conn):
+        conn.execute('DELETE FROM stock_balances')
+        self._add_stock_deltas(conn, self._computed_stock_balances(conn))
+
+    def save_products(self, df):
+        with self._connect() as conn, conn:
+            self._replace_products(conn, df)
+
+    def add_product(self, sku, name):
+        """Ürünü listeye ekler; SKU zaten varsa False döner."""
+        try:
+            with self._connect() as conn, conn:
+                conn.execute('INSERT INTO products (sku, urun_adi) VALUES (?, ?)', (sku, name))
+                self._bump_version(conn, 'products_version')
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def read_entries(self):
+        return typed_entries(self._read_sql(self.ENTRY_SELECT + ' ORDER BY sira'))
+
+    def append_entries(self, entry_df):
+        with self._connect() as conn, conn:
+            rollup = self._insert_entries(conn, entry_df)
+            version = self._version('entries_version', conn)
+        self._apply_to_rollup_index(rollup, version)
+
+    def delete_entries(self, sequences):
+        sequences = [int(s) for s in sequences]
+        with self._connect() as conn, conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # Silinecek kayıtlar, SQLite parametre sınırını aşmamak için parçalar halinde okunur
+            deleted_rows = []
+            for start in range(0, len(sequences), self.SQLITE_PARAMS_PER_QUERY):
+                chunk = sequences[start:start + self.SQLITE_PARAMS_PER_QUERY]
+                placeholders = ', '.join('?' * len(chunk))
+                deleted_rows += conn.execute(f'SELECT sku, tarih, adet, islem_tipi FROM movements WHERE sira IN ({placeholders})', chunk).fetchall()
+            deleted = pd.DataFrame(deleted_rows, columns=['SKU', 'Tarih', 'Adet', 'Islem Tipi'])
+            conn.executemany('DELETE FROM movements WHERE sira = ?', [(s,) for s in sequences])
+            self._add_stock_deltas(conn, {sku: -delta for sku, delta in stock_deltas(deleted).items()})
+            reversed_rollup = rollup_deltas(deleted)
+            reversed_rollup[['Giris', 'Cikis']] *= -1
+            self._add_rollup_deltas(conn, reversed_rollup)
+            self._bump_version(conn, 'entries_version')
+            version = self._version('entries_version', conn)
+        self._apply_to_rollup_index(reversed_rollup, version)
+
+    def _apply_to_rollup_index(self, deltas, version):
+        """
+        Bu süreçte yapılan yazmanın farklarını önbellekteki özet indeksine ekler. İndeks yazmadan
+        hemen önceki sürümü yansıtmıyorsa (ör. başka bir süreç de yazdıysa) bir sonraki okumada yeniden kurulur.
+        """
+        with self._rollup_index_lock:
+            cached_version, index = self._rollup_index_cache
+            if cached_version == version - 1:
+                self._rollup_index_cache = (version, index.apply(deltas))
+
+    def daily_rollup(self, conn=None):
+        """SKU ve gün bazında giriş/çıkış toplamlarını döndürür."""
+        if conn is None:
+            with self._connect() as conn:
+                return self.daily_rollup(conn)
+        rollup = pd.read_sql_query('SELECT sku AS "SKU", tarih AS "Tarih", giris AS "Giris", cikis AS "Cikis" FROM daily_rollup', conn)
+        rollup['Tarih'] = pd.to_datetime(rollup['Tarih'])
+        return rollup
+
+    def rollup_index(self):
+        version = self.entries_version()
+        cached_version, index = self._rollup_index_cache
+        self.cache_stats.record('ozet_indeksi', cached_version == version)
+        if cached_version != version:
+            # Sürüm ve özet aynı okuma işleminde okunur; sonraki yazmalar indeksi bu sürümden itibaren günceller
+            with self._connect() as conn:
+                conn.execute('BEGIN')
+                version = self._version('entries_version', conn)
+                index = DailyRollupIndex(self.daily_rollup(conn))
+                conn.rollback()
+            with self._rollup_index_lock:
+                self._rollup_index_cache = (version, index)
+        return index
+
+    def stock_as_of(self, day, sku=None):
+        return self.rollup_index().stock_as_of(day, sku)
+
+    def stock_balances(self):
+        """SKU bazında güncel stok miktarlarını sözlük olarak döndürür."""
+        with self._connect() as conn:
+            return dict(conn.execute('SELECT sku, stok FROM stock_balances'))
+
+    def stock_of(self, sku):
+        with self._connect() as conn:
+            row = conn.execute('SELECT stok FROM stock_balances WHERE sku = ?', (sku,)).fetchone()
+        return row[0] if row else 0
+
+    def check_stock_balances(self):
+        """Stok tablosunu hareketlerden yeniden hesaplar; düzeltilen farkları döndürür."""
+        with self._connect() as conn, conn:
+            conn.execute('BEGIN IMMEDIATE')
+            stored = dict(conn.execute('SELECT sku, stok FROM stock_balances'))
+            computed = self._computed_stock_balances(conn)
+            self._rebuild_stock_balances(conn)
+        return stock_mismatches(stored, computed)
+
+    def entry_date_bounds(self):
+        with self._connect() as conn:
+            min_date, max_date = conn.execute('SELECT MIN(tarih), MAX(tarih) FROM movements').fetchone()
+        if min_date is None:
+            return None, None
+        return datetime.date.fromisoformat(min_date), datetime.date.fromisoformat(max_date)
+
+    def _range_filter(self, start_date, end_date, sku=None):
+        where = ' WHERE tarih BETWEEN ? AND ?'
+        params = [start_date.isoformat(), end_date.isoformat()]
+        if sku is not None:
+            where += ' AND sku = ?'
+            params.append(sku)
+        return where, params
+
+    def query_entries(self, start_date, end_date, sku=None):
+        where, params = self._range_filter(start_date, end_date, sku)
+        return typed_entries(self._read_sql(self.ENTRY_SELECT + where + ' ORDER BY sira', params))
+
+    def iter_entries(self, start_date, end_date, sku=None, chunk_rows=None):
+        """query_entries ile aynı kayıtları, sonuç kümesini belleğe almadan parçalar halinde okur."""
+        where, params = self._range_filter(start_date, end_date, sku)
+        with self._connect() as conn:
+            chunks = pd.read_sql_query(self.ENTRY_SELECT + where + ' ORDER BY sira', conn, params=params, chunksize=chunk_rows or EXPORT_CHUNK_ROWS)
+            for chunk in chunks:
+                yield typed_entries(chunk)
+
+    def summarize_entries(self, start_date, end_date, sku=None):
+        return self.rollup_index().totals(start_date, end_date, sku)
+
+    def skus_in_range(self, start_date, end_date):
+        where, params = self._range_filter(start_date, end_date)
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute('SELECT DISTINCT sku FROM movements' + where, params)]
+
+    def migrate_from_csv(self, csv_storage):
+        """
+        Mevcut products.csv ve hareket defterini bir kereye mahsus veritabanına aktarır.
+        Aktarım yapıldıysa True döner; daha önce yapılmışsa hiçbir şey yapmaz.
+        """
+        if self._csv_migrated():
+            return False
+
+        products = csv_storage.load_products() if os.path.exists(PRODUCTS_FILE) else pd.DataFrame(columns=['SKU', 'Urun Adi'])
+        entries = csv_storage.read_entries() if (os.path.isdir(WAREHOUSE_LEDGER_DIR) or os.path.exists(WAREHOUSE_ENTRIES_FILE)) else pd.DataFrame()
+        with self._connect() as conn, conn:
+            # Aynı anda açılan başka bir oturum aktarımı tamamlamış olabilir; kilit alındıktan sonra yeniden kontrol et
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'csv_migrated'").fetchone():
+                return False
+            if not products.empty:
+                self._replace_products(conn, products)
+            if not entries.empty:
+                entries = entries.copy()
+                entries['Tarih'] = entries['Tarih'].dt.strftime('%Y-%m-%d')
+                self._insert_entries(conn, entries, keep_sequence=True)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('csv_migrated', ?)", (datetime.datetime.now().isoformat(),))
+        return True
+
+    def _csv_migrated(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM meta WHERE key = 'csv_migrated'").fetchone() is not None
+
+
+# --- Firestore Depolama Katmanı ---
+# Yazmalar önce yerel, kalıcı bir kuyruğa (outbox) alınır; arayüz ağ gecikmesini beklemez.
+# Arka plandaki boşaltıcı kuyruğu sırayla, en fazla 500 işlemlik toplu yazmalarla (batch)
+# Firestore'a gönderir ve hata durumunda artan bekleme süreleriyle yeniden dener.
+# Okumalar, Firestore'un süreç içi yerel kopyasına (FirestoreMirror) kuyrukta bekleyen
+# yazmaların eklenmesiyle oluşturulur; yerel kopya yalnızca değişen belgelerle güncellenir.
+# Firestore'a ulaşılamazsa (çevrimdışı) son bilinen sürümler ve yerel kopya kullanılır;
+# uygulama kuyruğa yazmaya ve kuyruktaki değişiklikleri göstermeye devam eder.
+FIRESTORE_BATCH_LIMIT = 500 # Firestore'un bir toplu yazmada izin verdiği en fazla işlem
+FIRESTORE_ROWS_PER_BATCH = (FIRESTORE_BATCH_LIMIT - 2) // 2 # Satır + stok artışı; sürüm ve işaret için 2 işlem ayrılır
+FIRESTORE_RETRY_BASE_SECONDS = 1
+FIRESTORE_RETRY_MAX_SECONDS = 300
+FIRESTORE_IDLE_POLL_SECONDS = 30 # Başka süreçlerin kuyruğa bıraktığı işlemler için yoklama aralığı
+FIRESTORE_VERSION_TTL_SECONDS = 2 # Uzak sürüm belgesinin yeniden okunma aralığı
+FIRESTORE_READ_TIMEOUT_SECONDS = 5 # Arayüzü bekleten okumalarda (sürüm belgesi) en uzun bekleme
+FIRESTORE_SYNC_TIMEOUT_SECONDS = 30 # Yerel kopyaya yalnızca değişenleri çeken eşitlemede en uzun bekleme
+FIRESTORE_FULL_SYNC_TIMEOUT_SECONDS = 300 # Koleksiyonun tamamını çeken okumalarda (ilk eşitleme, stok kontrolü) en uzun bekleme
+FIRESTORE_OFFLINE_RETRY_SECONDS = 15 # Okuma başarısız olduktan sonra Firestore'a yeniden sorulmadan geçen süre
+FIRESTORE_SYNC_OVERLAP_SECONDS = 60 # Geç görünür olan yazmaları kaçırmamak için eşitleme penceresinin geriye taşması
+
+class FirestoreOutbox:
+    """
+    Firestore'a gönderilecek yazmaları tutan kalıcı yerel kuyruk (SQLite). Uygulama veya bağlantı
+    kesilse de bekleyen yazmalar kaybolmaz; her işlem benzersiz bir jetonla tekrar denemelerde
+    iki kez uygulanmaz.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            token TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt REAL NOT NULL DEFAULT 0,
+            last_error TEXT
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, path=FIRESTORE_OUTBOX_FILE):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return contextlib.closing(conn)
+
+    def enqueue(self, kind, payload):
+        with self._connect() as conn, conn:
+            cursor = conn.execute(
+                'INSERT INTO outbox (token, kind, payload) VALUES (?, ?, ?)',
+                (uuid.uuid4().hex, kind, json.dumps(payload, ensure_ascii=False)),
+            )
+            return cursor.lastrowid
+
+    def pending(self):
+        """Bekleyen işlemleri sırayla döndürür."""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT id, token, kind, payload, attempts, next_attempt FROM outbox ORDER BY id').fetchall()
+        return [
+            {'id': op_id, 'token': token, 'kind': kind, 'payload': json.loads(payload), 'attempts': attempts, 'next_attempt': next_attempt}
+            for op_id, token, kind, payload, attempts, next_attempt in rows
+        ]
+
+    def done(self, op_ids):
+        with self._connect() as conn, conn:
+            conn.executemany('DELETE FROM outbox WHERE id = ?', [(op_id,) for op_id in op_ids])
+
+    def failed(self, op_id, error, delay):
+        with self._connect() as conn, conn:
+            conn.execute(
+                'UPDATE outbox SET attempts = attempts + 1, next_attempt = ?, last_error = ? WHERE id = ?',
+                (time.time() + delay, str(error), op_id),
+            )
+
+    def version(self, kinds=None):
+        """
+        Kuyruğa her ekleme ve kuyruktan her çıkarmada değişen anahtar. kinds verilirse yalnızca bu
+        türlerdeki işlemler hesaba katılır (kimlikler arttığından ekleme en büyük kimliği, sıradan
+        boşaltma sayıyı değiştirir).
+        """
+        with self._connect() as conn:
+            if kinds is None:
+                return conn.execute("SELECT COUNT(*), (SELECT seq FROM sqlite_sequence WHERE name = 'outbox') FROM outbox").fetchone()
+            placeholders = ', '.join('?' * len(kinds))
+            return conn.execute(f'SELECT COUNT(*), MAX(id) FROM outbox WHERE kind IN ({placeholders})', kinds).fetchone()
+
+    def status(self):
+        """Bekleyen işlem sayısı ve (varsa) son hata."""
+        with self._connect() as conn:
+            count, = conn.execute('SELECT COUNT(*) FROM outbox').fetchone()
+            error = conn.execute('SELECT last_error FROM outbox WHERE last_error IS NOT NULL ORDER BY id LIMIT 1').fetchone()
+        return {'bekleyen': count, 'son_hata': error[0] if error else None}
+
+    def get_flag(self, key):
+        with self._connect() as conn:
+            row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_flag(self, key, value):
+        with self._connect() as conn, conn:
+            conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+def firestore_document_id(value):
+    """Firestore belge kimliklerinde '/' kullanılamadığından SKU'lar kodlanarak kimlik yapılır."""
+    return urllib.parse.quote(str(value), safe='')
+
+class FirestoreMirror:
+    """
+    Bir Firestore koleksiyonunun süreç içi yerel kopyası; süreçteki tüm oturumlar paylaşır.
+    İlk eşitlemede koleksiyon bir kez okunur, sonrakilerde yalnızca son görülen güncelleme
+    zamanından bu yana değişen belgeler çekilir. Silinen kayıtlar belge silinmek yerine
+    'silindi' olarak işaretlendiğinden bunlar da değişiklik olarak görülür.
+    """
+
+    def __init__(self, collection, fields, columns):
+        self.collection = collection
+        self.fields = fields
+        self.columns = columns
+        self.frame = pd.DataFrame(columns=columns, index=pd.Index([], name='id', dtype=object))
+        self.last_seen = None # En son görülen 'guncelleme' zaman damgası
+        self.synced_version = None
+        self.read_count = 0 # Başlangıçtan bu yana okunan belge sayısı
+        self._lock = threading.Lock()
+
+    def sync(self, client, version):
+        """
+        Uzak sürüm eşitlenenden farklıysa yalnızca değişen belgeleri çeker ve uygular. Okuma süreyi
+        aşarsa hata yükselir; çağıran çevrimdışı sayar ve kopya olduğu gibi kalır.
+        """
+        with self._lock:
+            if version == self.synced_version:
+                return
+            query = client.collection(self.collection)
+            timeout = FIRESTORE_FULL_SYNC_TIMEOUT_SECONDS
+            if self.last_seen is not None:
+                query = query.where('guncelleme', '>=', self.last_seen - datetime.timedelta(seconds=FIRESTORE_SYNC_OVERLAP_SECONDS))
+                timeout = FIRESTORE_SYNC_TIMEOUT_SECONDS
+            snapshots = list(query.stream(timeout=timeout))
+            self._apply(snapshots)
+            self.read_count += len(snapshots)
+            self.synced_version = version
+
+    def _apply(self, snapshots):
+        if not snapshots:
+            return
+        changed_ids = [snapshot.id for snapshot in snapshots]
+        docs = [snapshot.to_dict() for snapshot in snapshots]
+        live = [(doc_id, doc) for doc_id, doc in zip(changed_ids, docs) if not doc.get('silindi')]
+        delta = pd.DataFrame(
+            [[doc.get(field) for field in self.fields] for _, doc in live],
+            columns=self.columns,
+            index=pd.Index([doc_id for doc_id, _ in live], name='id', dtype=object),
+        )
+        kept = self.frame[~self.frame.index.isin(changed_ids)]
+        self.frame = pd.concat([kept, delta]) if not (kept.empty or delta.empty) else (delta if kept.empty else kept)
+        stamps = [doc['guncelleme'] for doc in docs if doc.get('guncelleme') is not None]
+        if stamps:
+            self.last_seen = max(stamps + ([self.last_seen] if self.last_seen is not None else []))
+
+class FirestoreStorage(EntriesFrameQueries):
+    """
+    Ürünleri ve hareketleri Firestore'da tutan depolama katmanı.
+    Koleksiyonlar: products (kimlik: SKU), movements (kimlik: Sira), stock (kimlik: SKU),
+    meta/versions (sürüm sayaçları) ve outbox_ops (uygulanmış kuyruk işlemlerinin işaretleri).
+    products ve movements belgeleri 'guncelleme' (sunucu zamanı) ve 'silindi' alanlarını taşır.
+    client ve firestore_module (Increment, SERVER_TIMESTAMP) verilmezse ilk ağ işleminde
+    get_firestore_client() ve firebase_admin.firestore kullanılır; testlerde emülatöre bağlı
+    bir istemci veya süreç içi bir taklit verilebilir.
+    """
+
+    name = 'firestore'
+
+    def __init__(self, client=None, outbox_path=FIRESTORE_OUTBOX_FILE, firestore_module=None, start_worker=True):
+        self._client = client
+        self._firestore = firestore_module
+        self.outbox = FirestoreOutbox(outbox_path)
+        self.cache_stats = CacheStats()
+        self._versions_cache = (0, None, None) # (okunma zamanı, kuyruk sürümü, uzak sürümler)
+        self._offline_until = 0 # Bu zamana kadar (monotonic) Firestore'a okuma için yeniden sorulmaz
+        self.offline_error = None # Son başarısız okumanın hatası; okuma başarılı olunca temizlenir
+        self.movements_mirror = FirestoreMirror('movements', ['sira', 'tarih', 'sku', 'urun_adi', 'adet', 'islem_tipi'], ['Sira'] + ENTRY_COLUMNS)
+        self.products_mirror = FirestoreMirror('products', ['sku', 'urun_adi'], ['SKU', 'Urun Adi'])
+        self._entries_cache = (None, None) # (hareket sürümü, hareketler)
+        self._stock_cache = (None, None) # (hareket sürümü, bakiyeler)
+        self._rollup_index_cache = (None, None) # (hareket sürümü, DailyRollupIndex)
+        self._sequence_lock = threading.Lock()
+        self._last_sequence = 0
+        self._wakeup = threading.Event()
+        if start_worker:
+            threading.Thread(target=self._drain_loop, name='firestore-outbox', daemon=True).start()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_firestore_client()
+        return self._client
+
+    @property
+    def firestore(self):
+        if self._firestore is None:
+            from firebase_admin import firestore
+            self._firestore = firestore
+        return self._firestore
+
+    def _increment_by(self, value):
+        return self.firestore.Increment(value)
+
+    def _versions_ref(self):
+        return self.client.collection('meta').document('versions')
+
+    # --- Çevrimdışı Durum ---
+    def is_offline(self):
+        return time.monotonic() < self._offline_until
+
+    def _went_offline(self, error):
+        self.offline_error = str(error) or type(error).__name__
+        self._offline_until = time.monotonic() + FIRESTORE_OFFLINE_RETRY_SECONDS
+
+    def _sync_mirror(self, mirror, version_key):
+        """Yerel kopyayı uzak sürüme eşitler; çevrimdışıyken veya eşitleme başarısızsa kopya olduğu gibi kalır."""
+        versions = self._remote_versions()
+        if self.is_offline():
+            return
+        try:
+            mirror.sync(self.client, versions.get(version_key, 0))
+        except Exception as e:
+            self._went_offline(e)
+        else:
+            self.offline_error = None
+
+    # --- Sürümler ---
+    def _remote_versions(self):
+        """
+        Uzak sürüm sayaçları. Firestore'a ulaşılamazsa son bilinen sürümler (hiç okunamadıysa boş
+        sözlük) döner ve FIRESTORE_OFFLINE_RETRY_SECONDS boyunca yeniden denenmez.
+        """
+        # Kuyruk değiştiyse (bu veya başka bir süreç yazdı ya da boşalttı) uzak sürüm hemen yeniden okunur
+        read_at, outbox_version, versions = self._versions_cache
+        current_outbox_version = self.outbox.version()
+        stale = versions is None or outbox_version != current_outbox_version or time.monotonic() - read_at > FIRESTORE_VERSION_TTL_SECONDS
+        if stale and not self.is_offline():
+            try:
+                snapshot = self._versions_ref().get(timeout=FIRESTORE_READ_TIMEOUT_SECONDS)
+            except Exception as e:
+                self._went_offline(e)
+            else:
+                versions = snapshot.to_dict() if snapshot.exists else {}
+                self._versions_cache = (time.monotonic(), current_outbox_version, versions)
+                self.offline_error = None
+        return versions if versions is not None else {}
+
+    # Sürümler yalnızca ilgili türdeki bekleyen işlemlerle değişir; ör. bir hareket kaydı ürün
+    # listesi ve arama indeksi önbelleklerini geçersiz kılmaz. Uzak kısım, yerel kopyanın gerçekten
+    # eşitlendiği sürümdür: eşitleme başarısız olursa (ör. süre aşımı) sürüm değişmez, böylece eski
+    # kopya yeni sürümün önbelleğine yazılmaz.
+    def products_version(self):
+        self._sync_mirror(self.products_mirror, 'products_version')
+        return f"{self.products_mirror.synced_version}:{self.outbox.version(('products',))}"
+
+    def entries_version(self):
+        self._sync_mirror(self.movements_mirror, 'entries_version')
+        return f"{self.movements_mirror.synced_version}:{self.outbox.version(('append', 'delete'))}"
+
+    def _new_sequences(self, count):
+        """
+        Çevrimdışı da üretilebilen, zamana göre artan sıra numaraları: milisaniye zaman damgası
+        ve rastgele bir ek. Farklı süreçlerin aynı milisaniyede çakışma olasılığı ihmal edilebilir.
+        """
+        with self._sequence_lock:
+            start = max(self._last_sequence + 1, (time.time_ns() // 1_000_000 << 20) | random.getrandbits(16) << 4)
+            self._last_sequence = start + count - 1
+        return list(range(start, start + count))
+
+    # --- Yazma (kuyruğa alma) ---
+    def _enqueue(self, kind, payload):
+        self.outbox.enqueue(kind, payload)
+        self._wakeup.set()
+
+    def save_products(self, df):
+        self._enqueue('products', {'replace': True, 'products': df[['SKU', 'Urun Adi']].astype(str).values.tolist()})
+
+    def add_product(self, sku, name):
+        """Ürünü listeye ekler; SKU zaten varsa (kuyrukta bekleyenler dahil) False döner."""
+        if sku in self.load_products()['SKU'].astype(str).values:
+            return False
+        self._enqueue('products', {'replace': False, 'products': [[sku, name]]})
+        return True
+
+    def append_entries(self, entry_df, keep_sequence=False, meta=None):
+        entry_df = entry_df.copy()
+        if not keep_sequence:
+            entry_df['Sira'] = self._new_sequences(len(entry_df))
+        records = [
+            [int(row[0]), str(row[1])[:10], str(row[2]), row[3], int(row[4]), row[5]]
+            for row in entry_df[['Sira'] + ENTRY_COLUMNS].itertuples(index=False, name=None)
+        ]
+        payload = {'records': records}
+        if meta:
+            payload['meta'] = meta
+        self._enqueue('append', payload)
+        return [record[0] for record in records]
+
+    def delete_entries(self, sequences):
+        self._enqueue('delete', {'sequences': [int(s) for s in sequences]})
+
+    # --- Kuyruğu boşaltma ---
+    def _drain_loop(self):
+        while True:
+            try:
+                delay = self.drain()
+            except Exception:
+                delay = FIRESTORE_RETRY_BASE_SECONDS
+            self._wakeup.wait(timeout=FIRESTORE_IDLE_POLL_SECONDS if delay is None else min(delay, FIRESTORE_IDLE_POLL_SECONDS))
+            self._wakeup.clear()
+
+    def drain(self):
+        """
+        Zamanı gelmiş bekleyen işlemleri sırayla Firestore'a yazar. Aynı türden ardışık işlemler
+        ortak toplu yazmalarda gönderilir. Kuyruk boşaldıysa None, aksi halde bir sonraki denemeye
+        kadar beklenecek süreyi döndürür. Süreçler arasında aynı anda tek boşaltıcı çalışır.
+        """
+        with get_file_lock(self.outbox.path + '.lock'):
+            ops = self.outbox.pending()
+            for kind, group in itertools.groupby(ops, key=lambda op: op['kind']):
+                group = list(group)
+                due = [op for op in itertools.takewhile(lambda op: op['next_attempt'] <= time.time(), group)]
+                try:
+                    if due:
+                        self._commit_ops(due)
+                except Exception as e:
+                    return self._backoff(e, due)
+                if len(due) < len(group):
+                    # Sıra korunur: zamanı gelmemiş bir işlem, sonrakilerin de beklemesine yol açar
+                    return max(group[len(due)]['next_attempt'] - time.time(), 0)
+        return None
+
+    def _backoff(self, error, ops):
+        # Yanıtı kaybolan bir toplu yazma uygulanmış olabilir; gruptaki tüm işlemler
+        # yeniden denemede işaretleri kontrol edilecek şekilde başarısız sayılır
+        pending_ids = {op['id'] for op in self.outbox.pending()}
+        failed_ops = [op for op in ops if op['id'] in pending_ids]
+        delay = min(FIRESTORE_RETRY_BASE_SECONDS * 2 ** failed_ops[0]['attempts'], FIRESTORE_RETRY_MAX_SECONDS)
+        delay *= 1 + random.random() / 10
+        for op in failed_ops:
+            self.outbox.failed(op['id'], error, delay)
+        return delay
+
+    def _commit_ops(self, ops):
+        """
+        İşlemleri birimlere (her biri kendi işaretiyle tek bir toplu yazmaya sığan parçalar) ayırır
+        ve birimleri 500 işlemlik toplu yazmalara paketler. Bir işlemin tüm birimleri yazılınca
+        işlem kuyruktan silinir. Önceki denemede kısmen yazılmış işlemlerin yazılmış birimleri atlanır.
+        """
+        builders = {'append': self._append_units, 'delete': self._delete_units, 'products': self._products_units}
+        units = []
+        for op in ops:
+            op_units = builders[op['kind']](op['payload'])
+            if op['payload'].get('meta'):
+                # Birimler işaret dahil sınırı doldurabildiğinden ek alanlar ayrı birimde, en son yazılır
+                op_units.append([('merge', self._versions_ref(), op['payload']['meta'])])
+            # Hiçbir birim işaretiyle birlikte tek bir toplu yazmanın sınırını aşamaz
+            step = FIRESTORE_BATCH_LIMIT - 1
+            op_units = [writes[start:start + step] for writes in op_units for start in range(0, len(writes), step)]
+            units += [(op, f"{op['token']}-{number}", writes) for number, writes in enumerate(op_units)]
+        retried_markers = [marker for op, marker, _ in units if op['attempts']]
+        if retried_markers:
+            applied = self._applied_markers(retried_markers)
+            units = [unit for unit in units if unit[1] not in applied]
+        last_unit = {op['id']: index for index, (op, _, _) in enumerate(units)}
+        finished_ops = [op['id'] for op in ops if op['id'] not in last_unit]
+
+        batch, batch_size, committed = self.client.batch(), 0, 0
+        for index, (op, marker, writes) in enumerate(units):
+            if batch_size and batch_size + len(writes) + 1 > FIRESTORE_BATCH_LIMIT:
+                batch.commit()
+                committed = index
+                self.outbox.done(finished_ops + [op_id for op_id, last in last_unit.items() if last < committed])
+                batch, batch_size = self.client.batch(), 0
+            for method, ref, data in writes:
+                if method == 'set':
+                    batch.set(ref, data)
+                elif method == 'merge':
+                    batch.set(ref, data, merge=True)
+                else:
+                    batch.delete(ref)
+            batch.set(self.client.collection('outbox_ops').document(marker), {'zaman': time.time()})
+            batch_size += len(writes) + 1
+        if batch_size:
+            batch.commit()
+        self.outbox.done([op['id'] for op in ops])
+
+    def _applied_markers(self, markers):
+        refs = [self.client.collection('outbox_ops').document(marker) for marker in markers]
+        return {snapshot.id for snapshot in self.client.get_all(refs) if snapshot.exists}
+
+    def _stock_writes(self, deltas):
+        return [
+            ('merge', self.client.collection('stock').document(firestore_document_id(sku)), {'sku': str(sku), 'stok': self._increment_by(int(delta))})
+            for sku, delta in deltas.items() if delta
+        ]
+
+    def _append_units(self, payload):
+        units = []
+        records = payload['records']
+        for start in range(0, len(records), FIRESTORE_ROWS_PER_BATCH):
+            chunk = pd.DataFrame(records[start:start + FIRESTORE_ROWS_PER_BATCH], columns=['Sira'] + ENTRY_COLUMNS)
+            writes = [
+                ('set', self.client.collection('movements').document(str(sira)), {'sira': sira, 'tarih': tarih, 'sku': sku, 'urun_adi': urun_adi, 'adet': adet, 'islem_tipi': islem_tipi, 'silindi': False, 'guncelleme': self.firestore.SERVER_TIMESTAMP})
+                for sira, tarih, sku, urun_adi, adet, islem_tipi in records[start:start + FIRESTORE_ROWS_PER_BATCH]
+            ]
+            writes += self._stock_writes(stock_deltas(chunk))
+            writes.append(('merge', self._versions_ref(), {'entries_version': self._increment_by(1)}))
+            units.append(writes)
+        return units
+
+    def _delete_units(self, payload):
+        units = []
+        sequences = payload['sequences']
+        for start in range(0, len(sequences), FIRESTORE_ROWS_PER_BATCH):
+            refs = [self.client.collection('movements').document(str(sira)) for sira in sequences[start:start + FIRESTORE_ROWS_PER_BATCH]]
+            # Yalnızca hâlâ silinmemiş kayıtlar silinir ve stoktan düşülür; tekrar denemeler güvenlidir.
+            # Belgeler yerel kopyaların değişikliği görebilmesi için silinmez, 'silindi' olarak işaretlenir.
+            existing = [snapshot for snapshot in self.client.get_all(refs) if snapshot.exists and not snapshot.to_dict().get('silindi')]
+            deleted = pd.DataFrame(
+                [snapshot.to_dict() for snapshot in existing], columns=['sku', 'adet', 'islem_tipi']
+            ).rename(columns={'sku': 'SKU', 'adet': 'Adet', 'islem_tipi': 'Islem Tipi'})
+            writes = [('merge', snapshot.reference, {'silindi': True, 'guncelleme': self.firestore.SERVER_TIMESTAMP}) for snapshot in existing]
+            writes += self._stock_writes({sku: -delta for sku, delta in stock_deltas(deleted).items()})
+            writes.append(('merge', self._versions_ref(), {'entries_version': self._increment_by(1)}))
+            units.append(writes)
+        return units
+
+    def _products_units(self, payload):
+        products = payload['products']
+        writes = []
+        if payload['replace']:
+            keep = {firestore_document_id(sku) for sku, _ in products}
+            remote_versions = self._remote_versions()
+            if self.is_offline():
+                # Silinecek ürünler güncel uzak listeden bulunmalı; bağlantı gelince yeniden denenir
+                raise ConnectionError(self.offline_error)
+            self.products_mirror.sync(self.client, remote_versions.get('products_version', 0))
+            writes += [
+                ('merge', self.client.collection('products').document(doc_id), {'silindi': True, 'guncelleme': self.firestore.SERVER_TIMESTAMP})
+                for doc_id in self.products_mirror.frame.index if doc_id not in keep
+            ]
+        writes += [
+            ('set', self.client.collection('products').document(firestore_document_id(sku)), {'sku': sku, 'urun_adi': name, 'silindi': False, 'guncelleme': self.firestore.SERVER_TIMESTAMP})
+            for sku, name in products
+        ]
+        step = FIRESTORE_BATCH_LIMIT - 2
+        units = [writes[start:start + step] for start in range(0, len(writes), step)] or [[]]
+        for unit in units:
+            unit.append(('merge', self._versions_ref(), {'products_version': self._increment_by(1)}))
+        return units
+
+    # --- Okuma ---
+    def _remote_products(self):
+        self._sync_mirror(self.products_mirror, 'products_version')
+        return self.products_mirror.frame.reset_index(drop=True)
+
+    def load_products(self):
+        """Firestore'daki ürünler ve kuyrukta bekleyen ürün değişiklikleri."""
+        products = self._remote_products()
+        for op in self.outbox.pending():
+            if op['kind'] != 'products':
+                continue
+            new_products = pd.DataFrame(op['payload']['products'], columns=['SKU', 'Urun Adi'])
+            if op['payload']['replace']:
+                products = new_products
+            else:
+                products = pd.concat([products[~products['SKU'].isin(new_products['SKU'])], new_products], ignore_index=True)
+        return products.reset_index(drop=True)
+
+    def _remote_entries(self):
+        self._sync_mirror(self.movements_mirror, 'entries_version')
+        return self.movements_mirror.frame.reset_index(drop=True)
+
+    def _pending_changes(self):
+        """Kuyrukta bekleyen eklenecek satırlar ve silinecek sıra numaraları."""
+        appended, deleted = [], set()
+        for op in self.outbox.pending():
+            if op['kind'] == 'append':
+                appended += op['payload']['records']
+            elif op['kind'] == 'delete':
+                deleted.update(op['payload']['sequences'])
+        return pd.DataFrame(appended, columns=['Sira'] + ENTRY_COLUMNS), deleted
+
+    def _cached_entries(self):
+        version = self.entries_version()
+        cached_version, entries = self._entries_cache
+        self.cache_stats.record('firestore_hareketleri', cached_version == version)
+        if cached_version != version:
+            remote = self._remote_entries()
+            appended, deleted = self._pending_changes()
+            frames = [frame for frame in (remote, appended[~appended['Sira'].isin(remote['Sira'])]) if not frame.empty]
+            entries = pd.concat(frames, ignore_index=True) if frames else remote
+            entries = entries[~entries['Sira'].isin(deleted)].sort_values('Sira')
+            entries = typed_entries(entries.reset_index(drop=True))
+            self._entries_cache = (version, entries)
+        return entries
+
+    def stock_balances(self):
+        """SKU bazında güncel stok; yerel kopyadaki ve kuyrukta bekleyen hareketlerden hesaplanır."""
+        version = self.entries_version()
+        cached_version, balances = self._stock_cache
+        if cached_version != version:
+            balances = stock_deltas(self._cached_entries())
+            self._stock_cache = (version, balances)
+        return dict(balances)
+
+    def stock_of(self, sku):
+        return self.stock_balances().get(sku, 0)
+
+    def check_stock_balances(self):
+        """Firestore'daki stok bakiyelerini hareketlerden yeniden hesaplar; düzeltilen farkları döndürür."""
+        # Uzak sürüm bir sonraki okumada yeniden sorulur; son bilinen sürümler çevrimdışı kullanım için kalır
+        self._versions_cache = (0, None, self._versions_cache[2])
+        self._offline_until = 0
+        stored = {doc.get('sku'): int(doc.get('stok', 0)) for doc in (snapshot.to_dict() for snapshot in self.client.collection('stock').stream(timeout=FIRESTORE_FULL_SYNC_TIMEOUT_SECONDS))}
+        computed = stock_deltas(self._remote_entries())
+        mismatches = stock_mismatches(stored, computed)
+        rows = list(mismatches[['SKU', 'Hesaplanan Stok']].itertuples(index=False, name=None))
+        for start in range(0, len(rows), FIRESTORE_BATCH_LIMIT - 1):
+            batch = self.client.batch()
+            for sku, stok in rows[start:start + FIRESTORE_BATCH_LIMIT - 1]:
+                batch.set(self.client.collection('stock').document(firestore_document_id(sku)), {'sku': sku, 'stok': int(stok)})
+            batch.set(self._versions_ref(), {'entries_version': self._increment_by(1)}, merge=True)
+            batch.commit()
+        return mismatches
+
+    def daily_rollup(self):
+        return rollup_deltas(self._cached_entries())
+
+    def rollup_index(self):
+        version = self.entries_version()
+        cached_version, index = self._rollup_index_cache
+        self.cache_stats.record('ozet_indeksi', cached_version == version)
+        if cached_version != version:
+            index = DailyRollupIndex(self.daily_rollup())
+            self._rollup_index_cache = (version, index)
+        return index
+
+    def migrate_from_csv(self, csv_storage):
+        """
+        Mevcut products.csv ve hareket defterini bir kereye mahsus Firestore'a aktarılmak üzere
+        kuyruğa alır. Sıra numaraları korunur. Aktarım kuyruğa alındıysa True döner.
+        """
+        if self.outbox.get_flag('csv_migrated'):
+            return False
+        remote_versions = self._remote_versions()
+        if self._versions_cache[2] is None:
+            # Firestore'a hiç ulaşılamadı: aktarımın yapılıp yapılmadığı bilinmeden kuyruğa alınmaz,
+            # bir sonraki açılışta yeniden denenir
+            return False
+        if remote_versions.get('csv_migrated'):
+            return False
+        products = csv_storage.load_products() if os.path.exists(PRODUCTS_FILE) else pd.DataFrame(columns=['SKU', 'Urun Adi'])
+        entries = csv_storage.read_entries() if (os.path.isdir(WAREHOUSE_LEDGER_DIR) or os.path.exists(WAREHOUSE_ENTRIES_FILE)) else pd.DataFrame()
+        migrated_at = datetime.datetime.now().isoformat()
+        if not products.empty:
+            self.save_products(products)
+        if not entries.empty:
+            entries = entries.copy()
+            entries['Tarih'] = entries['Tarih'].dt.strftime('%Y-%m-%d')
+            self.append_entries(entries, keep_sequence=True, meta={'csv_migrated': migrated_at})
+        self.outbox.set_flag('csv_migrated', migrated_at)
+        return True
+
+@st.cache_resource
+def get_storage():
+    """Yapılandırılmış depolama katmanını süreç başına bir kez oluşturur."""
+    if STORAGE_BACKEND == 'sqlite':
+        return SqliteStorage(SQLITE_DB_FILE)
+    if STORAGE_BACKEND == 'firestore':
+        return FirestoreStorage()
+    return CsvStorage()
+
+# --- Yazma Koordinatörü ---
+WRITE_MAX_BATCH = 500 # Bir toplu yazmada (group commit) işlenecek en fazla istek
+WRITE_LINGER_SECONDS = 0.005 # İlk istekten sonra diğer oturumların isteklerini bekleme süresi
+WRITE_TIMEOUT_SECONDS = 60
+
+class WriteCoordinator:
+    """
+    Süreçteki tüm oturumların yazma isteklerini tek bir yazıcı iş parçacığında sıraya koyar.
+    Kuyrukta birikmiş ardışık eklemeler tek bir toplu yazma (group commit) ile, ardışık
+    silmeler ise tek bir silme işlemiyle depolama katmanına işlenir. Süreçler arası
+    eşzamanlılık depolama katmanının kendi kilidiyle (dosya kilidi / SQLite) sağlanır.
+    """
 
-    try:
-        # Kimlik bilgilerini kullanarak Firebase'i başlat
-        # credentials.Certificate doğrudan bir dosya yolu yerine,
-        # dictionary formatındaki kimlik bilgilerini de kabul eder.
-        cred = credentials.Certificate(firebase_config)
-        
-        # Eğer uygulama daha önce başlatılmamışsa başlat
-        if not firebase_admin._apps:
-            firebase_admin.initialize_app(cred)
-            st.success("Firebase başarıyla başlatıldı!")
+    def __init__(self, storage, max_batch=WRITE_MAX_BATCH, linger_seconds=WRITE_LINGER_SECONDS):
+        self.storage = storage
+        self.max_batch = max_batch
+        self.linger_seconds = linger_seconds
+        self.request_count = 0
+        self.commit_count = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='depo-yazici', daemon=True)
+        self._thread.start()
+
+    def submit(self, operation, payload):
+        """Bir yazma isteğini kuyruğa ekler ve sonucunu taşıyan Future nesnesini döndürür."""
+        future = Future()
+        self._queue.put((operation, payload, future))
+        return future
+
+    def append(self, entry_df, timeout=WRITE_TIMEOUT_SECONDS):
+        return self.submit('append', entry_df).result(timeout)
+
+    def delete(self, sequences, timeout=WRITE_TIMEOUT_SECONDS):
+        return self.submit('delete', list(sequences)).result(timeout)
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.linger_seconds
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            # İsteklerin sırası korunur; yalnızca ardışık aynı türdeki istekler birleştirilir
+            for operation, group in itertools.groupby(batch, key=lambda request: request[0]):
+                self._commit(operation, list(group))
+
+    def _apply(self, operation, payloads):
+        if operation == 'append':
+            self.storage.append_entries(pd.concat(payloads, ignore_index=True))
         else:
-            st.warning("Firebase zaten başlatılmıştı, tekrar başlatılmadı.")
-        
-        return firestore.client() # Firestore istemcisini döndür
-    except Exception as e:
-        st.error(f"Firebase başlatılırken hata oluştu: {e}")
-        st.info("Lütfen Streamlit Cloud'daki Secrets ayarlarınızı ve `urun.py` dosyanızı kontrol edin. Özellikle `private_key` formatını ve secrets.toml'daki `[firebase]` başlığını kontrol edin.")
-        return None
+            self.storage.delete_entries(sorted({sequence for payload in payloads for sequence in payload}))
+        self.commit_count += 1
 
-# Uygulama başladı, Firebase bağlantısını kurmaya çalış
-db = initialize_firebase()
+    def _commit(self, operation, requests):
+        self.request_count += len(requests)
+        try:
+            self._apply(operation, [payload for _, payload, _ in requests])
+        except Exception as e:
+            if len(requests) == 1:
+                requests[0][2].set_exception(e)
+                return
+            # Toplu yazma başarısızsa hatalı isteği ayırmak için istekler tek tek denenir
+            for request in requests:
+                self._commit(operation, [request])
+            self.request_count -= len(requests)
+            return
+        for _, _, future in requests:
+            future.set_result(True)
 
-if db:
-    st.write("Veritabanı bağlantısı başarılı. Ürünleri listeleyebilir veya Firebase Firestore işlemlerini entegre edebilirsiniz.")
-    # BURADA GEREKİRSE Firebase Firestore ile ilgili işlemlerinizi yapabilirsiniz.
-    # Örneğin, eğer ürünleri ve depo giriş/çıkışlarını Firestore'da tutmak isterseniz,
-    # aşağıdaki load_products ve load_warehouse_entries fonksiyonlarını Firebase'den okuyacak
-    # şekilde değiştirebilirsiniz. Şimdilik mevcut CSV tabanlı mantık devam edecektir.
-    pass
-else:
-    st.error("Veritabanı bağlantısı kurulamadı. Lütfen Firebase secret'larını ve kodunuzu kontrol edin.")
+@st.cache_resource
+def get_write_coordinator():
+    """Süreç başına tek yazma koordinatörü; tüm oturumlar aynı kuyruğu kullanır."""
+    return WriteCoordinator(get_storage())
 
+# --- Performans Ölçümü ---
+# Her yeniden çalıştırma (tam sayfa veya tek bölüm) bir ölçüm kaydı oluşturur. Veri katmanı
+# çağrıları ve arayüz bölümleri perf_span ile iç içe aralıklar olarak ölçülür; aralıklara satır
+# sayısı ve önbellek isabeti gibi bilgiler eklenebilir. Kayıt, çalıştırma bitince oturumun son
+# ölçümlerine eklenir; PERF_LOG_FILE verilmişse oraya tek satır JSON olarak da yazılır. Bir çalıştırmanın
+# dışında (ör. yazıcı iş parçacığı, benchmark.py) perf_span hiçbir şey yapmaz.
+PERF_RECENT_RUNS = 20 # Tanılama panelinde tutulan son çalıştırma sayısı
+PERF_LOG_MAX_BYTES = 10 * 1024 * 1024 # Bu boyutu aşan günlük .1 uzantısıyla yedeklenip yeniden başlatılır
 
-# --- Veri Dosyaları Yolları ---
-PRODUCTS_FILE = 'products.csv'
-WAREHOUSE_ENTRIES_FILE = 'warehouse_entries.csv'
+_perf_local = threading.local()
+_perf_log_lock = threading.Lock()
 
-# --- Ürün Listesini Yükle ---
-@st.cache_data(ttl=3600) # Ürünler genellikle sık değişmez, 1 saat önbellekte kalabilir
-def load_products():
+@contextlib.contextmanager
+def perf_span(name, **meta):
     """
-    products.csv dosyasını yükler. 
-    Dosya yoksa boş bir DataFrame oluşturur ve başlıkları belirler.
-    Kodlama ve ayraç hatalarını ele almak için çeşitli denemeler yapar.
-    NOT: Ayraç olarak noktalı virgül (;) kullanıldığını varsayar.
+    Bir kod bloğunun süresini etkin çalıştırma kaydına ekler. Dönen sözlüğe blok içinde
+    eklenen anahtarlar (ör. 'satir') aralıkla birlikte saklanır.
     """
-    if os.path.exists(PRODUCTS_FILE):
-        df = pd.DataFrame() 
-        
-        encodings = ['utf-8', 'windows-1254', 'latin-1']
-        separator = ';' 
+    trace = getattr(_perf_local, 'trace', None)
+    span = {'ad': name, **meta}
+    if trace is None:
+        yield span
+        return
+    span['derinlik'] = len(trace['acik'])
+    trace['acik'].append(span)
+    trace['araliklar'].append(span)
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        span['sure_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        trace['acik'].pop()
 
-        loaded_successfully = False
-        
-        for enc in encodings:
-            try:
-                df = pd.read_csv(PRODUCTS_FILE, encoding=enc, sep=separator)
-                # Sütun isimlerini normalize et ve kontrol et
-                original_columns = list(df.columns)
-                normalized_columns = [col.strip().lower() for col in original_columns]
-
-                sku_col_name = None
-                urun_adi_col_name = None
-
-                sku_variations = ['sku', 'urun kodu', 'ürün kodu']
-                urun_adi_variations = ['urun adi', 'ürün adı', 'urunismi', 'ürün ismi', 'product name']
-
-                for i, norm_col in enumerate(normalized_columns):
-                    if sku_col_name is None and norm_col in sku_variations:
-                        sku_col_name = original_columns[i]
-                    if urun_adi_col_name is None and norm_col in urun_adi_variations:
-                        urun_adi_col_name = original_columns[i]
-                    
-                    if sku_col_name and urun_adi_col_name:
-                        break
+def perf_mark(key, value):
+    """
+    En içteki açık aralığa bilgi ekler. Önbelleğe alınmış fonksiyonların içinden çağrılarak
+    çağıran aralığa önbellek ıskası işlenir; fonksiyon önbellekten yanıtlanırsa çağrılmaz.
+    """
+    trace = getattr(_perf_local, 'trace', None)
+    if trace is not None and trace['acik']:
+        trace['acik'][-1][key] = value
 
-                if not sku_col_name or not urun_adi_col_name:
-                    st.sidebar.error(f"'{PRODUCTS_FILE}' dosyasında 'SKU' ve 'Urun Adi' (veya benzeri) sütunları bulunamadı. Tespit edilen sütunlar: {original_columns}.")
-                    return pd.DataFrame(columns=['SKU', 'Urun Adi']) 
+def perf_section(fn):
+    """
+    Sayfa bölümlerini ölçen dekoratör. Etkin bir çalıştırma yoksa (bölüm tek başına yeniden
+    çalışıyorsa) bölüm adıyla yeni bir çalıştırma kaydı başlatır.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if getattr(_perf_local, 'trace', None) is not None:
+            with perf_span(fn.__name__):
+                return fn(*args, **kwargs)
+        trace = {'calistirma': fn.__name__, 'acik': [], 'araliklar': []}
+        _perf_local.trace = trace
+        start = time.perf_counter()
+        try:
+            # st.rerun / st.stop istisnaları da ölçümü kapatır
+            with perf_span(fn.__name__):
+                return fn(*args, **kwargs)
+        finally:
+            _perf_local.trace = None
+            trace['toplam_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            _finish_perf_trace(trace)
+    return wrapper
 
-                df = df[[sku_col_name, urun_adi_col_name]] 
-                df.columns = ['SKU', 'Urun Adi'] 
-                
-                st.sidebar.success(f"'{PRODUCTS_FILE}' dosyası '{enc}' kodlaması ve '{separator}' ayraçla yüklendi.")
-                loaded_successfully = True
-                break 
-            except UnicodeDecodeError:
-                continue 
-            except pd.errors.ParserError as e:
-                st.sidebar.warning(f"'{PRODUCTS_FILE}' dosyası '{enc}' kodlaması ve '{separator}' ayraçla ayrıştırılamadı. Hata: {e}")
-                continue 
-            except Exception as e:
-                st.sidebar.error(f"'{PRODUCTS_FILE}' dosyası okunurken beklenmedik bir hata oluştu: {e}.")
-                return pd.DataFrame(columns=['SKU', 'Urun Adi'])
+def _finish_perf_trace(trace):
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    storage = get_storage()
+    record = {
+        'zaman': datetime.datetime.now().isoformat(timespec='milliseconds'),
+        'oturum': ctx.session_id if ctx is not None else None,
+        'katman': storage.name,
+        'calistirma': trace['calistirma'],
+        'toplam_ms': trace['toplam_ms'],
+        'araliklar': trace['araliklar'],
+        'onbellek': storage.cache_stats.snapshot(),
+    }
+    try:
+        recent_runs = st.session_state.setdefault('perf_recent_runs', collections.deque(maxlen=PERF_RECENT_RUNS))
+        recent_runs.append(record)
+    except Exception:
+        pass # Oturum durumu olmadan (ör. testlerde) yalnızca günlüğe yazılır
+    write_perf_log(record)
 
-        if not loaded_successfully:
-            st.error(f"'{PRODUCTS_FILE}' dosyası hiçbir bilinen kodlama veya ayraçla okunamadı. Lütfen dosyanın formatını kontrol edin.")
-            return pd.DataFrame(columns=['SKU', 'Urun Adi'])
-        
-        # Eğer dosya yüklendi ama boşsa (sadece başlıklar varsa), boş bir DataFrame döndür
-        if df.empty:
-            st.warning(f"'{PRODUCTS_FILE}' dosyası boş görünüyor. Lütfen ürün bilgisi girin.")
-            return pd.DataFrame(columns=['SKU', 'Urun Adi'])
+def write_perf_log(record, path=None):
+    """Ölçüm kaydını JSON-lines günlüğüne tek satır olarak ekler. Günlük hatası uygulamayı durdurmaz."""
+    path = PERF_LOG_FILE if path is None else path
+    if not path:
+        return
+    line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+    try:
+        with _perf_log_lock:
+            if os.path.exists(path) and os.path.getsize(path) >= PERF_LOG_MAX_BYTES:
+                os.replace(path, path + '.1')
+            # Satır tek bir yazma çağrısıyla eklenir; diğer süreçlerin satırlarıyla karışmaz
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line)
+    except OSError:
+        pass
 
-        return df
-    else:
-        # Dosya yoksa, boş bir DataFrame oluştur ve kullanıcıya bilgi ver
-        st.info(f"'{PRODUCTS_FILE}' dosyası bulunamadı. Yeni ürünler ekleyerek başlayabilirsiniz.")
+def perf_run_summary(record):
+    """Bir ölçüm kaydının aralıklarını tanılama panelinde gösterilecek tabloya çevirir."""
+    rows = []
+    for span in record['araliklar']:
+        meta = {key: value for key, value in span.items() if key not in ('ad', 'derinlik', 'sure_ms')}
+        rows.append({
+            'Aralık': '\u2003' * span['derinlik'] + span['ad'],
+            'Süre (ms)': span.get('sure_ms'),
+            'Bilgi': ', '.join(f"{key}={value}" for key, value in meta.items()),
+        })
+    return pd.DataFrame(rows, columns=['Aralık', 'Süre (ms)', 'Bilgi'])
+
+# --- Ürünleri ve Depo Giriş/Çıkışlarını Yükle ve Kaydet ---
+# Önbellekler süreye göre değil, depolama katmanının veri sürümüne göre anahtarlanır.
+# Veri değişmedikçe yeniden okunmaz; herhangi bir oturumdaki yazma sürümü değiştirdiği için
+# bir sonraki çalıştırmada tüm oturumlar güncel veriyi görür.
+@st.cache_data(max_entries=2, show_spinner=False)
+def _load_products_version(backend, products_version):
+    get_storage().cache_stats.miss('urun_listesi')
+    perf_mark('onbellek', 'iska')
+    return get_storage().load_products()
+
+def load_products():
+    """Ürün listesini yapılandırılmış depolama katmanından yükler."""
+    try:
+        storage = get_storage()
+        with perf_span('load_products', onbellek='isabet') as span:
+            storage.cache_stats.lookup('urun_listesi')
+            products = _load_products_version(storage.name, storage.products_version())
+            span['satir'] = len(products)
+        return products
+    except Exception as e:
+        st.error(f"Ürün listesi yüklenirken beklenmedik bir hata oluştu: {e}.")
         return pd.DataFrame(columns=['SKU', 'Urun Adi'])
 
 def save_products(df):
-    """Ürün DataFrame'ini CSV dosyasına kaydeder."""
+    """Ürün DataFrame'ini depolama katmanına kaydeder."""
     try:
-        # Boş DataFrame kaydetmemek için kontrol (dosyayı boşaltmayı engeller)
-        if df.empty and os.path.exists(PRODUCTS_FILE):
-            st.warning("Kaydedilecek ürün bulunamadı. Mevcut ürün dosyası boşaltılmadı.")
+        # Boş DataFrame kaydetmemek için kontrol (mevcut ürün listesini boşaltmayı engeller)
+        if df.empty:
+            st.warning("Kaydedilecek ürün bulunamadı. Mevcut ürün listesi boşaltılmadı.")
             return False # Kaydetme işlemi yapılmadı
         
-        df.to_csv(PRODUCTS_FILE, index=False, encoding='utf-8', header=True)
+        get_storage().save_products(df)
         return True
     except Exception as e:
         st.error(f"Ürünler kaydedilirken bir hata oluştu: {e}")
         return False
 
-# --- Depo Giriş/Çıkışlarını Yükle ve Kaydet ---
-@st.cache_data(ttl=1) 
+def add_product(sku, name):
+    """
+    Yeni ürünü depolama katmanına ekler. Eklendiyse True, SKU zaten varsa False,
+    hata olursa None döner.
+    """
+    try:
+        return get_storage().add_product(sku, name)
+    except Exception as e:
+        st.error(f"Yeni ürün kaydedilirken bir hata oluştu: {e}")
+        return None
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def _load_entries_version(backend, entries_version, products_version):
+    get_storage().cache_stats.miss('depo_hareketleri')
+    perf_mark('onbellek', 'iska')
+    # Ürün adları katalogdan çözüldüğü için anahtar ürün listesi sürümünü de içerir
+    return resolve_product_names(get_storage().read_entries(), _load_products_version(backend, products_version))
+
 def load_warehouse_entries():
     """
-    warehouse_entries.csv dosyasını yükler. 
-    Dosya yoksa veya boşsa boş bir DataFrame oluşturur ve başlıkları belirler.
+    Depo hareketlerini depolama katmanından yükler (silinmiş kayıtlar hariç).
+    Dönen DataFrame typed_entries şemasındadır ve silme işlemlerinde kullanılan 'Sira' sütununu da içerir.
     """
-    if os.path.exists(WAREHOUSE_ENTRIES_FILE):
-        try:
-            df = pd.read_csv(WAREHOUSE_ENTRIES_FILE, encoding='utf-8')
-            if 'Tarih' in df.columns:
-                df['Tarih'] = pd.to_datetime(df['Tarih']).dt.date
-            # Yeni sütun 'Islem Tipi' yoksa ekle ve varsayılan değer ata (eski kayıtlar için 'Giriş')
-            if 'Islem Tipi' not in df.columns:
-                df['Islem Tipi'] = 'Giriş'
-            return df
-        except UnicodeDecodeError:
-            try:
-                df = pd.read_csv(WAREHOUSE_ENTRIES_FILE, encoding='windows-1254')
-                st.sidebar.warning(f"'{WAREHOUSE_ENTRIES_FILE}' dosyası UTF-8 olarak okunamadı, 'windows-1254' ile yüklendi.")
-                if 'Tarih' in df.columns:
-                    df['Tarih'] = pd.to_datetime(df['Tarih']).dt.date
-                if 'Islem Tipi' not in df.columns:
-                    df['Islem Tipi'] = 'Giriş'
-                return df
-            except pd.errors.EmptyDataError:
-                st.warning(f"'{WAREHOUSE_ENTRIES_FILE}' dosyası boş. Yeni girişler beklenecek.")
-                # Boş dosya durumunda bile doğru sütunları içeren bir DataFrame döndür
-                return pd.DataFrame(columns=['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi'])
-            except Exception as e:
-                st.error(f"'{WAREHOUSE_ENTRIES_FILE}' dosyası okunurken beklenmedik bir hata oluştu (windows-1254): {e}.")
-                return pd.DataFrame(columns=['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi'])
-        except pd.errors.EmptyDataError:
-            st.warning(f"'{WAREHOUSE_ENTRIES_FILE}' dosyası boş. Yeni girişler beklenecek.")
-            # Boş dosya durumunda bile doğru sütunları içeren bir DataFrame döndür
-            return pd.DataFrame(columns=['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi'])
-        except Exception as e:
-            st.error(f"'{WAREHOUSE_ENTRIES_FILE}' dosyası okunurken beklenmedik bir hata oluştu: {e}.")
-            return pd.DataFrame(columns=['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi'])
-    else:
-        # Dosya yoksa, yeni bir DataFrame oluştururken 'Islem Tipi' sütununu da ekle
-        st.info(f"'{WAREHOUSE_ENTRIES_FILE}' dosyası bulunamadı. İlk girişinizi yaparak oluşturabilirsiniz.")
-        return pd.DataFrame(columns=['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi'])
+    try:
+        storage = get_storage()
+        with perf_span('load_warehouse_entries', onbellek='isabet') as span:
+            storage.cache_stats.lookup('depo_hareketleri')
+            df = _load_entries_version(storage.name, storage.entries_version(), storage.products_version())
+            span['satir'] = len(df)
+    except Exception as e:
+        st.error(f"Depo hareketleri okunurken beklenmedik bir hata oluştu: {e}.")
+        return typed_entries(pd.DataFrame(columns=['Sira'] + ENTRY_COLUMNS))
+
+    if df.empty:
+        st.info("Henüz kayıtlı depo hareketi yok. İlk girişinizi yaparak oluşturabilirsiniz.")
+    return df
 
 def save_warehouse_entry(entry_df):
-    """Depo giriş/çıkış DataFrame'ini CSV dosyasına kaydeder."""
+    """
+    Yeni depo giriş/çıkış kayıtlarını depolama katmanına ekler. Yalnızca verilen satırlar
+    yazılır, mevcut geçmiş yeniden yazılmaz.
+    """
     try:
-        # Tarih sütununu string olarak kaydetmek için ISO formatına çevir
-        if 'Tarih' in entry_df.columns:
-            entry_df['Tarih'] = entry_df['Tarih'].apply(lambda x: x.isoformat() if isinstance(x, (datetime.date, datetime.datetime)) else x)
-
-        # Eğer DataFrame boşsa ve dosya zaten varsa, dosyayı silmeyelim
-        if entry_df.empty and os.path.exists(WAREHOUSE_ENTRIES_FILE):
-            st.warning("Kaydedilecek depo işlemi bulunamadı. Mevcut depo dosyası boşaltılmadı.")
+        if entry_df.empty:
+            st.warning("Kaydedilecek depo işlemi bulunamadı.")
             return False
-        
-        entry_df.to_csv(WAREHOUSE_ENTRIES_FILE, index=False, encoding='utf-8', header=True)
+
+        entry_df = entry_df[ENTRY_COLUMNS].copy()
+        # Tarih sütunu, defterde ve veritabanında saklanan ISO gün biçimine (YYYY-MM-DD) çevrilir
+        entry_df['Tarih'] = pd.to_datetime(entry_df['Tarih']).dt.strftime('%Y-%m-%d')
+        # Yazma, diğer oturumların istekleriyle birlikte tek yazıcı üzerinden yapılır
+        with perf_span('save_warehouse_entry', satir=len(entry_df)):
+            get_write_coordinator().append(entry_df)
         return True 
     except Exception as e:
         st.error(f"Depo girişi/çıkışı kaydedilirken bir hata oluştu: {e}")
         return False 
 
-# --- Uygulama Başlığı ---
-st.set_page_config(layout="centered", page_title="Depo Giriş/Çıkış Kayıt Sistemi")
-st.title("📦 Depo Giriş/Çıkış Kayıt Sistemi")
-st.markdown("Gün içinde depoya alınan ve depodan çıkan ürünleri buraya kaydedin.")
+def delete_warehouse_entries(sequences):
+    """
+    Verilen kayıt numaralarına (Sira) sahip depo kayıtlarını tek işlemde siler.
+    Kayıt numaraları eklemede bir kez atanır, sıkıştırma ve aktarım sonrasında da değişmez.
+    """
+    try:
+        sequences = list(sequences)
+        if not sequences:
+            return False
+        with perf_span('delete_warehouse_entries', kayit=len(sequences)):
+            get_write_coordinator().delete(sequences)
+        return True
+    except Exception as e:
+        st.error(f"Depo kaydı silinirken bir hata oluştu: {e}")
+        return False
+
+# --- Dışa Aktarma ---
+# Dışa aktarma dosyası yalnızca indirme düğmesine basıldığında oluşturulur. Hareketler
+# depolama katmanından parçalar halinde okunur ve diskteki geçici bir dosyaya yazılır;
+# filtrelenmiş tüm kayıtlar hiçbir aşamada tek bir DataFrame veya metin olarak bellekte tutulmaz.
+EXPORT_CHUNK_ROWS = 50000
+EXCEL_MAX_ROWS_PER_SHEET = 1048575 # Başlık satırı hariç Excel sayfa sınırı
 
-# --- Session State Başlatma ---
-if 'products_df' not in st.session_state:
-    st.session_state['products_df'] = load_products()
+def _export_chunks(storage, products_df, start_date, end_date, sku=None):
+    """Dışa aktarılacak hareketleri, ürün adları çözülmüş ve düz metin sütunlu parçalar halinde döndürür."""
+    for chunk in storage.iter_entries(start_date, end_date, sku=sku):
+        chunk = resolve_product_names(chunk, products_df)[ENTRY_COLUMNS]
+        # Kategorik sütunlar parçadan parçaya farklı kategoriler taşıyabildiğinden düz metne çevrilir
+        yield chunk.astype({'SKU': str, 'Urun Adi': str, 'Islem Tipi': str})
 
-# warehouse_entries_df için başlangıçta kontrol ve yükleme
-if 'warehouse_entries_df' not in st.session_state or st.session_state['warehouse_entries_df'] is None:
-     st.session_state['warehouse_entries_df'] = load_warehouse_entries()
+def _write_csv_gzip(chunks, f):
+    with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=6) as gz, io.TextIOWrapper(gz, encoding='utf-8', newline='') as text:
+        header = True
+        for chunk in chunks:
+            chunk.to_csv(text, index=False, header=header, date_format='%Y-%m-%d')
+            header = False
+        if header: # Hiç kayıt yoksa yalnızca başlık yazılır
+            pd.DataFrame(columns=ENTRY_COLUMNS).to_csv(text, index=False)
 
-products_df = st.session_state['products_df']
-warehouse_entries_df = st.session_state['warehouse_entries_df']
+def _write_parquet(chunks, f):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([
+        ('Tarih', pa.date32()),
+        ('SKU', pa.string()),
+        ('Urun Adi', pa.string()),
+        ('Adet', pa.int32()),
+        ('Islem Tipi', pa.string()),
+    ])
+    with pq.ParquetWriter(f, schema, compression='zstd') as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
 
+def _write_excel(chunks, f):
+    import openpyxl
+    # Yalnızca yazma kipinde satırlar sayfaya eklendikçe diske aktarılır
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet, sheet_rows = None, EXCEL_MAX_ROWS_PER_SHEET
+    for chunk in chunks:
+        chunk = chunk.assign(Tarih=chunk['Tarih'].dt.date)
+        for row in chunk.itertuples(index=False, name=None):
+            # Excel sayfa sınırı aşıldığında kayıtlar yeni bir sayfada devam eder
+            if sheet_rows >= EXCEL_MAX_ROWS_PER_SHEET:
+                sheet = workbook.create_sheet(f"Depo İşlemleri {len(workbook.worksheets) + 1}")
+                sheet.append(ENTRY_COLUMNS)
+                sheet_rows = 0
+            sheet.append(row)
+            sheet_rows += 1
+    if sheet is None:
+        workbook.create_sheet("Depo İşlemleri 1").append(ENTRY_COLUMNS)
+    workbook.save(f)
 
-# --- Yeni Ürün Ekleme Bölümü ---
-st.markdown("---")
-st.subheader("➕ Yeni Ürün Ekle")
-new_product_sku = st.text_input("Yeni Ürün SKU'su", key="new_sku_input").strip()
-new_product_name = st.text_input("Yeni Ürün Adı", key="new_product_name_input").strip()
-
-if st.button("Yeni Ürünü Kaydet"):
-    if new_product_sku and new_product_name:
-        # SKU'nun benzersizliğini kontrol et
-        if not products_df.empty and new_product_sku in products_df['SKU'].values:
-            st.warning(f"SKU '{new_product_sku}' zaten mevcut. Lütfen farklı bir SKU girin.")
+# Biçim adı: (dosya uzantısı, MIME türü, yazıcı, gerekli paket)
+EXPORT_FORMATS = {
+    'CSV (gzip)': ('csv.gz', 'application/gzip', _write_csv_gzip, None),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet', _write_parquet, 'pyarrow'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', _write_excel, 'openpyxl'),
+}
+
+def export_format_available(export_format):
+    """Biçimin gerektirdiği isteğe bağlı paket kuruluysa True döner."""
+    required_module = EXPORT_FORMATS[export_format][3]
+    return required_module is None or importlib.util.find_spec(required_module) is not None
+
+def export_entries(storage, products_df, export_format, start_date, end_date, sku=None):
+    """
+    Filtrelenmiş hareketleri seçilen biçimde diskteki geçici bir dosyaya yazar ve dosyayı okumak
+    için açık bir dosya nesnesi döndürür; st.download_button içeriği doğrudan dosyadan okur.
+    Geçici dosyanın adı yoktur, döndürülen nesne bırakıldığında kapanır ve diskten silinir.
+    """
+    writer = EXPORT_FORMATS[export_format][2]
+    with tempfile.TemporaryFile() as f:
+        writer(_export_chunks(storage, products_df, start_date, end_date, sku), f)
+        f.flush()
+        # st.download_button dosya nesnelerinden yalnızca okuma için açılmış olanları kabul eder
+        return open(os.dup(f.fileno()), 'rb')
+
+def export_file_name(export_format, start_date, end_date, sku=None):
+    extension = EXPORT_FORMATS[export_format][0]
+    sku_part = f"_{sku}" if sku is not None else ''
+    return f"depo_islemleri_{start_date.isoformat()}_{end_date.isoformat()}{sku_part}.{extension}"
+
+# --- Toplu Hareket İçe Aktarma ---
+# İrsaliyedeki satırlar CSV veya Excel dosyasından parçalar halinde okunur. Her parça vektörel
+# olarak doğrulanır; SKU'lar satır satır aranmak yerine katalogdan kurulan hash indeksiyle eşlenir.
+# Geçerli satırların tamamı tek bir yazma isteğiyle kaydedilir, hatalı satırlar raporlanır.
+IMPORT_CHUNK_ROWS = 50000
+IMPORT_ERROR_DISPLAY_LIMIT = 1000
+# Sütun adları turkish_fold ile karşılaştırılır
+IMPORT_COLUMN_VARIATIONS = {
+    'Tarih': ['tarih', 'islem tarihi', 'date'],
+    'SKU': ['sku', 'urun kodu', 'stok kodu'],
+    'Adet': ['adet', 'miktar', 'quantity'],
+    'Islem Tipi': ['islem tipi', 'islem', 'tip', 'type'],
+}
+IMPORT_DATE_FORMATS = ['%Y-%m-%d', '%d.%m.%Y']
+IMPORT_ENTRY_TYPES = {'giris': 'Giriş', 'cikis': 'Çıkış'}
+
+def find_import_columns(columns):
+    """İçe aktarma dosyasındaki Tarih, SKU, Adet ve İşlem Tipi sütunlarını yaygın yazımlarıyla bulur."""
+    found = {}
+    for col in columns:
+        norm_col = turkish_fold(str(col).strip())
+        for target, variations in IMPORT_COLUMN_VARIATIONS.items():
+            if target not in found and norm_col in variations:
+                found[target] = col
+    return found
+
+def _read_import_csv_chunks(f):
+    encoding, separator = sniff_csv_sample(f.read(PRODUCT_SNIFF_BYTES))
+    f.seek(0)
+    # Örnekten sonra çözülemeyen baytlar değiştirilir; etkilenen SKU'lar hatalı satır olarak raporlanır
+    return pd.read_csv(f, sep=separator, encoding=encoding, encoding_errors='replace', dtype=str,
+                       keep_default_na=False, chunksize=IMPORT_CHUNK_ROWS)
+
+def _excel_cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def _read_import_excel_chunks(f):
+    import openpyxl
+    # Salt okuma kipinde satırlar çalışma kitabının tamamı belleğe alınmadan okunur
+    workbook = openpyxl.load_workbook(f, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [_excel_cell_text(value) for value in header]
+        width = len(columns)
+        while True:
+            chunk = list(itertools.islice(rows, IMPORT_CHUNK_ROWS))
+            if not chunk:
+                break
+            yield pd.DataFrame(
+                [[_excel_cell_text(value) for value in row[:width]] + [''] * (width - len(row)) for row in chunk],
+                columns=columns,
+            )
+    finally:
+        workbook.close()
+
+def import_catalog_index(products_df):
+    """SKU'dan ürün adına giden, hash indeksli katalog serisini oluşturur."""
+    catalog = products_df[['SKU', 'Urun Adi']].astype(str)
+    catalog = catalog.assign(SKU=catalog['SKU'].str.strip()).drop_duplicates('SKU', keep='last')
+    return pd.Series(catalog['Urun Adi'].to_numpy(), index=pd.Index(catalog['SKU'].to_numpy()))
+
+def validate_import_chunk(chunk, columns, catalog, first_line):
+    """
+    Bir parçayı vektörel olarak doğrular ve (geçerli kayıtlar, hatalı satırlar) döndürür.
+    Tamamen boş satırlar yok sayılır; hatalı satırlar dosyadaki satır numarasıyla raporlanır.
+    """
+    raw = pd.DataFrame({target: chunk[col].astype(str).str.strip().to_numpy() for target, col in columns.items()})
+    sku_positions = catalog.index.get_indexer(raw['SKU'])
+
+    dates = pd.to_datetime(raw['Tarih'], format=IMPORT_DATE_FORMATS[0], errors='coerce')
+    for date_format in IMPORT_DATE_FORMATS[1:]:
+        dates = dates.fillna(pd.to_datetime(raw['Tarih'], format=date_format, errors='coerce'))
+
+    quantities = pd.to_numeric(raw['Adet'], errors='coerce')
+    quantity_valid = (quantities > 0) & (quantities <= np.iinfo('int32').max) & (quantities % 1 == 0)
+    # İşlem tipinde az sayıda farklı değer olduğundan her biri kategorik olarak bir kez dönüştürülür
+    entry_types = turkish_fold_series(raw['Islem Tipi'].astype('category')).map(IMPORT_ENTRY_TYPES)
+
+    blank = (raw == '').all(axis=1).to_numpy()
+    errors = np.select(
+        [sku_positions < 0, dates.isna().to_numpy(), ~quantity_valid.to_numpy(), entry_types.isna().to_numpy()],
+        ["Katalogda olmayan SKU", "Geçersiz tarih", "Geçersiz adet", "Geçersiz işlem tipi"],
+        default='',
+    )
+    valid = (errors == '') & ~blank
+    invalid = (errors != '') & ~blank
+
+    valid_entries = pd.DataFrame({
+        'Tarih': dates[valid].to_numpy(),
+        'SKU': raw['SKU'][valid].to_numpy(),
+        'Urun Adi': catalog.to_numpy()[sku_positions[valid]],
+        'Adet': quantities[valid].to_numpy(dtype='int64'),
+        'Islem Tipi': entry_types[valid].to_numpy(),
+    })
+    invalid_rows = raw[invalid].reset_index(drop=True)
+    invalid_rows.insert(0, 'Satır', first_line + np.flatnonzero(invalid))
+    invalid_rows['Hata'] = errors[invalid]
+    return valid_entries, invalid_rows
+
+def read_import_file(f, file_name, products_df):
+    """
+    Yüklenen CSV veya Excel dosyasını parçalar halinde okuyup doğrular ve
+    (geçerli kayıtlar, hatalı satırlar) döndürür. Gerekli sütunlar yoksa ValueError yükseltir.
+    """
+    is_excel = file_name.lower().endswith(('.xlsx', '.xlsm'))
+    if is_excel and importlib.util.find_spec('openpyxl') is None:
+        raise ValueError("Excel dosyalarını okumak için 'openpyxl' paketinin kurulu olması gerekir.")
+    catalog = import_catalog_index(products_df)
+    chunks = _read_import_excel_chunks(f) if is_excel else _read_import_csv_chunks(f)
+
+    valid_parts, invalid_parts = [], []
+    columns = None
+    first_line = 2 # 1. satır başlıktır
+    for chunk in chunks:
+        if columns is None:
+            columns = find_import_columns(chunk.columns)
+            missing_columns = [target for target in IMPORT_COLUMN_VARIATIONS if target not in columns]
+            if missing_columns:
+                raise ValueError(f"Dosyada gerekli sütunlar bulunamadı: {', '.join(missing_columns)}")
+        valid_entries, invalid_rows = validate_import_chunk(chunk, columns, catalog, first_line)
+        valid_parts.append(valid_entries)
+        invalid_parts.append(invalid_rows)
+        first_line += len(chunk)
+
+    valid_entries = pd.concat(valid_parts, ignore_index=True) if valid_parts else pd.DataFrame(columns=ENTRY_COLUMNS)
+    invalid_rows = pd.concat(invalid_parts, ignore_index=True) if invalid_parts else pd.DataFrame(columns=['Satır', *IMPORT_COLUMN_VARIATIONS, 'Hata'])
+    return valid_entries, invalid_rows
+
+# --- Ürün Arama İndeksi ---
+# Arama, her yeniden çalıştırmada tüm kataloğu taramak yerine ürün listesi sürümüne bağlı
+# olarak önbelleğe alınan bir indeks üzerinden yapılır. 3 ve daha uzun sorgular trigram
+# indeksiyle, daha kısa sorgular ise sıralı kelime listesi üzerinde önek aramasıyla yanıtlanır.
+SEARCH_RESULT_LIMIT = 50
+TURKISH_FOLD_TABLE = str.maketrans('çğıöşüâîû', 'cgiosuaiu')
+
+def turkish_fold(text):
+    """
+    Metni Türkçe kurallarına göre küçültür (I→ı, İ→i) ve aksanları kaldırır.
+    Böylece 'IŞIK', 'ışık', 'Işık' ve 'isik' aynı biçime indirgenir.
+    """
+    return str(text).replace('I', 'ı').replace('İ', 'i').lower().translate(TURKISH_FOLD_TABLE)
+
+def turkish_fold_series(values):
+    """turkish_fold işleminin pandas Series üzerinde vektörel karşılığı."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Kategorik sütunlarda her farklı değer bir kez dönüştürülür
+        folded = turkish_fold_series(pd.Series(values.cat.categories)).to_numpy(dtype=object)
+        return pd.Series(np.append(folded, 'nan')[values.cat.codes.to_numpy()], index=values.index)
+    return (
+        values.astype(str)
+        .str.replace('I', 'ı', regex=False)
+        .str.replace('İ', 'i', regex=False)
+        .str.lower()
+        .str.translate(TURKISH_FOLD_TABLE)
+    )
+
+class ProductSearchIndex:
+    """SKU ve ürün adı üzerinde Türkçe duyarlı, sıralı ve sınırlı sonuç döndüren arama indeksi."""
+
+    def __init__(self, products_df):
+        self.products = products_df[['SKU', 'Urun Adi']].reset_index(drop=True)
+        folded_skus = turkish_fold_series(self.products['SKU'])
+        folded_names = turkish_fold_series(self.products['Urun Adi'])
+        self._skus = folded_skus.to_numpy()
+        self._names = folded_names.to_numpy()
+
+        # Kısa sorgular için SKU ve ad tek sütunda vektörel alt dize taraması yapılır
+        self._haystack = folded_skus + '\n' + folded_names
+        # Yalnızca alt dize olarak eşleşen ürünlerin sırası (kısa addan uzuna) bir kez hesaplanır
+        by_name = pd.DataFrame({'uzunluk': folded_names.str.len().to_numpy(), 'ad': self._names})
+        by_name = by_name.sort_values(['uzunluk', 'ad'], kind='stable')
+        self._name_order = np.empty(len(by_name), dtype=int)
+        self._name_order[by_name.index.to_numpy()] = np.arange(len(by_name))
+
+        # Trigram -> ürün satırları
+        postings = collections.defaultdict(list)
+        for row, (sku, name) in enumerate(zip(self._skus, self._names)):
+            for text in (sku, name):
+                for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+                    postings[gram].append(row)
+        self._postings = {gram: np.unique(rows) for gram, rows in postings.items()}
+
+        # Kısa sorgularda en iyi eşleşmeleri bulmak için SKU ve ad kelimelerinin sıralı listesi
+        tokens = pd.concat([
+            pd.Series(self._skus),
+            pd.Series(self._names).str.split().explode().dropna(),
+        ])
+        tokens = tokens.sort_values(kind='stable')
+        self._tokens = tokens.to_numpy(dtype=str)
+        self._token_rows = tokens.index.to_numpy()
+
+    def _prefix_candidates(self, query):
+        first = np.searchsorted(self._tokens, query, side='left')
+        last = np.searchsorted(self._tokens, query + '\uffff', side='left')
+        return np.unique(self._token_rows[first:last])
+
+    def _trigram_candidates(self, query):
+        grams = {query[i:i + 3] for i in range(len(query) - 2)}
+        posting_lists = sorted((self._postings.get(gram, np.array([], dtype=int)) for gram in grams), key=len)
+        candidates = posting_lists[0]
+        for rows in posting_lists[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        # Trigramların hepsi bulunsa da sorgu ardışık olmayabilir; alt dize olarak doğrula
+        return [row for row in candidates if query in self._skus[row] or query in self._names[row]]
+
+    def _substring_candidates(self, query):
+        return np.flatnonzero(self._haystack.str.contains(query, regex=False).to_numpy(dtype=bool))
+
+    def _rank(self, row, query):
+        sku, name = self._skus[row], self._names[row]
+        # SKU eşleşmeleri SKU sırasına, ad eşleşmeleri kısa addan uzuna sıralanır
+        if sku == query:
+            return (0, 0, sku)
+        if sku.startswith(query):
+            return (1, len(sku), sku)
+        if name.startswith(query):
+            rank = 2
+        elif f' {query}' in f' {name}':
+            rank = 3 # Ad içindeki bir kelimenin başı
         else:
-            new_product_data = pd.DataFrame([{
-                'SKU': new_product_sku,
-                'Urun Adi': new_product_name
-            }])
-            
-            # DataFrame boşsa doğrudan ata, değilse birleştir
-            if products_df.empty:
-                st.session_state['products_df'] = new_product_data
-            else:
-                st.session_state['products_df'] = pd.concat([products_df, new_product_data], ignore_index=True)
-            
-            if save_products(st.session_state['products_df']):
+            rank = 4
+        return (rank, len(name), name)
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT, allowed_skus=None):
+        """
+        Sorguya uyan ürünleri en iyi eşleşmeden başlayarak en fazla `limit` adet döndürür.
+        `allowed_skus` verilirse yalnızca bu SKU'lar arasında arama yapılır.
+        (sonuçlar, toplam eşleşme sayısı) ikilisini döndürür.
+        """
+        query = turkish_fold(query.strip())
+        if not query:
+            return self.products.iloc[0:0], 0
+        if len(query) < 3:
+            candidates = self._substring_candidates(query)
+        else:
+            candidates = np.asarray(self._trigram_candidates(query), dtype=int)
+        if allowed_skus is not None:
+            raw_skus = self.products['SKU'].to_numpy()
+            candidates = candidates[np.isin(raw_skus[candidates], list(allowed_skus))]
+        if len(query) >= 3:
+            best_rows = heapq.nsmallest(limit, candidates, key=lambda row: self._rank(row, query))
+            return self.products.iloc[best_rows], len(candidates)
+
+        # Kelime ve SKU başı eşleşmeleri önce sıralanır; kalan yer yalnızca alt dize olarak
+        # eşleşenlerle (sıra 4: kısa addan uzuna) doldurulur. Böylece sıralama bütün adaylar için
+        # tek tek hesaplanmaz.
+        prefix_rows = np.intersect1d(candidates, self._prefix_candidates(query), assume_unique=True)
+        best_rows = heapq.nsmallest(limit, prefix_rows, key=lambda row: self._rank(row, query))
+        remaining = limit - len(best_rows)
+        if remaining > 0:
+            other_rows = np.setdiff1d(candidates, prefix_rows, assume_unique=True)
+            other_rows = other_rows[np.argsort(self._name_order[other_rows], kind='stable')[:remaining]]
+            best_rows += other_rows.tolist()
+        return self.products.iloc[best_rows], len(candidates)
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_product_search_index(products_version, _products_df):
+    """Ürün listesi sürümü başına bir kez oluşturulan, tüm oturumlarca paylaşılan arama indeksi."""
+    return ProductSearchIndex(_products_df)
+
+# --- Ürün Seçim Bileşeni ---
+PRODUCT_PICKER_LIMIT = SEARCH_RESULT_LIMIT # Seçim kutusuna gönderilen en fazla ürün sayısı
+DELETE_PAGE_SIZES = (25, 50, 100) # Kayıt silme tablosunda sayfa başına kayıt seçenekleri
+ENTRIES_PAGE_SIZES = (50, 100, 500) # Tüm depo işlemleri tablosunda sayfa başına kayıt seçenekleri
+# Hareket tablolarında datetime64 Tarih sütunu saat olmadan, kaydedildiği biçimde gösterilir
+ENTRY_COLUMN_CONFIG = {'Tarih': st.column_config.DateColumn("Tarih", format="YYYY-MM-DD")}
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_product_lookup(products_version, _products_df):
+    """
+    Ürün listesi sürümü başına bir kez, vektörel olarak oluşturulan SKU sözlükleri:
+    SKU -> 'SKU - Ürün Adı' etiketi ve SKU -> ürün adı.
+    """
+    skus = _products_df['SKU'].astype(str)
+    names = _products_df['Urun Adi'].astype(str)
+    labels = skus + ' - ' + names
+    return dict(zip(skus, labels)), dict(zip(skus, names))
+
+def product_picker(label, key, products_df, products_version, search_query='', allowed_skus=None,
+                   placeholder='Seçiniz...', limit=PRODUCT_PICKER_LIMIT):
+    """
+    Ürün seçim kutusu. Tarayıcıya tüm katalog yerine yalnızca en uygun `limit` ürün gönderilir.
+    Seçenekler SKU'lardır; görünen etiketler önbellekteki sözlükten okunur.
+    (seçilen SKU veya None, toplam eşleşme sayısı) ikilisini döndürür.
+    """
+    with perf_span('urun_secici', anahtar=key) as span:
+        labels, _ = get_product_lookup(products_version, products_df)
+        if search_query:
+            search_index = get_product_search_index(products_version, products_df)
+            results, match_count = search_index.search(search_query, limit, allowed_skus)
+            skus = results['SKU'].astype(str).tolist()
+        elif allowed_skus is not None:
+            skus = sorted(sku for sku in allowed_skus if sku in labels)
+            match_count = len(skus)
+            skus = skus[:limit]
+        else:
+            match_count = len(labels)
+            skus = list(itertools.islice(labels, limit))
+        span['eslesme'] = match_count
+
+    # Arama değişse bile mevcut seçim kaybolmasın
+    current_sku = st.session_state.get(key)
+    if current_sku is not None and current_sku not in skus and current_sku in labels:
+        skus = [current_sku] + skus
+
+    selected_sku = st.selectbox(
+        label,
+        options=[None] + skus,
+        format_func=lambda sku: placeholder if sku is None else labels.get(sku, sku),
+        key=key,
+    )
+    return selected_sku, match_count
+
+# --- Oturum Verileri ---
+# Veriler her çalıştırmada sürüm anahtarlı önbellekten alınır; değişmediyse yeniden okunmaz,
+# başka bir oturum yazdıysa güncel hali hemen görülür.
+def refresh_session_data(force=False):
+    """
+    Ürün listesini ve hareketleri oturuma yükler. force verilmezse yalnızca depolama katmanındaki
+    sürümler son yüklemeden bu yana değiştiyse yükler; bölümlerin kendi başına yeniden
+    çalışmaları böylece önbellekten tablo kopyalamaz.
+    """
+    storage = get_storage()
+    with perf_span('refresh_session_data', yeniden_yuklendi=False) as span:
+        data_versions = (storage.products_version(), storage.entries_version())
+        if not force and st.session_state.get('data_versions') == data_versions:
+            return
+        span['yeniden_yuklendi'] = True
+        st.session_state['products_version'] = data_versions[0]
+        st.session_state['products_df'] = load_products()
+        st.session_state['warehouse_entries_df'] = load_warehouse_entries()
+        st.session_state['data_versions'] = data_versions
+
+# --- Sayfa Bölümleri ---
+# Sayfa, birbirinden bağımsız yeniden çalışan parçalara (st.fragment) bölünmüştür. Bir bölümdeki
+# etkileşim (arama, seçim, filtre) yalnızca o bölümü yeniden çalıştırır; diğer bölümlerin tabloları
+# ve rapor hesapları tekrarlanmaz. Veriyi değiştiren işlemler (kaydetme, silme, içe aktarma)
+# st.rerun() ile tüm sayfayı yeniler. Her bölüm başta refresh_session_data() çağırır; böylece
+# yalnızca bölüm yeniden çalıştığında da başka oturumların yazdığı veriler görülür.
+
+# --- Yeni Ürün Ekleme Bölümü ---
+@st.fragment
+@perf_section
+def new_product_section():
+    st.markdown("---")
+    st.subheader("➕ Yeni Ürün Ekle")
+    new_product_sku = st.text_input("Yeni Ürün SKU'su", key="new_sku_input").strip()
+    new_product_name = st.text_input("Yeni Ürün Adı", key="new_product_name_input").strip()
+
+    if st.button("Yeni Ürünü Kaydet"):
+        if new_product_sku and new_product_name:
+            # SKU'nun benzersizliği, diğer oturumların eklemeleri de görülerek depolama katmanında kontrol edilir
+            product_added = add_product(new_product_sku, new_product_name)
+            if product_added is False:
+                st.warning(f"SKU '{new_product_sku}' zaten mevcut. Lütfen farklı bir SKU girin.")
+            elif product_added:
                 st.success(f"Yeni ürün **{new_product_name}** (SKU: **{new_product_sku}**) başarıyla eklendi!")
-                load_products.clear() # Ürün önbelleğini temizle
-                st.session_state['products_df'] = load_products() # Güncel veriyi yeniden yükle
                 st.rerun() # Sayfayı yeniden yükle
-            else:
-                st.error("Yeni ürün kaydedilirken bir sorun oluştu.")
-    else:
-        st.warning("Lütfen hem SKU hem de Ürün Adı girin.")
+        else:
+            st.warning("Lütfen hem SKU hem de Ürün Adı girin.")
 
-st.markdown("---") # Yeni ürün ekleme alanı ile ürün arama arasına ayırıcı
+# --- Depo Giriş/Çıkış Bölümü ---
+@st.fragment
+@perf_section
+def entry_form_section():
+    refresh_session_data()
+    products_df = st.session_state['products_df']
 
-# Eğer ürün listesi boşsa uyarı ver
-if products_df.empty:
-    st.warning("Ürün listesi boş veya yüklenemedi. Lütfen 'products.csv' dosyasını kontrol edin veya yukarıdan yeni ürün ekleyin.")
-else:
     # --- Ürün Arama ve Seçme ---
     st.subheader("Ürün Bilgileri")
 
     search_query = st.text_input("Ürün Adı veya SKU ile Ara", key="search_input_val").strip() 
 
-    filtered_products = products_df.copy()
-    if 'Urun Adi' in filtered_products.columns and 'SKU' in filtered_products.columns:
-        if search_query: 
-            filtered_products = products_df[
-                products_df['Urun Adi'].str.contains(search_query, case=False, na=False) |
-                products_df['SKU'].str.contains(search_query, case=False, na=False) 
-            ]
-            if filtered_products.empty:
-                st.info("Aradığınız ürün bulunamadı.")
-    else:
-        st.warning("Ürün arama ve filtreleme yapılamıyor: 'Urun Adi' veya 'SKU' sütunları bulunamadı.")
-        filtered_products = pd.DataFrame(columns=['SKU', 'Urun Adi']) 
-
-    product_options = [f"{row['SKU']} - {row['Urun Adi']}" for index, row in filtered_products.iterrows()]
-    
-    selected_product_display = st.selectbox(
-        "Ürün Seçin",
-        options=['Seçiniz...'] + product_options,
-        key="product_select_val" 
-    )
-
     selected_sku = None
     selected_product_name = None
 
-    if selected_product_display != 'Seçiniz...':
-        parts = selected_product_display.split(' - ', 1) 
-        selected_sku = parts[0]
-        selected_product_name = parts[1] if len(parts) > 1 else "" 
+    if 'Urun Adi' in products_df.columns and 'SKU' in products_df.columns:
+        selected_sku, match_count = product_picker(
+            "Ürün Seçin",
+            key="product_select_val",
+            products_df=products_df,
+            products_version=st.session_state['products_version'],
+            search_query=search_query,
+        )
+        if search_query and match_count == 0:
+            st.info("Aradığınız ürün bulunamadı.")
+        elif match_count > PRODUCT_PICKER_LIMIT:
+            st.caption(f"{match_count} üründen en uygun {PRODUCT_PICKER_LIMIT} tanesi listeleniyor. Aramayı daraltmak için ürün adı veya SKU yazın.")
+    else:
+        st.warning("Ürün arama ve filtreleme yapılamıyor: 'Urun Adi' veya 'SKU' sütunları bulunamadı.")
+
+    if selected_sku is not None:
+        # Ürün adı, görünen metin bölünerek değil SKU sözlüğünden okunur
+        selected_product_name = get_product_lookup(st.session_state['products_version'], products_df)[1].get(selected_sku, "")
         st.info(f"Seçilen Ürün: **{selected_product_name}** (SKU: **{selected_sku}**)")
+        # Güncel stok, geçmiş taranmadan saklanan bakiyeden okunur
+        st.caption(f"Güncel stok: **{get_storage().stock_of(selected_sku)}** adet")
 
     # --- İşlem Tipi ve Adet Girişi ---
     st.subheader("İşlem Detayları")
@@ -324,119 +2903,245 @@ else:
                 'Islem Tipi': transaction_type # Yeni sütun eklendi
             }])
             
-            if warehouse_entries_df.empty:
-                updated_df_to_save = new_entry
-            else:
-                updated_df_to_save = pd.concat([warehouse_entries_df, new_entry], ignore_index=True)
-            
-            if save_warehouse_entry(updated_df_to_save): 
+            # Yalnızca yeni kayıt deftere eklenir, mevcut geçmiş yeniden yazılmaz
+            if save_warehouse_entry(new_entry): 
                 st.success(f"**{quantity}** adet **{selected_product_name}** ({selected_sku}) **{entry_date.strftime('%d.%m.%Y')}** tarihinde **{transaction_type}** olarak kaydedildi!")
                 
-                # Önbelleği temizle
-                load_warehouse_entries.clear()
-                
-                # Session State'teki veriyi, diskten yeniden yükleyerek güncelle
-                st.session_state['warehouse_entries_df'] = load_warehouse_entries()
-                
-                # Sayfayı yeniden yükleyerek tüm inputları resetle ve güncel listeyi göster
+                # Yazma defter sürümünü artırdığından yeniden çalıştırmada güncel liste yüklenir;
+                # sayfayı yeniden yükleyerek tüm inputları resetle ve güncel listeyi göster
                 st.rerun() 
             
         else:
             st.warning("Lütfen bir ürün seçin ve geçerli bir adet girin.")
 
+# --- Toplu İçe Aktarma Bölümü ---
+@st.fragment
+@perf_section
+def bulk_import_section():
+    refresh_session_data()
+    products_df = st.session_state['products_df']
+    st.markdown("---")
+    st.subheader("📥 Toplu Hareket İçe Aktar")
+    st.caption("CSV veya Excel dosyasında Tarih, SKU, Adet ve İşlem Tipi sütunları bulunmalıdır. Ürün adları katalogdan alınır.")
+    if 'import_view_version' not in st.session_state:
+        st.session_state['import_view_version'] = 0
+    import_file = st.file_uploader("Hareket Dosyası", type=['csv', 'txt', 'xlsx', 'xlsm'], key=f"import_file_{st.session_state['import_view_version']}")
+
+    if import_file is not None:
+        # Doğrulama sonucu, aynı dosya ve ürün listesi için yeniden çalıştırmalarda tekrar hesaplanmaz
+        import_key = (import_file.file_id, st.session_state['products_version'])
+        import_result = st.session_state.get('import_result')
+        if import_result is None or import_result[0] != import_key:
+            try:
+                with st.spinner("Dosya doğrulanıyor..."):
+                    import_result = (import_key, *read_import_file(import_file, import_file.name, products_df))
+            except Exception as e:
+                st.error(f"Dosya okunurken bir hata oluştu: {e}")
+                import_result = None
+            st.session_state['import_result'] = import_result
+
+        if import_result is not None:
+            _, import_valid_df, import_invalid_df = import_result
+            st.write(f"Geçerli kayıt: **{len(import_valid_df)}**, hatalı satır: **{len(import_invalid_df)}**")
+            if not import_invalid_df.empty:
+                st.warning("Hatalı satırlar içe aktarılmaz. Dosyayı düzelterek yeniden yükleyebilirsiniz.")
+                st.dataframe(import_invalid_df.head(IMPORT_ERROR_DISPLAY_LIMIT), width='stretch', hide_index=True)
+                if len(import_invalid_df) > IMPORT_ERROR_DISPLAY_LIMIT:
+                    st.caption(f"{len(import_invalid_df)} hatalı satırdan ilk {IMPORT_ERROR_DISPLAY_LIMIT} tanesi listeleniyor.")
+            if st.button(f"Geçerli Kayıtları İçe Aktar ({len(import_valid_df)})", type="primary", disabled=import_valid_df.empty):
+                # Geçerli satırların tamamı tek yazma isteğiyle kaydedilir
+                if save_warehouse_entry(import_valid_df):
+                    st.success(f"{len(import_valid_df)} kayıt başarıyla içe aktarıldı.")
+                    st.session_state.pop('import_result', None)
+                    st.session_state['import_view_version'] += 1
+                    st.rerun()
+
+# --- Güncel Stok Bölümü ---
+@st.fragment
+@perf_section
+def stock_section():
+    refresh_session_data()
+    products_df = st.session_state['products_df']
+    st.markdown("---")
+    st.subheader("Güncel Stok")
+    with perf_span('stock_balances') as span:
+        stock_balances = get_storage().stock_balances()
+        span['satir'] = len(stock_balances)
+    if stock_balances:
+        current_stock_df = pd.DataFrame(list(stock_balances.items()), columns=['SKU', 'Stok'])
+        current_stock_df = current_stock_df.merge(products_df[['SKU', 'Urun Adi']], on='SKU', how='left')
+        st.dataframe(current_stock_df[['SKU', 'Urun Adi', 'Stok']].sort_values(by='SKU'), width='stretch', hide_index=True)
+    else:
+        st.info("Henüz stok hareketi bulunmamaktadır.")
+
+    if st.button("Stok Tutarlılığını Kontrol Et", help="Stok bakiyelerini tüm hareketlerden yeniden hesaplar ve farkları düzeltir."):
+        try:
+            with perf_span('check_stock_balances'):
+                stock_differences = get_storage().check_stock_balances()
+            if stock_differences.empty:
+                st.success("Stok bakiyeleri hareketlerle tutarlı.")
+            else:
+                st.warning(f"{len(stock_differences)} üründe fark bulundu ve bakiyeler yeniden hesaplandı.")
+                st.dataframe(stock_differences, width='stretch', hide_index=True)
+        except Exception as e:
+            st.error(f"Stok tutarlılık kontrolü sırasında bir hata oluştu: {e}")
+
+# --- Depo İşlemleri Bölümü ---
+@st.fragment
+@perf_section
+def recent_movements_section():
+    refresh_session_data()
+    warehouse_entries_df = st.session_state['warehouse_entries_df']
     st.markdown("---")
     st.subheader("Son Depo İşlemleri")
     if not warehouse_entries_df.empty:
         # 'Islem Tipi' sütununu da göster
-        st.dataframe(warehouse_entries_df[['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi']].sort_values(by='Tarih', ascending=False).head(10))
+        st.dataframe(warehouse_entries_df.nlargest(10, 'Tarih')[['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi']], column_config=ENTRY_COLUMN_CONFIG)
     else:
         st.info("Henüz hiç depo işlemi yapılmadı.")
 
     st.markdown("---")
     st.subheader("Tüm Depo İşlemleri")
     if not warehouse_entries_df.empty:
-        
-        st.dataframe(warehouse_entries_df[['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi']], use_container_width=True)
+        # Hareketler sıra numarasına göre sıralıdır; tarayıcıya yalnızca seçili sayfa, en yeniler önce gönderilir
+        col_page_size, col_page = st.columns(2)
+        with col_page_size:
+            entries_page_size = st.selectbox("Sayfa Başına Kayıt", ENTRIES_PAGE_SIZES, key="entries_page_size")
+        page_count = max(1, -(-len(warehouse_entries_df) // entries_page_size))
+        with col_page:
+            entries_page = st.number_input(f"Sayfa (toplam {page_count})", min_value=1, max_value=page_count, value=1, step=1, key="entries_page")
+        end = len(warehouse_entries_df) - (entries_page - 1) * entries_page_size
+        page_df = warehouse_entries_df.iloc[max(0, end - entries_page_size):end].iloc[::-1]
+        st.dataframe(page_df[['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi']], width='stretch', column_config=ENTRY_COLUMN_CONFIG)
+    else:
+        st.info("Depo işlemleri henüz boş.")
 
-        st.markdown("---")
-        st.subheader("Kayıt Silme Alanı")
+# --- Kayıt Silme Bölümü ---
+@st.fragment
+@perf_section
+def delete_section():
+    refresh_session_data()
+    warehouse_entries_df = st.session_state['warehouse_entries_df']
+    if warehouse_entries_df.empty:
+        return
+
+    st.markdown("---")
+    st.subheader("Kayıt Silme Alanı")
         
-        # Her satır için ayrı bir "Sil" butonu oluşturma
-        if not warehouse_entries_df.empty:
-            for i in range(len(warehouse_entries_df)):
-                row = warehouse_entries_df.iloc[i]
-                
-                # Her buton için benzersiz bir key sağlamak önemli
-                # Burada Tarih ve SKU'yu kullanarak daha benzersiz bir anahtar oluşturuyoruz
-                unique_key = f"delete_button_{i}_{row['SKU']}_{row['Tarih']}_{row['Adet']}_{row['Islem Tipi']}" 
-                
-                # Butonun yanına silinecek kaydın özetini gösterelim
-                display_text = f"{row['Tarih'].strftime('%d.%m.%Y')} - {row['Urun Adi']} ({row['SKU']}) - {row['Adet']} {row['Islem Tipi']}"
-                
-                col_text, col_button = st.columns([0.8, 0.2])
-                with col_text:
-                    st.write(display_text)
-                with col_button:
-                    if st.button(f"Sil", key=unique_key):
-                        # Satırı silme işlemi
-                        st.session_state['warehouse_entries_df'] = st.session_state['warehouse_entries_df'].drop(row.name).reset_index(drop=True)
-                        if save_warehouse_entry(st.session_state['warehouse_entries_df']):
-                            st.success(f"Kayıt başarıyla silindi: {display_text}")
-                            load_warehouse_entries.clear() # Önbelleği temizle
-                            st.session_state['warehouse_entries_df'] = load_warehouse_entries() # Güncel veriyi yükle
-                            st.rerun() # Sayfayı yeniden yükle
-        else:
-            st.info("Silinecek bir depo işlemi bulunmamaktadır.")
+    # Kayıtlar, defterdeki kalıcı sıra numaraları (Kayıt No) ile seçilip toplu olarak silinir.
+    # Yalnızca seçili sayfadaki kayıtlar tarayıcıya gönderilir.
+    if 'delete_selected_ids' not in st.session_state:
+        st.session_state['delete_selected_ids'] = set()
+    if 'delete_view_version' not in st.session_state:
+        st.session_state['delete_view_version'] = 0
+    selected_ids = st.session_state['delete_selected_ids']
 
+    col_filter_text, col_filter_type, col_page_size = st.columns([0.5, 0.25, 0.25])
+    with col_filter_text:
+        delete_filter_text = st.text_input("Ürün Adı veya SKU ile Filtrele", key="delete_filter_text").strip()
+    with col_filter_type:
+        delete_filter_type = st.selectbox("İşlem Tipi", ('Tümü', 'Giriş', 'Çıkış'), key="delete_filter_type")
+    with col_page_size:
+        delete_page_size = st.selectbox("Sayfa Başına Kayıt", DELETE_PAGE_SIZES, key="delete_page_size")
 
-        st.markdown("---") # Silme alanı ile indirme butonu arasına ayırıcı
-        df_for_download = warehouse_entries_df.copy()
-        if 'Tarih' in df_for_download.columns:
-            df_for_download['Tarih'] = df_for_download['Tarih'].apply(lambda x: x.isoformat() if isinstance(x, datetime.date) else x)
+    with perf_span('silme_filtresi') as span:
+        deletable_df = warehouse_entries_df
+        if delete_filter_type != 'Tümü':
+            deletable_df = deletable_df[deletable_df['Islem Tipi'] == delete_filter_type]
+        if delete_filter_text:
+            folded_filter = turkish_fold(delete_filter_text)
+            deletable_df = deletable_df[
+                turkish_fold_series(deletable_df['SKU']).str.contains(folded_filter, regex=False) |
+                turkish_fold_series(deletable_df['Urun Adi']).str.contains(folded_filter, regex=False)
+            ]
+        # En yeni kayıtlar önce
+        deletable_df = deletable_df.sort_values(by='Sira', ascending=False)
+        span['satir'] = len(deletable_df)
 
-        st.download_button(
-            label="Tüm Depo İşlemlerini İndir (CSV)",
-            data=df_for_download.to_csv(index=False, encoding='utf-8').encode('utf-8'),
-            file_name="tum_depo_islemleri.csv",
-            mime="text/csv",
-        )
-    else:
-        st.info("Depo işlemleri henüz boş.")
+    page_count = max(1, -(-len(deletable_df) // delete_page_size))
+    delete_page = st.number_input(f"Sayfa (toplam {page_count})", min_value=1, max_value=page_count, value=1, step=1, key="delete_page")
+    page_df = deletable_df.iloc[(delete_page - 1) * delete_page_size:delete_page * delete_page_size]
 
+    editor_df = page_df[['Sira'] + ENTRY_COLUMNS].rename(columns={'Sira': 'Kayit No'})
+    editor_df.insert(0, 'Sil', editor_df['Kayit No'].isin(selected_ids))
+    edited_df = st.data_editor(
+        editor_df,
+        hide_index=True,
+        width='stretch',
+        disabled=['Kayit No'] + ENTRY_COLUMNS,
+        column_config={**ENTRY_COLUMN_CONFIG, 'Sil': st.column_config.CheckboxColumn("Sil", default=False)},
+        # Filtre, sayfa veya veri değişince düzenleyici durumu sıfırlansın
+        key=f"delete_editor_{st.session_state['delete_view_version']}_{delete_filter_type}_{delete_filter_text}_{delete_page_size}_{delete_page}",
+    )
+
+    # Bu sayfadaki işaretlemeleri sayfalar arası seçime yansıt
+    page_ids = set(edited_df['Kayit No'])
+    checked_ids = set(edited_df.loc[edited_df['Sil'], 'Kayit No'])
+    selected_ids.difference_update(page_ids - checked_ids)
+    selected_ids.update(checked_ids)
+
+    col_delete_info, col_delete_button, col_clear_button = st.columns([0.5, 0.3, 0.2])
+    with col_delete_info:
+        st.write(f"Seçili kayıt sayısı: **{len(selected_ids)}**")
+    with col_clear_button:
+        if st.button("Seçimi Temizle", disabled=not selected_ids):
+            selected_ids.clear()
+            st.session_state['delete_view_version'] += 1
+            # Veri değişmediğinden yalnızca bu bölüm yeniden çalıştırılır
+            st.rerun(scope="fragment")
+    with col_delete_button:
+        if st.button(f"Seçilenleri Sil ({len(selected_ids)})", type="primary", disabled=not selected_ids):
+            # Tüm seçili kayıtlar tek işlemde silinir
+            if delete_warehouse_entries(sorted(selected_ids)):
+                st.success(f"{len(selected_ids)} kayıt başarıyla silindi.")
+                selected_ids.clear()
+                st.session_state['delete_view_version'] += 1
+                st.rerun() # Sayfayı yeniden yükle
+
+# --- Raporlama ve Dışa Aktarma Bölümü ---
+@st.fragment
+@perf_section
+def report_section():
+    refresh_session_data()
+    products_df = st.session_state['products_df']
+    warehouse_entries_df = st.session_state['warehouse_entries_df']
     st.markdown("---")
     st.subheader("Raporlama ve Özet")
 
     if not warehouse_entries_df.empty:
         # --- Tarih Aralığı Filtreleri ---
+        storage = get_storage()
+        with perf_span('entry_date_bounds'):
+            first_entry_date, last_entry_date = storage.entry_date_bounds()
         col_start_date, col_end_date = st.columns(2)
         with col_start_date:
-            start_date = st.date_input("Başlangıç Tarihi", value=warehouse_entries_df['Tarih'].min() if not warehouse_entries_df.empty else datetime.date.today(), key="report_start_date")
+            start_date = st.date_input("Başlangıç Tarihi", value=first_entry_date or datetime.date.today(), key="report_start_date")
         with col_end_date:
-            end_date = st.date_input("Bitiş Tarihi", value=warehouse_entries_df['Tarih'].max() if not warehouse_entries_df.empty else datetime.date.today(), key="report_end_date")
-
-        # Tarih filtrelemesi yap
-        filtered_by_date_df = warehouse_entries_df[
-            (warehouse_entries_df['Tarih'] >= start_date) & 
-            (warehouse_entries_df['Tarih'] <= end_date)
-        ].copy()
+            end_date = st.date_input("Bitiş Tarihi", value=last_entry_date or datetime.date.today(), key="report_end_date")
 
-        if start_date > end_date:
+        date_range_valid = start_date <= end_date
+        if not date_range_valid:
             st.warning("Başlangıç tarihi bitiş tarihinden sonra olamaz. Lütfen tarihleri kontrol edin.")
-            filtered_by_date_df = pd.DataFrame(columns=warehouse_entries_df.columns) # Hatalı durumda boş DataFrame göster
 
         # --- Genel Toplam Giriş/Çıkış Özeti (Tarih Filtresi Uygulanmış) ---
         st.markdown("---")
         st.subheader(f"Seçili Tarih Aralığı ({start_date.strftime('%d.%m.%Y')} - {end_date.strftime('%d.%m.%Y')}) Özeti")
 
-        if not filtered_by_date_df.empty:
-            total_giris_filtered = filtered_by_date_df[filtered_by_date_df['Islem Tipi'] == 'Giriş']['Adet'].sum()
-            total_cikis_filtered = filtered_by_date_df[filtered_by_date_df['Islem Tipi'] == 'Çıkış']['Adet'].sum()
+        # Toplamlar depolama katmanında (SQLite'ta indeksli sorguyla) hesaplanır
+        with perf_span('summarize_entries'):
+            range_totals = storage.summarize_entries(start_date, end_date) if date_range_valid else {'Giriş': 0, 'Çıkış': 0}
+        if range_totals['Giriş'] or range_totals['Çıkış']:
+            total_giris_filtered = range_totals['Giriş']
+            total_cikis_filtered = range_totals['Çıkış']
 
             st.markdown(f"**Toplam Giriş:** {total_giris_filtered} adet")
             st.markdown(f"**Toplam Çıkış:** {total_cikis_filtered} adet")
             st.markdown(f"**Net Stok Değişimi:** {total_giris_filtered - total_cikis_filtered} adet")
         else:
             st.info("Seçilen tarih aralığında bir işlem bulunmamaktadır.")
+        with perf_span('stock_as_of'):
+            total_stock = storage.stock_as_of(end_date)
+        st.markdown(f"**{end_date.strftime('%d.%m.%Y')} İtibarıyla Toplam Stok:** {total_stock} adet")
         
         st.markdown("---")
 
@@ -445,40 +3150,192 @@ else:
         
         # Ürün seçenekleri, "Tüm Ürünler" seçeneği ile birlikte
         # Sadece bu tarih aralığındaki işlemlerde geçen ürünleri gösterelim
-        products_in_filtered_range = filtered_by_date_df['SKU'].unique()
-        product_filter_options_in_range = ['Tüm Ürünler'] + sorted([
-            f"{row['SKU']} - {row['Urun Adi']}" 
-            for index, row in products_df[products_df['SKU'].isin(products_in_filtered_range)].iterrows()
-        ])
-        
-        selected_product_for_report = st.selectbox(
+        with perf_span('skus_in_range') as span:
+            products_in_filtered_range = storage.skus_in_range(start_date, end_date) if date_range_valid else []
+            span['satir'] = len(products_in_filtered_range)
+        report_search_query = st.text_input("Raporlanacak Ürünü Ara", key="product_report_search_val").strip()
+        selected_sku_for_report, report_match_count = product_picker(
             "Raporlanacak Ürünü Seçin",
-            options=product_filter_options_in_range,
-            key="product_report_select_val"
+            key="product_report_select_val",
+            products_df=products_df,
+            products_version=st.session_state['products_version'],
+            search_query=report_search_query,
+            allowed_skus=products_in_filtered_range,
+            placeholder='Tüm Ürünler',
         )
+        if report_match_count > PRODUCT_PICKER_LIMIT:
+            st.caption(f"{report_match_count} üründen ilk {PRODUCT_PICKER_LIMIT} tanesi listeleniyor. Aramayı daraltmak için ürün adı veya SKU yazın.")
 
-        final_filtered_df = filtered_by_date_df.copy()
-
-        if selected_product_for_report != 'Tüm Ürünler':
-            # Seçilen ürünün SKU'sunu bul
-            selected_sku_for_report = selected_product_for_report.split(' - ')[0]
-            final_filtered_df = filtered_by_date_df[filtered_by_date_df['SKU'] == selected_sku_for_report]
+        if selected_sku_for_report is not None:
+            selected_product_for_report = get_product_lookup(st.session_state['products_version'], products_df)[0].get(selected_sku_for_report, selected_sku_for_report)
+            with perf_span('query_entries', sku=selected_sku_for_report) as span:
+                final_filtered_df = resolve_product_names(storage.query_entries(start_date, end_date, sku=selected_sku_for_report), products_df)
+                span['satir'] = len(final_filtered_df)
             
             if not final_filtered_df.empty:
-                product_total_giris = final_filtered_df[final_filtered_df['Islem Tipi'] == 'Giriş']['Adet'].sum()
-                product_total_cikis = final_filtered_df[final_filtered_df['Islem Tipi'] == 'Çıkış']['Adet'].sum()
+                product_totals = storage.summarize_entries(start_date, end_date, sku=selected_sku_for_report)
+                product_total_giris = product_totals['Giriş']
+                product_total_cikis = product_totals['Çıkış']
                 
                 st.markdown(f"**{selected_product_for_report} için Toplam Giriş:** {product_total_giris} adet")
                 st.markdown(f"**{selected_product_for_report} için Toplam Çıkış:** {product_total_cikis} adet")
                 st.markdown(f"**{selected_product_for_report} için Net Stok Değişimi:** {product_total_giris - product_total_cikis} adet")
+                st.markdown(f"**{selected_product_for_report} için {end_date.strftime('%d.%m.%Y')} İtibarıyla Stok:** {storage.stock_as_of(end_date, sku=selected_sku_for_report)} adet")
                 
-                st.dataframe(final_filtered_df[['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi']].sort_values(by='Tarih', ascending=False), use_container_width=True)
+                st.dataframe(final_filtered_df[['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi']].sort_values(by='Tarih', ascending=False), width='stretch', column_config=ENTRY_COLUMN_CONFIG)
             else:
                 st.info(f"{selected_product_for_report} için seçilen tarih aralığında hiçbir işlem bulunamadı.")
         else:
             # "Tüm Ürünler" seçiliyse, tarih filtrelenmiş tüm işlemleri göster
+            with perf_span('query_entries') as span:
+                final_filtered_df = resolve_product_names(storage.query_entries(start_date, end_date), products_df) if date_range_valid else typed_entries(pd.DataFrame(columns=['Sira'] + ENTRY_COLUMNS))
+                span['satir'] = len(final_filtered_df)
             st.info("Seçilen tarih aralığındaki tüm ürünlerin hareketliliği aşağıdaki tabloda gösterilmektedir.")
-            st.dataframe(final_filtered_df[['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi']].sort_values(by='Tarih', ascending=False), use_container_width=True)
+            st.dataframe(final_filtered_df[['Tarih', 'SKU', 'Urun Adi', 'Adet', 'Islem Tipi']].sort_values(by='Tarih', ascending=False), width='stretch', column_config=ENTRY_COLUMN_CONFIG)
+
+        # --- Dışa Aktarma (Rapor Filtreleri Uygulanmış) ---
+        st.markdown("---")
+        st.subheader("Depo İşlemlerini Dışa Aktar")
+        export_format = st.selectbox("Dosya Biçimi", list(EXPORT_FORMATS), key="export_format")
+        export_available = export_format_available(export_format)
+        if not export_available:
+            st.warning(f"{export_format} biçiminde dışa aktarmak için '{EXPORT_FORMATS[export_format][3]}' paketinin kurulu olması gerekir.")
+        st.caption("Dosya, yukarıdaki tarih aralığı ve ürün seçimine göre yalnızca indirme düğmesine basıldığında oluşturulur.")
+
+        # Dosya, düğmeye basıldığında ayrı bir iş parçacığında üretilir; filtreler burada sabitlenir
+        export_filters = (start_date, end_date, selected_sku_for_report)
+        st.download_button(
+            label=f"Depo İşlemlerini İndir ({export_format})",
+            data=functools.partial(export_entries, storage, products_df, export_format, *export_filters),
+            file_name=export_file_name(export_format, *export_filters),
+            mime=EXPORT_FORMATS[export_format][1],
+            on_click="ignore",
+            disabled=not (date_range_valid and export_available),
+        )
             
     else:
         st.info("Raporlama için henüz hiç depo işlemi bulunmamaktadır.")
+
+# --- Performans Tanılama Paneli ---
+def perf_panel():
+    """
+    Kenar çubuğunda son çalıştırmanın aralık sürelerini, son çalıştırmaların özetini ve
+    önbellek sayaçlarını gösterir.
+    """
+    st.sidebar.subheader("🩺 Performans Tanılama")
+    recent_runs = list(st.session_state.get('perf_recent_runs', ()))
+    if not recent_runs:
+        st.sidebar.caption("Henüz ölçüm yok; sayfa bir kez daha çalıştığında son çalıştırma burada görünür.")
+    else:
+        # Panel çizilirken bu çalıştırma henüz bitmediği için bir önceki çalıştırma gösterilir
+        last_run = recent_runs[-1]
+        st.sidebar.caption(f"Son çalıştırma: {last_run['calistirma']} · {last_run['toplam_ms']:.1f} ms · {last_run['zaman']}")
+        st.sidebar.dataframe(perf_run_summary(last_run), width='stretch', hide_index=True)
+        st.sidebar.caption("Son çalıştırmalar (tek bölümün yeniden çalıştığı ölçümler dahil):")
+        st.sidebar.dataframe(
+            pd.DataFrame(
+                [(run['zaman'][11:], run['calistirma'], run['toplam_ms']) for run in reversed(recent_runs)],
+                columns=['Zaman', 'Çalıştırma', 'Toplam (ms)'],
+            ),
+            width='stretch',
+            hide_index=True,
+        )
+
+    storage = get_storage()
+    cache_counts = storage.cache_stats.snapshot()
+    if cache_counts:
+        st.sidebar.caption("Önbellek sayaçları (süreç başlangıcından beri):")
+        st.sidebar.dataframe(
+            pd.DataFrame(
+                [(name, counts['hit'], counts['miss']) for name, counts in sorted(cache_counts.items())],
+                columns=['Önbellek', 'İsabet', 'Iska'],
+            ),
+            width='stretch',
+            hide_index=True,
+        )
+    if storage.name == 'firestore':
+        st.sidebar.caption(
+            f"Firestore'dan okunan belge sayısı: ürünler {storage.products_mirror.read_count}, "
+            f"hareketler {storage.movements_mirror.read_count}"
+        )
+    if PERF_LOG_FILE:
+        st.sidebar.caption(f"Ölçümler '{PERF_LOG_FILE}' dosyasına JSON satırları olarak yazılıyor.")
+    else:
+        st.sidebar.caption("Ölçüm günlüğü kapalı; dosyaya yazmak için DEPO_PERF_LOG ortam değişkenine bir dosya yolu verin.")
+
+# --- Uygulama ---
+@perf_section
+def main():
+    """
+    Sayfayı baştan sona çizer. Streamlit betiği __main__ olarak çalıştırır; modül başka bir
+    betikten (ör. benchmark.py) içe aktarıldığında arayüz çalıştırılmaz.
+    """
+    # --- Uygulama Başlığı ---
+    st.set_page_config(layout="centered", page_title="Depo Giriş/Çıkış Kayıt Sistemi")
+    st.title("📦 Depo Giriş/Çıkış Kayıt Sistemi")
+    st.markdown("Gün içinde depoya alınan ve depodan çıkan ürünleri buraya kaydedin.")
+
+    # --- Depolama Katmanı Kontrolü ---
+    if STORAGE_BACKEND not in ('csv', 'sqlite', 'firestore'):
+        st.sidebar.warning(f"Bilinmeyen depolama katmanı '{STORAGE_BACKEND}', CSV kullanılıyor.")
+    # Firestore istemcisi yalnızca Firestore katmanı seçildiğinde, burada ilk kez oluşturulur
+    if get_storage().name == 'firestore' and initialize_firebase() is None:
+        st.stop()
+    # SQLite veya Firestore ilk kez kullanılıyorsa mevcut CSV verileri bir kereye mahsus aktarılır
+    if get_storage().name == 'sqlite' and get_storage().migrate_from_csv(CsvStorage()):
+        st.sidebar.info(f"Mevcut CSV verileri '{SQLITE_DB_FILE}' veritabanına aktarıldı.")
+    if get_storage().name == 'firestore' and get_storage().migrate_from_csv(CsvStorage()):
+        st.sidebar.info("Mevcut CSV verileri Firestore'a aktarılmak üzere kuyruğa alındı.")
+
+    # --- Session State Başlatma ---
+    # Oturum boşsa veriler yüklenir; aksi halde yalnızca sürümler değiştiyse yeniden yüklenir
+    refresh_session_data(force='data_versions' not in st.session_state)
+    products_df = st.session_state['products_df']
+
+    # --- Defter Bakımı (Kenar Çubuğu) ---
+    # Sıkıştırma yalnızca CSV defterinde anlamlıdır; SQLite silinen kayıtları doğrudan kaldırır
+    if get_storage().name == 'csv':
+        st.sidebar.subheader("🗄️ Defter Bakımı")
+    if get_storage().name == 'csv' and st.sidebar.button("Defteri Sıkıştır", help="Silinen kayıtları defterden temizler ve segmentleri yeniden yazar."):
+        try:
+            remaining_count = get_storage().compact()
+            st.sidebar.success(f"Defter sıkıştırıldı. Kalan kayıt sayısı: {remaining_count}")
+        except Exception as e:
+            st.sidebar.error(f"Defter sıkıştırılırken bir hata oluştu: {e}")
+
+
+    # --- Firestore Senkronizasyonu (Kenar Çubuğu) ---
+    if get_storage().name == 'firestore':
+        outbox_status = get_storage().outbox.status()
+        st.sidebar.subheader("☁️ Firestore Senkronizasyonu")
+        if get_storage().offline_error:
+            st.sidebar.warning(f"Firestore'a ulaşılamıyor; son eşitlenen veriler ve kuyruktaki değişiklikler gösteriliyor. Hata: {get_storage().offline_error}")
+        if outbox_status['bekleyen'] == 0:
+            st.sidebar.caption("Tüm değişiklikler Firestore'a gönderildi.")
+        elif outbox_status['son_hata']:
+            st.sidebar.warning(f"Gönderilmeyi bekleyen {outbox_status['bekleyen']} işlem var; yeniden denenecek. Son hata: {outbox_status['son_hata']}")
+        else:
+            st.sidebar.info(f"Gönderilmeyi bekleyen {outbox_status['bekleyen']} işlem var.")
+
+    # --- Performans Tanılama (Kenar Çubuğu) ---
+    if st.sidebar.toggle("🩺 Performans Tanılama", key="perf_panel", help="Sayfa bölümlerinin ve veri katmanı çağrılarının sürelerini gösterir."):
+        perf_panel()
+
+    # --- Sayfa Düzeni ---
+    new_product_section()
+
+    st.markdown("---") # Yeni ürün ekleme alanı ile ürün arama arasına ayırıcı
+
+    # Eğer ürün listesi boşsa uyarı ver
+    if products_df.empty:
+        st.warning("Ürün listesi boş veya yüklenemedi. Lütfen 'products.csv' dosyasını kontrol edin veya yukarıdan yeni ürün ekleyin.")
+    else:
+        entry_form_section()
+        bulk_import_section()
+        stock_section()
+        recent_movements_section()
+        delete_section()
+        report_section()
+
+if __name__ == '__main__':
+    main()